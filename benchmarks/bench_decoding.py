@@ -0,0 +1,98 @@
+"""
+Время и пиковая память разбора ответов GetCandles и Shares.
+
+Запуск: ``python -m benchmarks.bench_decoding``
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.core.candles import CandleSeries
+from src.integrations.tinkoff_decoder import (
+    SHARE_FIELDS,
+    decode_candles,
+    decode_shares,
+    unwrap_payload,
+)
+
+
+def _quotation(value: float) -> Dict[str, Any]:
+    units = int(value)
+    return {"units": str(units), "nano": int(round((value - units) * 1e9))}
+
+
+def build_candles_body(count: int) -> bytes:
+    candles = [
+        {
+            "open": _quotation(100 + idx * 0.01),
+            "high": _quotation(101 + idx * 0.01),
+            "low": _quotation(99 + idx * 0.01),
+            "close": _quotation(100.5 + idx * 0.01),
+            "volume": str(1_000 + idx),
+            "time": f"2024-01-01T{idx % 24:02d}:00:00Z",
+            "isComplete": True,
+            "candleSource": "CANDLE_SOURCE_EXCHANGE",
+        }
+        for idx in range(count)
+    ]
+    return json.dumps({"payload": {"candles": candles}}).encode()
+
+
+def build_shares_body(count: int) -> bytes:
+    instruments = []
+    for idx in range(count):
+        item: Dict[str, Any] = {field: f"{field}-{idx}" for field in SHARE_FIELDS}
+        item.update({f"extraField{extra}": {"units": "1", "nano": extra} for extra in range(30)})
+        instruments.append(item)
+    return json.dumps({"payload": {"instruments": instruments}}).encode()
+
+
+def _full_candles(body: bytes) -> CandleSeries:
+    return CandleSeries.from_tinkoff(unwrap_payload(body).get("candles") or [])
+
+
+def _full_shares(body: bytes) -> List[Dict[str, Any]]:
+    return [
+        {field: value for field, value in item.items() if field in SHARE_FIELDS}
+        for item in unwrap_payload(body).get("instruments") or []
+    ]
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, float]:
+    """
+    Возвращает (время в мс, пиковую память в МБ) одного вызова.
+
+    Время и память меряются разными прогонами: tracemalloc заметно замедляет код.
+    """
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    cases = [
+        ("GetCandles", 3_000, build_candles_body, _full_candles, decode_candles),
+        ("GetCandles", 100_000, build_candles_body, _full_candles, decode_candles),
+        ("Shares", 2_000, build_shares_body, _full_shares, decode_shares),
+    ]
+    print(f"{'endpoint':<11} {'items':>7} {'body, MB':>9} {'parser':<10} {'ms':>9} {'peak, MB':>9}")
+    for endpoint, count, build, full, fast in cases:
+        body = build(count)
+        for name, parser in (("full", full), ("streaming", fast)):
+            elapsed_ms, peak_mb = measure(lambda: parser(body))
+            print(
+                f"{endpoint:<11} {count:>7} {len(body) / 1024 / 1024:>9.1f} "
+                f"{name:<10} {elapsed_ms:>9.1f} {peak_mb:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Сравнение поиска уровней поддержки/сопротивления.
+
+Запуск: ``python -m benchmarks.bench_levels``
+"""
+
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.services.trading import _find_levels
+
+
+def _reference_levels(prices: List[float], window: int) -> List[Dict[str, Any]]:
+    """Исходная реализация O(n·window) на чистом Python."""
+    levels: List[Dict[str, Any]] = []
+    for idx in range(window, len(prices) - window):
+        current = prices[idx]
+        neighbours = [prices[j] for j in range(idx - window, idx + window + 1) if j != idx]
+        if all(price >= current for price in neighbours):
+            levels.append({"type": "support", "price": current, "index": idx})
+        if all(price <= current for price in neighbours):
+            levels.append({"type": "resistance", "price": current, "index": idx})
+    return levels
+
+
+def _strided_levels(prices: np.ndarray, window: int) -> Any:
+    """Векторизованная реализация O(n·window) через sliding_window_view."""
+    windows = sliding_window_view(prices, (2 * window) + 1)
+    centers = prices[window : len(prices) - window]
+    return (
+        np.flatnonzero(centers <= windows.min(axis=1)),
+        np.flatnonzero(centers >= windows.max(axis=1)),
+    )
+
+
+def _measure(func: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    prices = [100.0]
+    for _ in range(99_999):
+        prices.append(round(prices[-1] + rng.uniform(-1, 1), 2))
+    array = np.asarray(prices)
+
+    print(f"{'candles':>8} {'window':>6} {'python, ms':>12} {'strided, ms':>12} {'linear, ms':>12}")
+    for count in (1_000, 10_000, 100_000):
+        for window in (5, 20, 100):
+            subset, subset_array = prices[:count], array[:count]
+            python_ms = (
+                _measure(lambda: _reference_levels(subset, window), repeat=1)
+                if count * window <= 1_000_000
+                else float("nan")
+            )
+            strided_ms = _measure(lambda: _strided_levels(subset_array, window))
+            linear_ms = _measure(lambda: _find_levels(subset_array, window))
+            print(
+                f"{count:>8} {window:>6} {python_ms:>12.2f} {strided_ms:>12.2f} {linear_ms:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Время и пиковая память этапов теханализа из ``src/services/trading.py``.
+
+Синтетические ответы GetCandles на 60, 1k, 10k и 100k свечей и пакет из 250
+инструментов. Для каждого этапа — лучшее время из ``--repeat`` прогонов и пиковая
+память отдельного прогона под tracemalloc. Результаты пишутся в JSON; с
+``--compare`` сравниваются с сохраненным baseline, и при замедлении больше
+``--threshold`` процесс завершается с кодом 1.
+
+Запуск: ``python -m benchmarks.bench_trading --output bench_results.json``
+Сравнение: ``python -m benchmarks.bench_trading --compare bench_baseline.json``
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from benchmarks.bench_decoding import _quotation
+
+from src.integrations.tinkoff_decoder import decode_candles
+from src.services.screener import compute_indicators
+from src.services.trading import (
+    _calculate_rsi,
+    _calculate_sma,
+    _find_support_resistance,
+    _normalize_candles,
+    analyse_stock_trends,
+)
+
+SIZES = (60, 1_000, 10_000, 100_000)
+BATCH_INSTRUMENTS = 250
+BATCH_CANDLES = 300
+
+Result = Dict[str, Any]
+
+
+def build_candles(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Свечи в формате GetCandles со случайным блужданием цены."""
+    rng = random.Random(seed)
+    price = 100.0
+    candles = []
+    for idx in range(count):
+        price = max(price + rng.uniform(-1, 1), 1.0)
+        candles.append(
+            {
+                "open": _quotation(price),
+                "high": _quotation(price + 0.5),
+                "low": _quotation(price - 0.5),
+                "close": _quotation(round(price, 2)),
+                "volume": str(rng.randint(1_000, 100_000)),
+                "time": datetime.fromtimestamp(1_700_000_000 + idx * 3600, tz=timezone.utc)
+                .isoformat()
+                .replace("+00:00", "Z"),
+                "isComplete": True,
+            }
+        )
+    return candles
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """
+    Возвращает (лучшее время в мс, пиковую память в МБ).
+
+    Время и память меряются разными прогонами: tracemalloc заметно замедляет код.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def _single_stages(count: int) -> List[Tuple[str, Callable[[], Any]]]:
+    candles = build_candles(count)
+    body = json.dumps({"payload": {"candles": candles}}).encode()
+    series = _normalize_candles(candles)
+    prices = series.to_float("close")
+    return [
+        ("decode", lambda: decode_candles(body)),
+        ("normalize", lambda: _normalize_candles(candles)),
+        ("to_float", lambda: series.to_float("close")),
+        ("sma", lambda: [_calculate_sma(prices, period) for period in (20, 50, 200)]),
+        ("rsi", lambda: _calculate_rsi(prices, 14)),
+        ("support_resistance", lambda: _find_support_resistance(prices, 5)),
+        ("analyse", lambda: analyse_stock_trends(series)),
+        ("end_to_end", lambda: analyse_stock_trends(decode_candles(body))),
+    ]
+
+
+def _batch_stages() -> List[Tuple[str, Callable[[], Any]]]:
+    bodies = [
+        json.dumps({"payload": {"candles": build_candles(BATCH_CANDLES, seed)}}).encode()
+        for seed in range(BATCH_INSTRUMENTS)
+    ]
+    series = [decode_candles(body) for body in bodies]
+    return [
+        ("decode", lambda: [decode_candles(body) for body in bodies]),
+        ("analyse", lambda: [analyse_stock_trends(item) for item in series]),
+        ("screener_indicators", lambda: compute_indicators(series)),
+    ]
+
+
+def run(sizes: Tuple[int, ...], repeat: int, batch: bool) -> List[Result]:
+    cases: List[Tuple[str, List[Tuple[str, Callable[[], Any]]]]] = [
+        (f"candles-{count}", _single_stages(count)) for count in sizes
+    ]
+    if batch:
+        cases.append((f"batch-{BATCH_INSTRUMENTS}x{BATCH_CANDLES}", _batch_stages()))
+
+    results: List[Result] = []
+    for case, stages in cases:
+        for stage, func in stages:
+            # На больших рядах медленные этапы не гоняем много раз
+            elapsed_ms, peak_mb = measure(func, repeat if case != "candles-100000" else 1)
+            results.append(
+                {"case": case, "stage": stage, "ms": round(elapsed_ms, 4), "peak_mb": peak_mb}
+            )
+            print(f"{case:<16} {stage:<20} {elapsed_ms:>10.3f} ms {peak_mb:>9.2f} MB")
+    return results
+
+
+def compare(
+    results: List[Result], baseline: List[Result], threshold: float, min_delta_ms: float = 0.1
+) -> List[Tuple[str, str, float, float, float]]:
+    """
+    Сравнивает результаты с baseline по (case, stage).
+
+    Возвращает строки (case, stage, baseline мс, текущие мс, изменение в долях) для
+    этапов, замедлившихся больше чем на ``threshold`` и не меньше чем на
+    ``min_delta_ms`` (шум на микросекундных этапах не считается). Печатает таблицу
+    всех этапов.
+    """
+    previous = {(item["case"], item["stage"]): item for item in baseline}
+    regressions = []
+    print(f"\n{'case':<16} {'stage':<20} {'baseline, ms':>13} {'current, ms':>12} {'change':>8}")
+    for item in results:
+        old = previous.get((item["case"], item["stage"]))
+        if old is None or not old["ms"]:
+            continue
+        change = item["ms"] / old["ms"] - 1
+        slower = change > threshold and item["ms"] - old["ms"] >= min_delta_ms
+        marker = "  <-- slower" if slower else ""
+        print(
+            f"{item['case']:<16} {item['stage']:<20} {old['ms']:>13.3f} {item['ms']:>12.3f} "
+            f"{change:>+8.1%}{marker}"
+        )
+        if slower:
+            regressions.append((item["case"], item["stage"], old["ms"], item["ms"], change))
+    return regressions
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, help="файл для результатов в JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="минимальная разница")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--no-batch", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    results = run(tuple(args.sizes), args.repeat, batch=not args.no_batch)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than baseline by >{args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
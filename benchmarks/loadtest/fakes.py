@@ -0,0 +1,261 @@
+"""
+Локальные заглушки Tinkoff Invest REST и GigaChat для нагрузочного теста.
+
+Задержка каждого ответа берется из логнормального распределения с заданными
+медианой и p99, часть ответов завершается ошибкой 500, размер ответов
+(число свечей, акций, длина ответа модели) настраивается. Каждая заглушка
+считает обращения по методам.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.core.intervals import INTERVAL_SECONDS
+
+_TINKOFF_PREFIX = "/tinkoff.public.invest.api.contract.v1."
+# z-оценка 99-го перцентиля стандартного нормального распределения
+_Z99 = 2.326
+
+
+@dataclass
+class LatencyProfile:
+    """Логнормальная задержка с медианой ``median_ms`` и 99-м перцентилем ``p99_ms``."""
+
+    median_ms: float = 20.0
+    p99_ms: float = 100.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99_ms, self.median_ms) / self.median_ms) / _Z99
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+@dataclass
+class FakeUpstream:
+    """Общие настройки заглушки: задержка, доля ошибок и счетчики обращений."""
+
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    error_rate: float = 0.0
+    seed: int = 42
+    calls: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+
+    async def delay(self, method: str) -> Optional[Response]:
+        """Ждет задержку метода; возвращает ответ-ошибку, если он выпал."""
+        self.calls[method] += 1
+        await asyncio.sleep(self.latency.sample(self._rng))
+        if self._rng.random() < self.error_rate:
+            self.errors[method] += 1
+            return JSONResponse({"code": 13, "message": "fake internal error"}, status_code=500)
+        return None
+
+
+def _quotation(value: float) -> Dict[str, Any]:
+    units = int(value)
+    return {"units": str(units), "nano": int(round((value - units) * 1e9))}
+
+
+def _format_time(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_time(value: str) -> int:
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+class FakeTinkoff(FakeUpstream):
+    """
+    Заглушка Tinkoff Invest REST: Shares, ShareBy и GetCandles.
+
+    Shares отдает ``shares`` акций TQBR с тикерами ``T0000``…; GetCandles — свечи
+    случайного блуждания с шагом интервала, не больше ``max_candles`` за запрос.
+    """
+
+    def __init__(self, *, shares: int = 250, max_candles: int = 5_000, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.shares = shares
+        self.max_candles = max_candles
+
+    def instruments(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "figi": f"FIGI{idx:04d}",
+                "ticker": f"T{idx:04d}",
+                "classCode": "TQBR",
+                "isin": f"RU{idx:010d}",
+                "name": f"Fake share {idx}",
+                "currency": "rub",
+                "exchange": "moex_mrng_evng_e_wknd_dlr",
+                "countryOfRisk": "RU",
+                "sector": ("financial", "energy", "it", "consumer")[idx % 4],
+                "lot": 10,
+            }
+            for idx in range(self.shares)
+        ]
+
+    def candles(self, figi: str, start: int, end: int, interval: str) -> List[Dict[str, Any]]:
+        step = INTERVAL_SECONDS.get(interval, 3600)
+        first = end - min((end - start) // step, self.max_candles) * step
+        rng = random.Random(f"{figi}:{first // step}")
+        price = 100 + rng.random() * 100
+        candles = []
+        for timestamp in range(first, end, step):
+            price = max(price + rng.uniform(-1, 1), 1.0)
+            candles.append(
+                {
+                    "open": _quotation(price),
+                    "high": _quotation(price + 0.5),
+                    "low": _quotation(price - 0.5),
+                    "close": _quotation(round(price, 2)),
+                    "volume": str(rng.randint(1_000, 100_000)),
+                    "time": _format_time(timestamp),
+                    "isComplete": timestamp + step <= time.time(),
+                }
+            )
+        return candles
+
+    async def handle(self, request: Request) -> Response:
+        method = request.path_params["method"].rsplit("/", 1)[-1]
+        failed = await self.delay(method)
+        if failed is not None:
+            return failed
+        body = await request.json()
+        if method == "Shares":
+            return JSONResponse({"instruments": self.instruments()})
+        if method == "ShareBy":
+            ticker = str(body.get("id", "")).upper()
+            if not ticker.startswith("T") or not ticker[1:].isdigit():
+                return JSONResponse({"code": 5, "message": "not found"}, status_code=404)
+            return JSONResponse({"instrument": {"figi": f"FIGI{ticker[1:]}", "ticker": ticker}})
+        if method == "GetCandles":
+            candles = self.candles(
+                body["figi"], _parse_time(body["from"]), _parse_time(body["to"]), body["interval"]
+            )
+            return Response(json.dumps({"candles": candles}), media_type="application/json")
+        return JSONResponse({"code": 12, "message": "not implemented"}, status_code=501)
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[Route("/{method:path}", self.handle, methods=["POST"])])
+
+
+class FakeGigaChat(FakeUpstream):
+    """
+    Заглушка GigaChat: OAuth, список моделей, подсчет токенов и chat/completions.
+
+    Ответ модели — ``answer_chars`` символов markdown; в потоковом режиме он
+    отдается ``stream_chunks`` SSE-событиями с задержкой ``chunk_delay_ms`` между ними.
+    """
+
+    def __init__(
+        self,
+        *,
+        answer_chars: int = 2_000,
+        stream_chunks: int = 20,
+        chunk_delay_ms: float = 20.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.answer_chars = answer_chars
+        self.stream_chunks = stream_chunks
+        self.chunk_delay_ms = chunk_delay_ms
+
+    def _answer(self) -> str:
+        line = "## Обзор\nТренд нейтральный, RSI в норме. Не является инвестрекомендацией.\n"
+        return (line * (self.answer_chars // len(line) + 1))[: self.answer_chars]
+
+    async def oauth(self, request: Request) -> Response:
+        self.calls["oauth"] += 1
+        expires_at = int((time.time() + 1800) * 1000)
+        return JSONResponse({"access_token": "fake-token", "expires_at": expires_at})
+
+    async def models(self, request: Request) -> Response:
+        self.calls["models"] += 1
+        model = {"id": "GigaChat-2-Max", "object": "model", "owned_by": "fake"}
+        return JSONResponse({"object": "list", "data": [model]})
+
+    async def tokens_count(self, request: Request) -> Response:
+        failed = await self.delay("tokens_count")
+        if failed is not None:
+            return failed
+        body = await request.json()
+        return JSONResponse(
+            [
+                {"object": "tokens", "tokens": len(text) // 3, "characters": len(text)}
+                for text in body.get("input", [])
+            ]
+        )
+
+    def _chunk(self, model: str, delta: Dict[str, Any], finish: Optional[str]) -> str:
+        payload = {
+            "choices": [{"delta": delta, "index": 0, "finish_reason": finish}],
+            "created": int(time.time()),
+            "model": model,
+            "object": "chat.completion",
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def _stream(self, model: str) -> AsyncIterator[str]:
+        answer = self._answer()
+        size = max(len(answer) // max(self.stream_chunks, 1), 1)
+        for start in range(0, len(answer), size):
+            await asyncio.sleep(self.chunk_delay_ms / 1000)
+            delta = {"role": "assistant", "content": answer[start : start + size]}
+            yield self._chunk(model, delta, None)
+        yield self._chunk(model, {"content": ""}, "stop")
+        yield "data: [DONE]\n\n"
+
+    async def chat(self, request: Request) -> Response:
+        failed = await self.delay("chat")
+        if failed is not None:
+            return failed
+        body = await request.json()
+        model = body.get("model") or "GigaChat-2-Max"
+        if body.get("stream"):
+            return StreamingResponse(self._stream(model), media_type="text/event-stream")
+        answer = self._answer()
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 3
+        return JSONResponse(
+            {
+                "choices": [
+                    {
+                        "message": {"role": "assistant", "content": answer},
+                        "index": 0,
+                        "finish_reason": "stop",
+                    }
+                ],
+                "created": int(time.time()),
+                "model": model,
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(answer) // 3,
+                    "total_tokens": prompt_tokens + len(answer) // 3,
+                },
+                "object": "chat.completion",
+            }
+        )
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/api/v2/oauth", self.oauth, methods=["POST"]),
+                Route("/models", self.models, methods=["GET"]),
+                Route("/tokens/count", self.tokens_count, methods=["POST"]),
+                Route("/chat/completions", self.chat, methods=["POST"]),
+            ]
+        )
@@ -0,0 +1,339 @@
+"""
+Нагрузочный тест приложения с локальными заглушками Tinkoff и GigaChat.
+
+Поднимает заглушки (``benchmarks.loadtest.fakes``) и настоящее приложение
+``src.main:app`` в отдельном процессе uvicorn, настроенное на заглушки через
+переменные окружения. Затем по открытой модели (запросы отправляются по
+расписанию, не дожидаясь ответов) держит целевой RPS со смесью эндпоинтов и
+печатает p50/p95/p99, пропускную способность, ошибки и число обращений к
+заглушкам по методам. Сеть наружу не нужна.
+
+Запуск: ``python -m benchmarks.loadtest.run --rps 20 --duration 30``
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import uvicorn
+from benchmarks.loadtest.fakes import FakeGigaChat, FakeTinkoff, FakeUpstream, LatencyProfile
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+API_PREFIX = "/api/stock-ai"
+
+Sample = Tuple[str, float, int]
+RequestFactory = Callable[[httpx.AsyncClient, random.Random], Any]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def _serve(app: Any, port: int) -> Tuple[uvicorn.Server, "asyncio.Task[None]"]:
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+def _tickers(rng: random.Random, shares: int, count: int) -> List[str]:
+    return [f"T{idx:04d}" for idx in rng.sample(range(shares), min(count, shares))]
+
+
+def build_scenarios(args: argparse.Namespace) -> Dict[str, RequestFactory]:
+    """Фабрики запросов по эндпоинтам; тикеры выбираются случайно из вселенной заглушки."""
+
+    def _trends_body(rng: random.Random, count: int) -> Dict[str, Any]:
+        return {
+            "tickers": _tickers(rng, args.shares, count),
+            "classCode": "TQBR",
+            "days": args.days,
+            "interval": args.interval,
+        }
+
+    return {
+        "stocks": lambda client, rng: client.get(f"{API_PREFIX}/stocks"),
+        "screener": lambda client, rng: client.get(
+            f"{API_PREFIX}/screener", params={"filter": "rsi<50", "sort": "-volume"}
+        ),
+        "trends": lambda client, rng: client.post(
+            f"{API_PREFIX}/trends", json=_trends_body(rng, args.tickers)
+        ),
+        "trends_ai": lambda client, rng: client.post(
+            f"{API_PREFIX}/trends/ai", json=_trends_body(rng, args.ai_tickers)
+        ),
+    }
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def drive(
+    base_url: str,
+    scenarios: Dict[str, RequestFactory],
+    mix: Dict[str, float],
+    rps: float,
+    duration: float,
+    timeout: float,
+    seed: int = 42,
+) -> Tuple[List[Sample], float]:
+    """
+    Отправляет запросы с постоянной частотой ``rps`` в течение ``duration`` секунд.
+
+    Возвращает (эндпоинт, задержка в секундах, HTTP-статус или 0 при ошибке сети) по
+    каждому запросу и фактическое время прогона.
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: List[Sample] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def _one(name: str) -> None:
+            started = time.perf_counter()
+            try:
+                response = await scenarios[name](client, rng)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            samples.append((name, time.perf_counter() - started, status))
+
+        started = time.perf_counter()
+        tasks = []
+        for idx in range(int(rps * duration)):
+            delay = started + idx / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(_one(name)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Dict[str, float]]:
+    """p50/p95/p99 (мс), пропускная способность и ошибки по эндпоинтам и в целом."""
+    groups: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        groups[sample[0]].append(sample)
+        groups["total"].append(sample)
+
+    report: Dict[str, Dict[str, float]] = {}
+    for name, items in groups.items():
+        latencies = np.array([latency for _, latency, _ in items]) * 1000
+        ok = sum(1 for _, _, status in items if 200 <= status < 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[name] = {
+            "requests": len(items),
+            "ok": ok,
+            "errors": len(items) - ok,
+            "throughput_rps": ok / elapsed if elapsed else 0.0,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies.max()),
+        }
+    return report
+
+
+def _app_env(
+    args: argparse.Namespace, tinkoff_url: str, gigachat_url: str, tmp: Path
+) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "TINKOFF_BASE_URL": tinkoff_url,
+            "TINKOFF_API_TOKEN": "loadtest",
+            "TINKOFF_HTTP2": "false",
+            "TINKOFF_RATE_LIMIT_PER_MINUTE": str(args.tinkoff_rate_limit),
+            "GIGACHAT_API_KEY": "loadtest",
+            "GIGACHAT_SCOPE": "GIGACHAT_API_PERS",
+            "GIGACHAT_BASE_URL": gigachat_url,
+            "GIGACHAT_AUTH_URL": f"{gigachat_url}/api/v2/oauth",
+            "CANDLE_STORE_DIR": str(tmp / "candles"),
+            "LOGGING_FILE_PATH": str(tmp / "application.log.json"),
+            "LOG_LEVEL": "WARNING",
+            "TRENDS_CACHE_ENABLED": str(not args.no_cache).lower(),
+            "LLM_CACHE_ENABLED": str(not args.no_cache).lower(),
+            "CANDLE_STORE_ENABLED": str(not args.no_cache).lower(),
+        }
+    )
+    return env
+
+
+async def _start_app(port: int, env: Dict[str, str], workers: int) -> asyncio.subprocess.Process:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "src.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+        env=env,
+        cwd=PROJECT_DIR,
+    )
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.returncode is not None:
+                raise RuntimeError(f"Application exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{API_PREFIX}/openapi.json")).status_code == 200:
+                    return process
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Application did not start in 60s")
+
+
+def _snapshot(fake: FakeUpstream) -> Tuple[Counter, Counter]:
+    return Counter(fake.calls), Counter(fake.errors)
+
+
+def _upstream_delta(
+    fake: FakeUpstream, before: Tuple[Counter, Counter]
+) -> Dict[str, Dict[str, int]]:
+    """Обращения и ошибки заглушки по методам за время прогона (без прогрева приложения)."""
+    calls, errors = fake.calls - before[0], fake.errors - before[1]
+    return {method: {"calls": calls[method], "errors": errors[method]} for method in calls}
+
+
+def _print_report(
+    report: Dict[str, Dict[str, float]], upstream: Dict[str, Dict[str, Dict[str, int]]]
+) -> None:
+    print(
+        f"\n{'endpoint':<10} {'requests':>8} {'errors':>7} {'rps':>7} "
+        f"{'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'max, ms':>9}"
+    )
+    for name, row in sorted(report.items(), key=lambda item: item[0] == "total"):
+        print(
+            f"{name:<10} {row['requests']:>8.0f} {row['errors']:>7.0f} {row['throughput_rps']:>7.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}"
+        )
+    print("\nupstream calls:")
+    for service, methods in upstream.items():
+        print(f"  {service}:")
+        for method, counts in methods.items():
+            print(f"    {method:<12} {counts['calls']:>7} calls {counts['errors']:>5} errors")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    tinkoff = FakeTinkoff(
+        shares=args.shares,
+        max_candles=args.max_candles,
+        latency=LatencyProfile(args.tinkoff_median_ms, args.tinkoff_p99_ms),
+        error_rate=args.tinkoff_error_rate,
+    )
+    gigachat = FakeGigaChat(
+        answer_chars=args.answer_chars,
+        latency=LatencyProfile(args.gigachat_median_ms, args.gigachat_p99_ms),
+        error_rate=args.gigachat_error_rate,
+    )
+    tinkoff_port, gigachat_port, app_port = _free_port(), _free_port(), _free_port()
+    servers = [
+        await _serve(tinkoff.app(), tinkoff_port),
+        await _serve(gigachat.app(), gigachat_port),
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="stock-ai-loadtest-") as tmp:
+        env = _app_env(
+            args, f"http://127.0.0.1:{tinkoff_port}", f"http://127.0.0.1:{gigachat_port}", Path(tmp)
+        )
+        process = await _start_app(app_port, env, args.workers)
+        try:
+            before = {"tinkoff": _snapshot(tinkoff), "gigachat": _snapshot(gigachat)}
+            samples, elapsed = await drive(
+                f"http://127.0.0.1:{app_port}",
+                build_scenarios(args),
+                _parse_mix(args.mix),
+                args.rps,
+                args.duration,
+                args.timeout,
+            )
+        finally:
+            process.terminate()
+            await process.wait()
+            for server, task in servers:
+                server.should_exit = True
+                await task
+
+    upstream = {
+        "tinkoff": _upstream_delta(tinkoff, before["tinkoff"]),
+        "gigachat": _upstream_delta(gigachat, before["gigachat"]),
+    }
+    report = summarize(samples, elapsed)
+    _print_report(report, upstream)
+    return {"config": vars(args), "elapsed_s": elapsed, "endpoints": report, "upstream": upstream}
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест с заглушками upstream")
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд")
+    parser.add_argument("--mix", default="stocks=1,trends=3,trends_ai=1", help="веса эндпоинтов")
+    parser.add_argument("--workers", type=int, default=1, help="воркеры uvicorn")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--tickers", type=int, default=5, help="тикеров в запросе /trends")
+    parser.add_argument("--ai-tickers", type=int, default=3, help="тикеров в /trends/ai")
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--interval", default="CANDLE_INTERVAL_DAY")
+    parser.add_argument("--no-cache", action="store_true", help="выключить кеши приложения")
+    parser.add_argument("--shares", type=int, default=250, help="акций в Shares")
+    parser.add_argument("--max-candles", type=int, default=5_000, help="свечей в ответе")
+    parser.add_argument("--answer-chars", type=int, default=2_000, help="длина ответа модели")
+    parser.add_argument("--tinkoff-median-ms", type=float, default=30.0)
+    parser.add_argument("--tinkoff-p99-ms", type=float, default=150.0)
+    parser.add_argument("--tinkoff-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--tinkoff-rate-limit", type=int, default=200, help="квота приложения на метод в минуту"
+    )
+    parser.add_argument("--gigachat-median-ms", type=float, default=800.0)
+    parser.add_argument("--gigachat-p99-ms", type=float, default=3_000.0)
+    parser.add_argument("--gigachat-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, help="файл для отчета в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    result = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, default=str), encoding="utf-8")
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
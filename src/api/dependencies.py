@@ -1,8 +1,53 @@
-from functools import lru_cache
+from typing import Optional
 
+from fastapi import HTTPException, Request
+from gigachat import GigaChat
+
+from src.core.cache_backends import TieredCache
 from src.integrations.tinkoff import TinkoffClient
+from src.services.instrument_catalog import InstrumentCatalog
+from src.services.llm_cache import LLMResponseCache
+from src.services.precompute import TrendPrecomputer
+from src.services.response_cache import ResponseCache
+from src.services.screener import ScreenerCache
+
+
+def get_tinkoff_client(request: Request) -> TinkoffClient:
+    client = getattr(request.app.state, "tinkoff_client", None)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Tinkoff client is not configured")
+    return client
+
+
+def get_instrument_catalog(request: Request) -> InstrumentCatalog:
+    catalog = getattr(request.app.state, "instrument_catalog", None)
+    if catalog is None:
+        raise HTTPException(status_code=503, detail="Tinkoff client is not configured")
+    return catalog
+
+
+def get_llm_cache(request: Request) -> Optional[LLMResponseCache]:
+    return getattr(request.app.state, "llm_cache", None)
+
+
+def get_gigachat_llm(request: Request) -> GigaChat:
+    provider = getattr(request.app.state, "gigachat", None)
+    if provider is None:
+        raise HTTPException(status_code=503, detail="GigaChat client is not configured")
+    return provider.llm
+
+
+def get_response_cache(request: Request) -> Optional[ResponseCache]:
+    return getattr(request.app.state, "response_cache", None)
+
+
+def get_trend_precomputer(request: Request) -> Optional[TrendPrecomputer]:
+    return getattr(request.app.state, "trend_precomputer", None)
+
+
+def get_screener_cache(request: Request) -> Optional[ScreenerCache]:
+    return getattr(request.app.state, "screener_cache", None)
 
 
-@lru_cache
-def get_tinkoff_client() -> TinkoffClient:
-    return TinkoffClient()
+def get_shared_cache(request: Request) -> Optional[TieredCache]:
+    return getattr(request.app.state, "shared_cache", None)
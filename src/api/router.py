@@ -1,17 +1,46 @@
+import asyncio
 import json
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import List
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from gigachat import GigaChat
 
-from src.api.dependencies import get_tinkoff_client
-from src.integrations.gigachat import create_gigachat_llm, invoke_gigachat_with_system_prompt
+from src.api.dependencies import (
+    get_gigachat_llm,
+    get_instrument_catalog,
+    get_llm_cache,
+    get_response_cache,
+    get_screener_cache,
+    get_shared_cache,
+    get_tinkoff_client,
+    get_trend_precomputer,
+)
+from src.core.cache_backends import TieredCache
 from src.integrations.tinkoff import TinkoffClient
-from src.schemas.stocks import ShareItem, StockFilters, StocksResponse
+from src.schemas.screener import ScreenerQuery, ScreenerResponse
+from src.schemas.stocks import StockFilters, StocksResponse
 from src.schemas.trends import TrendResult, TrendsRequest, TrendsResponse
-from src.services.trading import analyse_stock_trends
+from src.services.ai_analysis import (
+    build_reduce_prompt,
+    build_user_prompts,
+    run_analysis,
+    stream_analysis,
+)
+from src.services.instrument_catalog import InstrumentCatalog
+from src.services.llm_cache import LLMResponseCache
+from src.services.precompute import TrendPrecomputer
+from src.services.prompt_encoder import PromptTooLargeError, ensure_prompt_fits
+from src.services.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    trends_cache_key,
+    trends_validator,
+)
+from src.services.screener import ScreenerCache, run_screener
+from src.services.trends import collect_trends, iter_trends
 from src.settings import settings
 
 api_router = APIRouter()
@@ -19,115 +48,330 @@ logger = logging.getLogger("logger")
 
 
 @api_router.get("/stocks", response_model=StocksResponse)
-def list_stocks(
+async def list_stocks(
+    request: Request,
     filters: StockFilters = Depends(),
-    client: TinkoffClient = Depends(get_tinkoff_client),
-) -> StocksResponse:
+    catalog: InstrumentCatalog = Depends(get_instrument_catalog),
+) -> Response:
+    """
+    Список акций из каталога в памяти.
+
+    Ответ сериализуется один раз на комбинацию фильтров до обновления каталога;
+    при совпадении ``If-None-Match`` с ETag возвращается 304 без тела.
+    """
     try:
-        raw_items = client.list_shares(
-            class_code=filters.class_code,
-            country_of_risk=filters.country_of_risk,
-            exchange=filters.exchange,
-            instrument_status=filters.instrument_status,
-            instrument_exchange=filters.instrument_exchange,
-        )
-        items = [ShareItem(**item) for item in raw_items]
+        body, etag = await catalog.render(filters)
     except Exception as exc:
         logger.error("Failed to fetch shares: %s", exc, exc_info=True)
         raise HTTPException(status_code=502, detail=f"Failed to fetch shares: {exc}") from exc
 
-    logger.info("Fetched %s shares for class_code=%s", len(items), filters.class_code)
-    return StocksResponse(items=items)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    logger.debug("Served shares for class_code=%s from catalog", filters.class_code)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@api_router.get("/screener", response_model=ScreenerResponse)
+async def screen_stocks(
+    query: ScreenerQuery = Depends(),
+    client: TinkoffClient = Depends(get_tinkoff_client),
+    catalog: InstrumentCatalog = Depends(get_instrument_catalog),
+    cache: Optional[ScreenerCache] = Depends(get_screener_cache),
+) -> ScreenerResponse:
+    """
+    Скринер по всем акциям classCode.
+
+    Пример: ``/screener?filter=rsi<30,price>sma50&sort=rsi&limit=20``. Индикаторы
+    считаются одним векторным проходом по свечам всех инструментов и хранятся в памяти
+    до закрытия свечи: повторные запросы только фильтруют готовую таблицу.
+    """
+    try:
+        return await run_screener(client, catalog, query, cache)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.error("Failed to run screener: %s", exc, exc_info=True)
+        raise HTTPException(status_code=502, detail=f"Failed to run screener: {exc}") from exc
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _cached_response(request: Request, cached: CachedResponse) -> Response:
+    """Ответ с валидаторами кеша; при совпадении ``If-None-Match`` — 304 без тела."""
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={cached.max_age}"}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+async def _store_response(
+    request: Request,
+    response_cache: Optional[ResponseCache],
+    key: str,
+    ttl: float,
+    body: bytes,
+    media_type: str,
+    results: List[TrendResult],
+    validator: Optional[str] = None,
+) -> Response:
+    # Ответы с ошибками по тикерам не кешируются ни на сервере, ни клиентом или прокси:
+    # сбой мог быть временным
+    if any("error" in r.analysis for r in results):
+        return Response(content=body, media_type=media_type, headers={"Cache-Control": "no-store"})
+    cached = CachedResponse.build(body, media_type, ttl, validator=validator)
+    if response_cache is not None:
+        await response_cache.set(key, cached, ttl)
+    return _cached_response(request, cached)
+
+
+async def _collect_trends(
+    client: TinkoffClient, payload: TrendsRequest, precomputer: Optional[TrendPrecomputer]
+) -> List[TrendResult]:
+    if precomputer is not None:
+        return await precomputer.collect(client, payload)
+    return await collect_trends(client, payload)
 
 
 @api_router.post("/trends", response_model=TrendsResponse)
-def analyse_trends(
+async def analyse_trends(
     payload: TrendsRequest,
+    request: Request,
     client: TinkoffClient = Depends(get_tinkoff_client),
-) -> TrendsResponse:
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache),
+    precomputer: Optional[TrendPrecomputer] = Depends(get_trend_precomputer),
+) -> Response:
+    """
+    Теханализ по тикерам.
+
+    Тикеры из watchlist берутся из таблицы фонового предрасчета, если параметры запроса
+    совпадают с настройками watchlist. Ответ отдается с ETag и ``Cache-Control: max-age`` до закрытия текущей свечи
+    интервала (не дольше ``TRENDS_CACHE_TTL``) и кешируется на сервере с тем же ключом.
+    """
     if not payload.tickers:
         raise HTTPException(status_code=400, detail="tickers must be provided")
 
-    results: List[TrendResult] = []
-
-    try:
-        for ticker in payload.tickers:
-            resolved_figi = client.resolve_share_figi(
-                ticker=ticker,
-                figi=None,
-                class_code=payload.class_code,
-            )
-            time_to = datetime.now(timezone.utc)
-            time_from = time_to - timedelta(days=payload.days)
-            candles = client.get_candles(
-                figi=resolved_figi,
-                time_from=time_from,
-                time_to=time_to,
-                interval=payload.interval,
-            )
-            analysis = analyse_stock_trends({"candles": candles})
-            results.append(TrendResult(figi=resolved_figi, ticker=ticker, analysis=dict(analysis)))
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.error("Failed to analyse trends: %s", exc, exc_info=True)
-        raise HTTPException(status_code=502, detail=f"Failed to analyse trends: {exc}") from exc
+    key, ttl = trends_cache_key("trends", payload, max_ttl_seconds=settings.trends_cache_ttl)
+    cached = await response_cache.get(key) if response_cache is not None else None
+    if cached is not None:
+        logger.info("Trends served from response cache for %s tickers", len(payload.tickers))
+        return _cached_response(request, cached)
 
+    results = await _collect_trends(client, payload, precomputer)
     if not results:
         raise HTTPException(status_code=404, detail="No data found for provided instruments")
 
     logger.info("Analysed trends for %s tickers", len(results))
-    return TrendsResponse(results=results)
+    body = TrendsResponse(results=results).model_dump_json().encode("utf-8")
+    return await _store_response(
+        request,
+        response_cache,
+        key,
+        ttl,
+        body,
+        "application/json",
+        results,
+        validator=trends_validator(key, results),
+    )
 
 
-@api_router.post("/trends/ai", response_class=PlainTextResponse)
-async def analyse_trends_ai(
+def _format_event(event: str, data: str, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {data}\n\n"
+    return f'{{"type": "{event}", "data": {data}}}\n'
+
+
+async def _stream_trend_events(
+    client: TinkoffClient, payload: TrendsRequest, sse: bool
+) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    failed = 0
+    async for index, result in iter_trends(client, payload):
+        failed += "error" in result.analysis
+        data = f'{{"index": {index}, "result": {result.model_dump_json()}}}'
+        yield _format_event("result", data, sse)
+
+    summary = {
+        "total": len(payload.tickers),
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("Streamed trends for %s tickers", len(payload.tickers))
+    yield _format_event("summary", json.dumps(summary), sse)
+
+
+@api_router.post("/trends/stream")
+async def stream_trends(
     payload: TrendsRequest,
+    request: Request,
     client: TinkoffClient = Depends(get_tinkoff_client),
-) -> PlainTextResponse:
+) -> StreamingResponse:
+    """
+    Потоковый теханализ: результат по каждому тикеру отправляется сразу после расчета.
+
+    По умолчанию ответ в NDJSON (строки ``{"type": "result"|"summary", "data": ...}``),
+    при ``Accept: text/event-stream`` — Server-Sent Events с событиями ``result`` и
+    ``summary``. В ``result`` передается индекс тикера в запросе и TrendResult.
+    """
     if not payload.tickers:
         raise HTTPException(status_code=400, detail="tickers must be provided")
 
-    results: List[TrendResult] = []
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        _stream_trend_events(client, payload, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
+async def _stream_ai_analysis(first_chunk: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first_chunk
     try:
-        for ticker in payload.tickers:
-            resolved_figi = client.resolve_share_figi(
-                ticker=ticker,
-                figi=None,
-                class_code=payload.class_code,
-            )
-            time_to = datetime.now(timezone.utc)
-            time_from = time_to - timedelta(days=payload.days)
-            candles = client.get_candles(
-                figi=resolved_figi,
-                time_from=time_from,
-                time_to=time_to,
-                interval=payload.interval,
-            )
-            analysis = analyse_stock_trends({"candles": candles})
-            results.append(TrendResult(figi=resolved_figi, ticker=ticker, analysis=dict(analysis)))
-    except HTTPException:
-        raise
+        async for chunk in chunks:
+            yield chunk
     except Exception as exc:
-        logger.error("Failed to analyse trends: %s", exc, exc_info=True)
-        raise HTTPException(status_code=502, detail=f"Failed to analyse trends: {exc}") from exc
+        # Статус уже отправлен: сообщаем об обрыве генерации в теле ответа
+        logger.error("AI trend analysis stream failed: %s", exc, exc_info=True)
+        yield f"\n\n[Failed to get AI trend analysis: {exc}]"
+
+
+async def _build_ai_prompts(
+    results: List[TrendResult], llm: GigaChat
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Промпты частей и (для нескольких частей) промпт резюме по портфелю.
+
+    Все промпты, включая резюме, проверяются по бюджету токенов; не влезающие
+    отклоняются с 413.
+    """
+    prompts = build_user_prompts(results, settings.ai_chunk_size)
+    checks = [(settings.system_prompt, prompt) for prompt in prompts]
+    reduce_prompt = None
+    if len(prompts) > 1:
+        reduce_prompt = build_reduce_prompt(results)
+        checks.append((settings.reduce_system_prompt, reduce_prompt))
+    try:
+        await asyncio.gather(
+            *(
+                ensure_prompt_fits(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    budget=settings.prompt_token_budget,
+                    llm=llm if settings.prompt_count_tokens_via_api else None,
+                    model=settings.gigachat_model,
+                )
+                for system_prompt, user_prompt in checks
+            )
+        )
+    except PromptTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    return prompts, reduce_prompt
+
+
+@api_router.post("/trends/ai", response_class=PlainTextResponse)
+async def analyse_trends_ai(
+    payload: TrendsRequest,
+    request: Request,
+    client: TinkoffClient = Depends(get_tinkoff_client),
+    llm: GigaChat = Depends(get_gigachat_llm),
+    llm_cache: Optional[LLMResponseCache] = Depends(get_llm_cache),
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache),
+    precomputer: Optional[TrendPrecomputer] = Depends(get_trend_precomputer),
+    stream: bool = False,
+) -> Response:
+    """
+    Теханализ + ИИ-обзор в markdown.
+
+    При ``stream=true`` ответ модели отдается по мере генерации (chunked text/plain);
+    иначе — целиком после завершения генерации.
+
+    Больше ``AI_CHUNK_SIZE`` тикеров анализируются частями: части параллельно
+    (не больше ``AI_CHUNK_CONCURRENCY`` вызовов), затем отдельный вызов составляет
+    общее резюме по портфелю.
+
+    Готовый обзор кешируется и отдается с ETag так же, как ``/trends``. Кроме того,
+    ответы модели кешируются по хешу промпта, модели и температуры: одинаковые данные
+    теханализа в пределах TTL не приводят к повторному вызову GigaChat, а одновременные
+    одинаковые запросы (в том числе потоковые) ждут один общий вызов.
+    """
+    if not payload.tickers:
+        raise HTTPException(status_code=400, detail="tickers must be provided")
 
+    key, ttl = trends_cache_key(
+        "trends/ai",
+        payload,
+        settings.gigachat_model,
+        settings.temperature,
+        max_ttl_seconds=settings.trends_cache_ttl,
+    )
+    cached = await response_cache.get(key) if response_cache is not None else None
+    if cached is not None:
+        logger.info("AI trend analysis served from response cache")
+        return _cached_response(request, cached)
+
+    results = await _collect_trends(client, payload, precomputer)
     if not results:
         raise HTTPException(status_code=404, detail="No data found for provided instruments")
+    if all("error" in result.analysis for result in results):
+        detail = "; ".join(f"{result.ticker}: {result.analysis['error']}" for result in results)
+        raise HTTPException(status_code=502, detail=f"Failed to analyse trends: {detail}")
+
+    analysis = await _generate_ai_analysis(results, llm, llm_cache, stream)
+    if isinstance(analysis, StreamingResponse):
+        return analysis
+
+    logger.info("AI analysed trends for %s tickers", len(results))
+    body = analysis.encode("utf-8")
+    return await _store_response(
+        request, response_cache, key, ttl, body, "text/plain; charset=utf-8", results
+    )
+
 
-    llm = create_gigachat_llm()
-    trends_json = json.dumps(
-        [result.model_dump() for result in results], ensure_ascii=False, indent=2
+async def _generate_ai_analysis(
+    results: List[TrendResult],
+    llm: GigaChat,
+    llm_cache: Optional[LLMResponseCache],
+    stream: bool,
+) -> Union[str, StreamingResponse]:
+    """Обзор модели: текст целиком или потоковый ответ при ``stream`` без попадания в кеш."""
+    prompts, reduce_prompt = await _build_ai_prompts(results, llm)
+    cache_key = LLMResponseCache.make_key(
+        system_prompt=settings.system_prompt,
+        user_prompt="\n".join(prompts),
+        model=settings.gigachat_model,
+        temperature=settings.temperature,
     )
-    user_prompt = settings.user_prompt.format(JSON_DATA=trends_json)
+    cached = await llm_cache.get(cache_key) if llm_cache is not None else None
+    if cached is not None:
+        logger.info("AI trend analysis served from cache for %s tickers", len(results))
+        return cached
+
+    async def _invoke() -> str:
+        return await run_analysis(llm, prompts, settings.ai_chunk_concurrency, reduce_prompt)
+
+    def _stream() -> AsyncIterator[str]:
+        return stream_analysis(llm, prompts, settings.ai_chunk_concurrency, reduce_prompt)
 
     try:
-        ai_analysis = await invoke_gigachat_with_system_prompt(
-            llm=llm,
-            user_message=user_prompt,
-            system_prompt=settings.system_prompt,
-        )
+        if stream:
+            # Одновременные одинаковые запросы читают один общий поток модели
+            chunks = (
+                llm_cache.stream_or_call(cache_key, _stream) if llm_cache is not None else _stream()
+            )
+            # Ждем первый фрагмент до отправки статуса, чтобы ошибка вызова стала 502
+            first_chunk = await anext(chunks, "")
+            if not first_chunk:
+                raise RuntimeError("Model returned an empty response")
+        else:
+            return await (
+                llm_cache.get_or_call(cache_key, _invoke) if llm_cache is not None else _invoke()
+            )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
@@ -136,5 +380,17 @@ async def analyse_trends_ai(
             status_code=502, detail=f"Failed to get AI trend analysis: {exc}"
         ) from exc
 
-    logger.info("AI analysed trends for %s tickers", len(results))
-    return PlainTextResponse(content=ai_analysis, media_type="text/plain; charset=utf-8")
+    logger.info("Streaming AI trend analysis for %s tickers", len(results))
+    return StreamingResponse(
+        _stream_ai_analysis(first_chunk, chunks),
+        media_type="text/plain; charset=utf-8",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_router.get("/cache/stats")
+async def cache_stats(
+    shared_cache: Optional[TieredCache] = Depends(get_shared_cache),
+) -> Dict[str, Dict[str, int]]:
+    """Счетчики попаданий и промахов общего кеша по уровням (пусто, если он выключен)."""
+    return shared_cache.stats() if shared_cache is not None else {}
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger("logger")
+
+V = TypeVar("V")
+
+
+def hash_key(*parts: Any) -> str:
+    """Стабильный sha256-ключ по JSON-представлению частей."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache(Generic[V]):
+    """In-memory кеш с вытеснением LRU и временем жизни записей."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class DiskCache:
+    """
+    Файловый кеш JSON-сериализуемых значений с TTL.
+
+    Каждая запись — отдельный файл ``<sha256 ключа>.json`` с временем истечения
+    (Unix time, чтобы запись переживала рестарт процесса).
+    """
+
+    def __init__(self, root: Path, ttl_seconds: float) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{hash_key(key)}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Broken disk cache entry %s: %s", path, exc)
+            return None
+        if record.get("expires_at", 0) <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return record.get("value")
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Запись может идти из нескольких потоков одного процесса
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        record = {"expires_at": time.time() + ttl, "value": value}
+        tmp_path.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
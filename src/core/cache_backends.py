@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import socket
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from src.core.cache import TTLCache
+
+logger = logging.getLogger("logger")
+
+# Заголовок записи во всех уровнях: время истечения (Unix time, float64)
+_HEADER = struct.Struct("<d")
+
+
+class CacheStats:
+    """Счетчики обращений к уровню кеша; ``skipped`` — обращения, пропущенные после ошибок."""
+
+    __slots__ = ("hits", "misses", "errors", "skipped")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "skipped": self.skipped,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Уровень кеша: хранилище байтов по строковому ключу с TTL.
+
+    Реализации не знают о формате значений — упаковку делает ``TieredCache``.
+    Ошибки хранилища не должны ломать запрос: они логируются, считаются в
+    ``stats.errors`` и трактуются как промах. После ошибки уровень пропускается
+    ``cooldown_seconds`` секунд (circuit breaker), чтобы недоступный сервер не
+    задерживал каждый запрос попыткой переподключения.
+
+    Уровни с ``blocking = True`` выполняют сетевой или файловый ввод-вывод, и
+    ``TieredCache`` вызывает их в потоке, не блокируя event loop.
+    """
+
+    name = "backend"
+    blocking = False
+
+    def __init__(self, cooldown_seconds: float = 5.0) -> None:
+        self.stats = CacheStats()
+        self.cooldown_seconds = cooldown_seconds
+        self._open_until = 0.0
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]:
+        """Значение по ключу или None."""
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Записывает значение на ``ttl_seconds`` секунд."""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Удаляет ключ, если он есть."""
+
+    @property
+    def available(self) -> bool:
+        """False, пока уровень пропускается после ошибки."""
+        return time.monotonic() >= self._open_until
+
+    def _guarded(self, operation: str, func: Callable[[], Any]) -> Any:
+        if not self.available:
+            self.stats.skipped += 1
+            return None
+        try:
+            return func()
+        except Exception as exc:
+            self.stats.errors += 1
+            self._open_until = time.monotonic() + self.cooldown_seconds
+            logger.warning(
+                "Cache backend %s %s failed, skipping it for %.1fs: %s",
+                self.name,
+                operation,
+                self.cooldown_seconds,
+                exc,
+            )
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._guarded("get", lambda: self._get(key))
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._guarded("set", lambda: self._set(key, value, ttl_seconds))
+
+    def delete(self, key: str) -> None:
+        self._guarded("delete", lambda: self._delete(key))
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища."""
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU с TTL; не разделяется между воркерами."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int) -> None:
+        super().__init__()
+        self._items: TTLCache[bytes] = TTLCache(max_entries=max_entries, ttl_seconds=0)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._items.get(key)
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._items.set(key, value, ttl_seconds=ttl_seconds)
+
+    def _delete(self, key: str) -> None:
+        self._items.delete(key)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Файловый кеш в SQLite, общий для всех воркеров на одном хосте.
+
+    База открывается в режиме WAL: читатели не блокируют писателя. Просроченные
+    записи не возвращаются и удаляются при каждой ``purge_every``-й записи.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: Path, timeout_seconds: float = 1.0, purge_every: int = 256) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.path), timeout=timeout_seconds, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisError(RuntimeError):
+    """Ответ Redis с ошибкой или нарушение протокола."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Минимальный клиент протокола Redis (RESP2): GET, SET с PX, DEL, AUTH и SELECT.
+
+    Подходит любой сервер с протоколом Redis (Redis, Valkey, KeyDB). Одно соединение
+    на процесс, команды выполняются последовательно под блокировкой; короткий
+    таймаут сокета не дает недоступному серверу задерживать запросы. После ошибки
+    соединение переоткрывается при следующей команде.
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str, timeout_seconds: float = 0.25, prefix: str = "") -> None:
+        super().__init__()
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL: {url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout_seconds = timeout_seconds
+        self.prefix = prefix
+        self._sock: Optional[socket.socket] = None
+        self._reader: Any = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            if size < 0:
+                return None
+            data = self._reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(payload)
+            return None if size < 0 else [self._read_reply() for _ in range(size)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout_seconds)
+        self._sock, self._reader = sock, sock.makefile("rb")
+        if self.password:
+            self._call_locked("AUTH", self.password)
+        if self.db:
+            self._call_locked("SELECT", self.db)
+
+    def _call_locked(self, *args: Any) -> Any:
+        assert self._sock is not None
+        self._sock.sendall(self._encode(*args))
+        return self._read_reply()
+
+    def execute(self, *args: Any) -> Any:
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call_locked(*args)
+            except (OSError, RedisError):
+                self._disconnect()
+                raise
+
+    def _get(self, key: str) -> Optional[bytes]:
+        value = self.execute("GET", self.prefix + key)
+        return value if isinstance(value, bytes) else None
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.execute("SET", self.prefix + key, value, "PX", max(int(ttl_seconds * 1000), 1))
+
+    def _delete(self, key: str) -> None:
+        self.execute("DEL", self.prefix + key)
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock, self._reader = None, None
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+class TieredCache:
+    """
+    Многоуровневый кеш поверх ``CacheBackend`` (например, memory → sqlite → redis).
+
+    Чтение идет по уровням сверху вниз; найденное значение дописывается в верхние
+    уровни с оставшимся временем жизни. Запись идет во все уровни. Блокирующие уровни
+    (SQLite, Redis) вызываются через ``asyncio.to_thread``. Все уровни хранят
+    одинаковый формат: 8 байт времени истечения (Unix time) и значение, поэтому TTL
+    одной записи согласован между уровнями и процессами. Ключи разделяются
+    пространством имен ``namespace``.
+    """
+
+    def __init__(self, backends: Sequence[CacheBackend], namespace: str = "") -> None:
+        self.backends = list(backends)
+        self.namespace = namespace
+
+    def with_namespace(self, namespace: str) -> "TieredCache":
+        """Тот же набор уровней с другим пространством имен."""
+        return TieredCache(self.backends, namespace=namespace)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    @staticmethod
+    def _unpack(record: bytes) -> Optional[Tuple[float, bytes]]:
+        if len(record) < _HEADER.size:
+            return None
+        (expires_at,) = _HEADER.unpack_from(record)
+        if expires_at <= time.time():
+            return None
+        return expires_at, record[_HEADER.size :]
+
+    @staticmethod
+    async def _call(backend: CacheBackend, method: Callable[..., Any], *args: Any) -> Any:
+        if not backend.blocking or not backend.available:
+            # Память и пропуск уровня после ошибки не требуют потока
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        full_key = self._key(key)
+        for level, backend in enumerate(self.backends):
+            record = await self._call(backend, backend.get, full_key)
+            if record is None:
+                continue
+            unpacked = self._unpack(record)
+            if unpacked is None:
+                continue
+            expires_at, value = unpacked
+            ttl = expires_at - time.time()
+            for upper in self.backends[:level]:
+                await self._call(upper, upper.set, full_key, record, ttl)
+            return value
+        return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        record = _HEADER.pack(time.time() + ttl_seconds) + value
+        full_key = self._key(key)
+        for backend in self.backends:
+            await self._call(backend, backend.set, full_key, record, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        full_key = self._key(key)
+        for backend in self.backends:
+            await self._call(backend, backend.delete, full_key)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Счетчики по уровням: {имя уровня: {hits, misses, errors}}."""
+        return {backend.name: backend.stats.as_dict() for backend in self.backends}
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+
+
+def create_backends(
+    names: Sequence[str],
+    *,
+    memory_max_entries: int,
+    sqlite_path: Optional[Path],
+    redis_url: Optional[str],
+    redis_timeout_seconds: float = 0.25,
+) -> List[CacheBackend]:
+    """Создает уровни по именам (``memory``, ``sqlite``, ``redis``) в заданном порядке."""
+    backends: List[CacheBackend] = []
+    for name in names:
+        if name == "memory":
+            backends.append(MemoryBackend(memory_max_entries))
+        elif name == "sqlite":
+            if sqlite_path is None:
+                raise ValueError("SQLite cache path is not configured")
+            backends.append(SQLiteBackend(sqlite_path))
+        elif name == "redis":
+            if not redis_url:
+                raise ValueError("Redis cache URL is not configured")
+            backends.append(RedisBackend(redis_url, timeout_seconds=redis_timeout_seconds))
+        else:
+            raise ValueError(f"Unknown cache backend: {name}")
+    return backends
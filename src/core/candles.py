@@ -0,0 +1,219 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+NANO = 1_000_000_000
+
+Int64Array = npt.NDArray[np.int64]
+FloatArray = npt.NDArray[np.float64]
+BoolArray = npt.NDArray[np.bool_]
+
+
+def quotation_to_nano(quotation: Optional[Dict[str, Any]]) -> int:
+    """Переводит Quotation Tinkoff (units/nano) в целое число нано-единиц."""
+    if not quotation:
+        return 0
+    units = quotation.get("units", 0)
+    nano = quotation.get("nano", 0)
+    if isinstance(units, float):
+        return round(units * NANO) + int(nano)
+    return int(units) * NANO + int(nano)
+
+
+def nano_to_quotation(value: int) -> Dict[str, Any]:
+    """Обратное преобразование в Quotation; знаки units и nano совпадают, как в API."""
+    units = abs(value) // NANO
+    nano = abs(value) % NANO
+    sign = -1 if value < 0 else 1
+    return {"units": str(sign * units), "nano": sign * nano}
+
+
+def nano_to_float(value: int) -> float:
+    """Цена в float той же арифметикой, что и ``CandleSeries.to_float``."""
+    units = -(-value // NANO) if value < 0 else value // NANO
+    return float(units) + float(value - units * NANO) / NANO
+
+
+def parse_time(value: Any) -> int:
+    """Переводит время свечи (RFC 3339) в секунды Unix; пустое значение — 0."""
+    if not value:
+        return 0
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_time(value: int) -> str:
+    return datetime.fromtimestamp(value, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_volume(value: Any) -> int:
+    if isinstance(value, (int, float, str)):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class CandleSeries:
+    """
+    Компактный ряд свечей: по одному NumPy-массиву на колонку.
+
+    Цены (open/high/low/close) хранятся в фиксированной точке — int64 в нано-единицах,
+    время — int64 секунд Unix, объем — int64, признак закрытой свечи — bool.
+    Одна свеча занимает 49 байт против сотен байт у словаря из ответа API.
+    """
+
+    __slots__ = ("time", "open", "high", "low", "close", "volume", "is_complete")
+
+    COLUMNS = ("time", "open", "high", "low", "close", "volume", "is_complete")
+
+    def __init__(
+        self,
+        *,
+        time: Int64Array,
+        open: Int64Array,
+        high: Int64Array,
+        low: Int64Array,
+        close: Int64Array,
+        volume: Int64Array,
+        is_complete: BoolArray,
+    ) -> None:
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.is_complete = is_complete
+
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        return cls.from_columns({})
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "CandleSeries":
+        """Собирает ряд из колонок; отсутствующие колонки заполняются нулями."""
+        size = len(next(iter(columns.values()))) if columns else 0
+        arrays: Dict[str, Any] = {}
+        for name in cls.COLUMNS:
+            dtype = np.bool_ if name == "is_complete" else np.int64
+            if name in columns:
+                arrays[name] = np.ascontiguousarray(columns[name], dtype=dtype)
+            else:
+                arrays[name] = np.ones(size, dtype) if dtype is np.bool_ else np.zeros(size, dtype)
+        return cls(**arrays)
+
+    @classmethod
+    def from_tinkoff(cls, candles: Iterable[Any]) -> "CandleSeries":
+        """
+        Разбирает свечи из ответа GetCandles (units/nano, volume строкой) за один проход.
+
+        ``candles`` может быть ленивым итератором: значения сразу пишутся в компактные
+        буферы ``array``, и исходные словари не удерживаются в памяти.
+        """
+        columns: Dict[str, array] = {
+            name: array("b" if name == "is_complete" else "q") for name in cls.COLUMNS
+        }
+        for candle in candles:
+            if not isinstance(candle, dict):
+                candle = {}
+            columns["time"].append(parse_time(candle.get("time")))
+            columns["open"].append(quotation_to_nano(candle.get("open")))
+            columns["high"].append(quotation_to_nano(candle.get("high")))
+            columns["low"].append(quotation_to_nano(candle.get("low")))
+            columns["close"].append(quotation_to_nano(candle.get("close")))
+            columns["volume"].append(_parse_volume(candle.get("volume")))
+            columns["is_complete"].append(1 if candle.get("isComplete", True) else 0)
+        return cls.from_columns(columns)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: slice) -> "CandleSeries":
+        """Срез ряда; возвращает представления (view) без копирования."""
+        return CandleSeries(**{name: getattr(self, name)[index] for name in self.COLUMNS})
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(len={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def concat(self, other: "CandleSeries") -> "CandleSeries":
+        return CandleSeries(
+            **{
+                name: np.concatenate([getattr(self, name), getattr(other, name)])
+                for name in self.COLUMNS
+            }
+        )
+
+    @classmethod
+    def merge(cls, parts: Iterable["CandleSeries"]) -> "CandleSeries":
+        """
+        Объединяет ряды в один по возрастанию времени.
+
+        Свечи с одинаковым временем (стык соседних периодов) остаются в одном
+        экземпляре — из последнего ряда, где они встретились.
+        """
+        series = list(parts)
+        if not series:
+            return cls.empty()
+        merged = CandleSeries(
+            **{
+                name: np.concatenate([getattr(part, name) for part in series])
+                for name in cls.COLUMNS
+            }
+        )
+        if len(merged) < 2:
+            return merged
+        # Стабильная сортировка сохраняет порядок рядов внутри одного времени
+        order = np.argsort(merged.time, kind="stable")
+        times = merged.time[order]
+        keep = np.append(times[1:] != times[:-1], True)
+        return CandleSeries(**{name: getattr(merged, name)[order[keep]] for name in cls.COLUMNS})
+
+    def sorted_by_time(self) -> "CandleSeries":
+        if len(self) < 2 or bool(np.all(self.time[1:] >= self.time[:-1])):
+            return self
+        order = np.argsort(self.time, kind="stable")
+        return CandleSeries(**{name: getattr(self, name)[order] for name in self.COLUMNS})
+
+    def between(self, time_from: int, time_to: int) -> "CandleSeries":
+        """Свечи с временем в ``[time_from, time_to]``; ряд должен быть отсортирован."""
+        start = int(np.searchsorted(self.time, time_from, side="left"))
+        stop = int(np.searchsorted(self.time, time_to, side="right"))
+        return self[start:stop]
+
+    def to_float(self, column: str = "close") -> FloatArray:
+        """
+        Цены колонки в float64.
+
+        Считаются как ``float(units) + float(nano) / 1e9`` — той же арифметикой,
+        что и при разборе Quotation напрямую, поэтому значения совпадают побитово.
+        """
+        values: Int64Array = getattr(self, column)
+        units = np.where(values < 0, -(-values // NANO), values // NANO)
+        nano = values - units * NANO
+        return units.astype(np.float64) + nano.astype(np.float64) / NANO
+
+    def to_tinkoff(self) -> List[Dict[str, Any]]:
+        """Обратное преобразование в формат свечей Tinkoff (для отладки и тестов)."""
+        return [
+            {
+                "open": nano_to_quotation(int(self.open[idx])),
+                "high": nano_to_quotation(int(self.high[idx])),
+                "low": nano_to_quotation(int(self.low[idx])),
+                "close": nano_to_quotation(int(self.close[idx])),
+                "volume": str(int(self.volume[idx])),
+                "time": format_time(int(self.time[idx])),
+                "isComplete": bool(self.is_complete[idx]),
+            }
+            for idx in range(len(self))
+        ]
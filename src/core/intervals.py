@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Длительность свечи по интервалу Tinkoff Invest API; месяц считается календарным
+INTERVAL_SECONDS: Dict[str, int] = {
+    "CANDLE_INTERVAL_5_SEC": 5,
+    "CANDLE_INTERVAL_10_SEC": 10,
+    "CANDLE_INTERVAL_30_SEC": 30,
+    "CANDLE_INTERVAL_1_MIN": MINUTE,
+    "CANDLE_INTERVAL_2_MIN": 2 * MINUTE,
+    "CANDLE_INTERVAL_3_MIN": 3 * MINUTE,
+    "CANDLE_INTERVAL_5_MIN": 5 * MINUTE,
+    "CANDLE_INTERVAL_10_MIN": 10 * MINUTE,
+    "CANDLE_INTERVAL_15_MIN": 15 * MINUTE,
+    "CANDLE_INTERVAL_30_MIN": 30 * MINUTE,
+    "CANDLE_INTERVAL_HOUR": HOUR,
+    "CANDLE_INTERVAL_2_HOUR": 2 * HOUR,
+    "CANDLE_INTERVAL_4_HOUR": 4 * HOUR,
+    "CANDLE_INTERVAL_DAY": DAY,
+    "CANDLE_INTERVAL_WEEK": WEEK,
+    "CANDLE_INTERVAL_MONTH": 31 * DAY,
+}
+
+# Максимальный период одного запроса GetCandles по интервалу
+MAX_REQUEST_RANGE: Dict[str, int] = {
+    "CANDLE_INTERVAL_5_SEC": 200 * MINUTE,
+    "CANDLE_INTERVAL_10_SEC": 200 * MINUTE,
+    "CANDLE_INTERVAL_30_SEC": 20 * HOUR,
+    "CANDLE_INTERVAL_1_MIN": DAY,
+    "CANDLE_INTERVAL_2_MIN": DAY,
+    "CANDLE_INTERVAL_3_MIN": DAY,
+    "CANDLE_INTERVAL_5_MIN": DAY,
+    "CANDLE_INTERVAL_10_MIN": DAY,
+    "CANDLE_INTERVAL_15_MIN": DAY,
+    "CANDLE_INTERVAL_30_MIN": 2 * DAY,
+    "CANDLE_INTERVAL_HOUR": WEEK,
+    "CANDLE_INTERVAL_2_HOUR": 30 * DAY,
+    "CANDLE_INTERVAL_4_HOUR": 30 * DAY,
+    "CANDLE_INTERVAL_DAY": 365 * DAY,
+    "CANDLE_INTERVAL_WEEK": 2 * 365 * DAY,
+    "CANDLE_INTERVAL_MONTH": 10 * 365 * DAY,
+}
+
+# Недельные свечи начинаются с понедельника; 1970-01-05 — первый понедельник эпохи
+_FIRST_MONDAY = 4 * DAY
+
+
+def interval_seconds(interval: str) -> Optional[int]:
+    return INTERVAL_SECONDS.get(interval)
+
+
+def candle_start(interval: str, timestamp: int) -> int:
+    """Начало свечи ``interval`` (UTC), в которую попадает ``timestamp``."""
+    if interval == "CANDLE_INTERVAL_MONTH":
+        moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+    if interval == "CANDLE_INTERVAL_WEEK":
+        return timestamp - (timestamp - _FIRST_MONDAY) % WEEK
+    seconds = INTERVAL_SECONDS.get(interval)
+    if seconds is None:
+        raise ValueError(f"Unknown candle interval: {interval}")
+    return timestamp - timestamp % seconds
+
+
+def next_candle_start(interval: str, timestamp: int) -> int:
+    """Начало следующей свечи: момент, когда текущая свеча закроется."""
+    start = candle_start(interval, timestamp)
+    if interval == "CANDLE_INTERVAL_MONTH":
+        moment = datetime.fromtimestamp(start, tz=timezone.utc)
+        year, month = divmod(moment.month, 12)
+        return int(datetime(moment.year + year, month + 1, 1, tzinfo=timezone.utc).timestamp())
+    return start + INTERVAL_SECONDS[interval]
+
+
+def split_range(interval: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    Делит период ``[start, end)`` на части не длиннее ``MAX_REQUEST_RANGE[interval]``.
+
+    Части идут подряд без перекрытий; для неизвестного интервала период не делится.
+    """
+    step = MAX_REQUEST_RANGE.get(interval)
+    if step is None or end - start <= step:
+        return [(start, end)]
+    return [(chunk, min(chunk + step, end)) for chunk in range(start, end, step)]
@@ -0,0 +1,116 @@
+import asyncio
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов запускает ``func`` отдельной задачей, остальные ждут ее результата;
+    результат или исключение получают все. Отмена одного из ожидающих не отменяет
+    общий вызов. После завершения ключ освобождается, и следующий вызов выполнится
+    заново.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[T]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+
+            def _release(done: "asyncio.Future[Any]") -> None:
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+
+            call.add_done_callback(_release)
+        return await asyncio.shield(call)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+
+class _Broadcast(Generic[T]):
+    """Один проход по источнику, элементы которого получают все подписчики."""
+
+    def __init__(self, source: AsyncIterator[T]) -> None:
+        self.items: List[T] = []
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+        # Ошибку получают подписчики; если их не осталось, не пишем о ней предупреждение
+        self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        finally:
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[T]:
+        position = 0
+        while True:
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.task.done():
+                self.task.result()
+                return
+            await self._changed.wait()
+
+
+class StreamFlight(Generic[T]):
+    """
+    Потоковый вариант ``SingleFlight``.
+
+    Первый вызов запускает ``func`` отдельной задачей; все одновременные вызовы с тем
+    же ключом получают ее элементы с начала и по мере появления, а затем ее ошибку,
+    если она была. Отключение подписчика не останавливает общий поток.
+    """
+
+    def __init__(self) -> None:
+        self._streams: Dict[Hashable, _Broadcast[T]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._streams
+
+    def get(self, key: Hashable) -> Optional[AsyncIterator[T]]:
+        """Подписка на идущий поток с ключом ``key`` или None."""
+        broadcast = self._streams.get(key)
+        return broadcast.subscribe() if broadcast is not None else None
+
+    def stream(self, key: Hashable, func: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            created = broadcast = _Broadcast(func())
+            self._streams[key] = created
+
+            def _release(_: "asyncio.Future[Any]") -> None:
+                if self._streams.get(key) is created:
+                    del self._streams[key]
+
+            created.task.add_done_callback(_release)
+        return broadcast.subscribe()
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+logger = logging.getLogger("logger")
+
+
+async def run_periodically(
+    func: Callable[[], Awaitable[Any]],
+    interval_seconds: float,
+    name: str,
+) -> None:
+    """Бесконечно вызывает ``func`` с паузой ``interval_seconds``; ошибки только логируются."""
+    while True:
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Periodic task %s failed: %s", name, exc, exc_info=True)
+        await asyncio.sleep(interval_seconds)
+
+
+async def cancel_tasks(tasks: Iterable["asyncio.Task[Any]"]) -> None:
+    """Отменяет фоновые задачи и дожидается их завершения."""
+    pending = list(tasks)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,174 @@
+import asyncio
+import fcntl
+import json
+import logging
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from src.core.candles import CandleSeries
+
+logger = logging.getLogger("logger")
+
+CandleFetcher = Callable[[datetime, datetime], Awaitable[CandleSeries]]
+
+
+class CandleStore:
+    """
+    Инкрементальное хранилище свечей на диске.
+
+    Для каждого ключа (figi, interval) хранится каталог с отдельным бинарным файлом
+    на колонку (time, open, high, low, close, volume, is_complete) и ``meta.json``
+    с началом покрытого периода. Новые свечи дописываются в конец файлов; перед
+    дозаписью хвост, начиная с первой перезагруженной свечи (обычно незакрытой),
+    отрезается.
+
+    Каталог может быть общим для нескольких воркеров: чтение идет под разделяемой,
+    а слияние — под эксклюзивной блокировкой ``fcntl.flock`` файла ``.lock``, поэтому
+    колонки разных процессов не перемешиваются. Файловые операции выполняются в
+    потоке (``asyncio.to_thread``), не блокируя event loop; запрос к API делается
+    без блокировки файлов.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def _path(self, figi: str, interval: str) -> Path:
+        safe = [re.sub(r"[^A-Za-z0-9_-]", "_", part) for part in (interval, figi)]
+        return self.root.joinpath(*safe)
+
+    def _lock(self, figi: str, interval: str) -> asyncio.Lock:
+        return self._locks.setdefault((figi, interval), asyncio.Lock())
+
+    @staticmethod
+    @contextmanager
+    def _file_lock(path: Path, exclusive: bool) -> Iterator[None]:
+        """Межпроцессная блокировка каталога ключа."""
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / ".lock", "a+b") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_meta(self, path: Path) -> Dict[str, Any]:
+        meta_path = path / "meta.json"
+        if not meta_path.exists():
+            return {}
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+
+    def _write_meta(self, path: Path, meta: Dict[str, Any]) -> None:
+        tmp_path = path / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        tmp_path.replace(path / "meta.json")
+
+    def _load(self, path: Path) -> CandleSeries:
+        columns: Dict[str, Any] = {}
+        for name in CandleSeries.COLUMNS:
+            file_path = path / f"{name}.bin"
+            dtype = np.bool_ if name == "is_complete" else np.int64
+            columns[name] = (
+                np.fromfile(file_path, dtype=dtype) if file_path.exists() else np.empty(0, dtype)
+            )
+
+        # Колонки дописываются не атомарно: при обрыве записи выравниваем по короткой
+        rows = min(len(column) for column in columns.values())
+        return CandleSeries.from_columns({name: column[:rows] for name, column in columns.items()})
+
+    def _rewrite(self, path: Path, keep_rows: int, new: CandleSeries) -> None:
+        """Отрезает хвост после ``keep_rows`` строк и дописывает ``new``."""
+        path.mkdir(parents=True, exist_ok=True)
+        for name in CandleSeries.COLUMNS:
+            column = getattr(new, name)
+            with open(path / f"{name}.bin", "ab") as handle:
+                handle.truncate(keep_rows * column.itemsize)
+                handle.write(column.tobytes())
+
+    def _read_state(self, path: Path) -> Tuple[Optional[int], CandleSeries]:
+        """(начало покрытого периода, сохраненные свечи) под разделяемой блокировкой."""
+        with self._file_lock(path, exclusive=False):
+            covered_from = self._read_meta(path).get("covered_from")
+            stored = self._load(path) if covered_from is not None else CandleSeries.empty()
+        return covered_from, stored
+
+    def _merge_and_load(
+        self, path: Path, candles: CandleSeries, covered_from: int, start_ts: int, end_ts: int
+    ) -> CandleSeries:
+        with self._file_lock(path, exclusive=True):
+            self._merge(path, candles, covered_from)
+            return self._load(path).between(start_ts, end_ts)
+
+    def _merge(self, path: Path, candles: CandleSeries, covered_from: int) -> None:
+        """
+        Сливает свечи с сохраненными; вызывается под эксклюзивной блокировкой.
+
+        Состояние перечитывается под блокировкой: другой воркер мог изменить его,
+        пока шел запрос к API.
+        """
+        meta = self._read_meta(path)
+        full_reload = "covered_from" not in meta or covered_from < meta["covered_from"]
+        stored = CandleSeries.empty() if full_reload else self._load(path)
+
+        new = candles.sorted_by_time()
+        keep_rows = len(stored)
+        if len(new):
+            keep_rows = int(np.searchsorted(stored.time, new.time[0], side="left"))
+
+        self._rewrite(path, keep_rows, new)
+        if full_reload:
+            self._write_meta(path, {"covered_from": covered_from})
+
+    async def get_candles(
+        self,
+        *,
+        figi: str,
+        interval: str,
+        time_from: datetime,
+        time_to: datetime,
+        fetch: CandleFetcher,
+    ) -> CandleSeries:
+        """
+        Возвращает свечи за период, дозагружая через ``fetch`` только недостающий хвост.
+
+        Если период начинается раньше сохраненной истории, он загружается целиком.
+        Иначе запрашиваются свечи начиная с последней сохраненной (она могла быть
+        незакрытой) и до ``time_to``.
+        """
+        start_ts = int(time_from.timestamp())
+        end_ts = int(time_to.timestamp())
+
+        path = self._path(figi, interval)
+        async with self._lock(figi, interval):
+            covered_from, stored = await asyncio.to_thread(self._read_state, path)
+
+            if covered_from is None or start_ts < covered_from:
+                candles = await fetch(time_from, time_to)
+                logger.debug("Candle store reloaded figi=%s interval=%s", figi, interval)
+                return await asyncio.to_thread(
+                    self._merge_and_load, path, candles, start_ts, start_ts, end_ts
+                )
+
+            tail_from = (
+                datetime.fromtimestamp(int(stored.time[-1]), tz=timezone.utc)
+                if len(stored)
+                else time_from
+            )
+            if tail_from >= time_to:
+                return stored.between(start_ts, end_ts)
+
+            candles = await fetch(tail_from, time_to)
+            logger.debug(
+                "Candle store fetched %s tail candles for figi=%s interval=%s",
+                len(candles),
+                figi,
+                interval,
+            )
+            return await asyncio.to_thread(
+                self._merge_and_load, path, candles, covered_from, start_ts, end_ts
+            )
@@ -0,0 +1,41 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+IndexKey = Tuple[str, str]
+
+
+class FigiIndex:
+    """
+    In-memory индекс ticker→FIGI по ключу (ticker, class_code).
+
+    Актуальность поддерживает ``InstrumentCatalog``: индекс перезагружается при
+    каждом обновлении справочника акций.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[IndexKey, str] = {}
+
+    @staticmethod
+    def _key(ticker: str, class_code: str) -> IndexKey:
+        return ticker.upper(), class_code.upper()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, ticker: str, class_code: str) -> Optional[str]:
+        return self._items.get(self._key(ticker, class_code))
+
+    def put(self, ticker: str, class_code: str, figi: str) -> None:
+        self._items[self._key(ticker, class_code)] = figi
+
+    def load(self, instruments: Iterable[Dict[str, Any]]) -> int:
+        """Полностью заменяет содержимое индекса инструментами из ответа Shares."""
+        items: Dict[IndexKey, str] = {}
+        for instrument in instruments:
+            ticker = instrument.get("ticker")
+            class_code = instrument.get("classCode")
+            figi = instrument.get("figi")
+            if ticker and class_code and figi:
+                items[self._key(ticker, class_code)] = figi
+
+        self._items = items
+        return len(items)
@@ -1,5 +1,7 @@
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import AsyncIterator, Optional
 
 from gigachat import GigaChat
 from gigachat.models import Chat, Messages, MessagesRole
@@ -37,6 +39,7 @@ def _create_gigachat_instance(
             model=model,
             verify_ssl_certs=verify_ssl_certs,
             timeout=timeout,
+            max_connections=settings.gigachat_max_connections,
         )
     except Exception as exc:
         error_msg = f"Ошибка создания GigaChat LLM: {exc}"
@@ -47,6 +50,104 @@ def _create_gigachat_instance(
     return llm
 
 
+def _invalidate_token(llm: GigaChat) -> bool:
+    """
+    Сбрасывает кешированный токен клиента, чтобы следующий ``aget_token`` получил новый.
+
+    У ``GigaChat`` нет публичного метода для этого, поэтому используется приватный
+    ``_reset_token``; если в версии библиотеки его нет, токен обновится самой
+    библиотекой перед истечением, а функция вернет False.
+    """
+    reset_token = getattr(llm, "_reset_token", None)
+    if not callable(reset_token):
+        logger.warning("GigaChat client cannot reset its token; relying on library refresh")
+        return False
+    reset_token()
+    return True
+
+
+class GigaChatProvider:
+    """
+    Долгоживущий клиент GigaChat на время жизни приложения.
+
+    Один экземпляр ``GigaChat`` переиспользует OAuth-токен и пул HTTP-соединений
+    между запросами. Токен обновляется фоновой задачей ``run_token_refresh`` за
+    ``refresh_margin_seconds`` до истечения, поэтому пользовательские запросы не ждут
+    авторизацию; ``warm_up`` получает токен и открывает соединение при старте.
+    """
+
+    def __init__(self, llm: GigaChat, refresh_margin_seconds: float = 120.0) -> None:
+        self.llm = llm
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._expires_at: Optional[float] = None
+
+    async def refresh_token(self, force: bool = False) -> None:
+        """Получает токен; при ``force`` — новый, даже если текущий еще действует."""
+        if force:
+            # Библиотека сама обновляет токен только за минуту до истечения
+            _invalidate_token(self.llm)
+        token = await self.llm.aget_token()
+        # expires_at приходит в миллисекундах; 0 — токен без срока действия
+        self._expires_at = token.expires_at / 1000 if token and token.expires_at else None
+        logger.debug("GigaChat token refreshed, expires_at=%s", self._expires_at)
+
+    def seconds_until_refresh(self, default: float = 600.0) -> float:
+        if self._expires_at is None:
+            return default
+        return max(self._expires_at - time.time() - self.refresh_margin_seconds, 0.0)
+
+    async def warm_up(self) -> None:
+        """Получает токен и устанавливает соединение с API до первого запроса."""
+        await self.refresh_token()
+        await self.llm.aget_models()
+        logger.info("GigaChat client warmed up")
+
+    async def run_token_refresh(self, retry_seconds: float = 30.0) -> None:
+        """
+        Бесконечно обновляет токен заранее; ошибки логируются и повторяются.
+
+        Между обновлениями проходит не меньше ``retry_seconds``, даже если срок жизни
+        токена короче ``refresh_margin_seconds``.
+        """
+        while True:
+            await asyncio.sleep(max(self.seconds_until_refresh(), retry_seconds))
+            try:
+                await self.refresh_token(force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("GigaChat token refresh failed: %s", exc, exc_info=True)
+                await asyncio.sleep(retry_seconds)
+
+    async def aclose(self) -> None:
+        await self.llm.aclose()
+
+
+def _build_chat_payload(
+    user_message: str,
+    system_prompt: str,
+    attachment: Optional[str] = None,
+    temperature: Optional[float] = None,
+) -> Chat:
+    if not user_message or not user_message.strip():
+        raise ValueError("Сообщение пользователя не может быть пустым")
+
+    if not system_prompt or not system_prompt.strip():
+        raise ValueError("Системный промпт не может быть пустым")
+
+    return Chat(
+        messages=[
+            Messages(role=MessagesRole.SYSTEM, content=system_prompt),
+            Messages(
+                role=MessagesRole.USER,
+                content=user_message,
+                attachments=[attachment] if attachment else None,
+            ),
+        ],
+        temperature=temperature if temperature is not None else settings.temperature,
+    )
+
+
 async def invoke_gigachat_with_system_prompt(
     llm: GigaChat,
     user_message: str,
@@ -71,23 +172,7 @@ async def invoke_gigachat_with_system_prompt(
         RuntimeError: При ошибке вызова модели
     """
 
-    if not user_message or not user_message.strip():
-        raise ValueError("Сообщение пользователя не может быть пустым")
-
-    if not system_prompt or not system_prompt.strip():
-        raise ValueError("Системный промпт не может быть пустым")
-
-    payload = Chat(
-        messages=[
-            Messages(role=MessagesRole.SYSTEM, content=system_prompt),
-            Messages(
-                role=MessagesRole.USER,
-                content=user_message,
-                attachments=[attachment] if attachment else None,
-            ),
-        ],
-        temperature=temperature if temperature is not None else settings.temperature,
-    )
+    payload = _build_chat_payload(user_message, system_prompt, attachment, temperature)
 
     try:
         response = await llm.achat(payload)
@@ -107,3 +192,49 @@ async def invoke_gigachat_with_system_prompt(
         len(result),
     )
     return result.strip()
+
+
+def stream_gigachat_with_system_prompt(
+    llm: GigaChat,
+    user_message: str,
+    system_prompt: str,
+    attachment: Optional[str] = None,
+    temperature: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Потоковый вызов GigaChat с системным промптом.
+
+    Входные данные проверяются сразу при вызове, а не при первой итерации.
+
+    Args:
+        llm: Экземпляр GigaChat
+        user_message: Сообщение пользователя
+        system_prompt: Системный промпт для контекста
+        attachment: uuid документа
+
+    Returns:
+        AsyncIterator[str]: Фрагменты ответа модели по мере генерации
+
+    Raises:
+        ValueError: При некорректных входных данных
+        RuntimeError: При ошибке вызова модели (во время итерации)
+    """
+
+    payload = _build_chat_payload(user_message, system_prompt, attachment, temperature)
+    return _stream_chat(llm, payload)
+
+
+async def _stream_chat(llm: GigaChat, payload: Chat) -> AsyncIterator[str]:
+    length = 0
+    try:
+        async for chunk in llm.astream(payload):
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                length += len(content)
+                yield content
+    except Exception as exc:
+        error_msg = f"Ошибка потокового вызова GigaChat с системным промптом: {exc}"
+        logger.error(error_msg, exc_info=True)
+        raise RuntimeError(error_msg) from exc
+
+    logger.debug("GigaChat потоковый ответ получен, длина: %s символов", length)
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("logger")
+
+# Статусы, после которых запрос повторяется
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_LEADING_NUMBER = re.compile(r"\s*(\d+(?:\.\d+)?)")
+
+
+def _header_number(headers: httpx.Headers, name: str) -> Optional[float]:
+    # Tinkoff отдает квоту как "200, 200;w=60": берем первое число
+    match = _LEADING_NUMBER.match(headers.get(name, ""))
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """
+    Token bucket для одного метода API: ``limit`` запросов за ``period_seconds``.
+
+    Емкость равна ``limit``, токены пополняются равномерно. ``update`` подстраивает
+    состояние под квоту из заголовков ответа: остаток не может быть больше
+    ``remaining``, а при исчерпанной квоте запросы ждут ``reset`` секунд, после чего
+    доступна вся квота нового окна.
+    """
+
+    def __init__(
+        self,
+        limit: float,
+        period_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.limit = float(limit)
+        self.period_seconds = period_seconds
+        self.tokens = float(limit)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._resume_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period_seconds
+
+    def _refill(self, now: float) -> None:
+        if self._resume_at is not None:
+            if now < self._resume_at:
+                return
+            self.tokens, self._updated, self._resume_at = self.limit, now, None
+        self.tokens = min(self.limit, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_seconds(self, now: float) -> float:
+        if self._resume_at is not None and now < self._resume_at:
+            return self._resume_at - now
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Ждет и забирает один токен; ожидающие обслуживаются по очереди."""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                if self._resume_at is None and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await self._sleep(self._wait_seconds(now))
+
+    def update(
+        self, limit: Optional[float], remaining: Optional[float], reset_seconds: Optional[float]
+    ) -> None:
+        now = self._clock()
+        self._refill(now)
+        if limit:
+            self.limit = limit
+        if remaining is None:
+            return
+        self.tokens = min(self.tokens, remaining)
+        if remaining < 1 and reset_seconds is not None:
+            self.tokens = 0.0
+            self._resume_at = now + reset_seconds
+
+    def update_from_headers(self, headers: httpx.Headers) -> None:
+        self.update(
+            _header_number(headers, "x-ratelimit-limit"),
+            _header_number(headers, "x-ratelimit-remaining"),
+            _header_number(headers, "x-ratelimit-reset"),
+        )
+
+
+class AdaptiveConcurrency:
+    """
+    Лимит одновременных запросов по схеме AIMD.
+
+    Успешный ответ увеличивает лимит на ``1 / limit`` (примерно +1 за «окно» запросов),
+    перегрузка (429, 5xx, таймаут) уменьшает его в ``decrease`` раз, но не ниже ``minimum``.
+    """
+
+    def __init__(
+        self, initial: int, *, minimum: int = 1, maximum: int = 64, decrease: float = 0.5
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, overloaded: Optional[bool]) -> None:
+        """Освобождает слот; ``overloaded=None`` (исход неизвестен) не меняет лимит."""
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+            elif overloaded is not None:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class TinkoffRateLimiter:
+    """
+    Ограничение запросов к Tinkoff Invest API.
+
+    Для каждого метода (последний сегмент пути, например ``GetCandles``) ведется свой
+    ``TokenBucket``, который после каждого ответа подстраивается под заголовки
+    ``x-ratelimit-*``. Число одновременных запросов ко всем методам регулирует
+    ``AdaptiveConcurrency``. Ответы 429/5xx и сетевые ошибки повторяются до
+    ``max_retries`` раз с экспоненциальной задержкой со случайным разбросом (full jitter).
+    """
+
+    def __init__(
+        self,
+        *,
+        default_limit: int,
+        period_seconds: float = 60.0,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+    ) -> None:
+        self.default_limit = default_limit
+        self.period_seconds = period_seconds
+        self.concurrency = concurrency or AdaptiveConcurrency(8)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, method: str) -> TokenBucket:
+        bucket = self._buckets.get(method)
+        if bucket is None:
+            bucket = TokenBucket(self.default_limit, self.period_seconds)
+            self._buckets[method] = bucket
+        return bucket
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def _attempt(
+        self, bucket: TokenBucket, request: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        await bucket.acquire()
+        await self.concurrency.acquire()
+        try:
+            response = await request()
+        except httpx.TransportError:
+            await self.concurrency.release(overloaded=True)
+            raise
+        except BaseException:
+            # Отмена вызывающим (отключение клиента, отмена соседних задач) ничего не
+            # говорит о нагрузке upstream: слот освобождается без изменения лимита
+            await asyncio.shield(self.concurrency.release(overloaded=None))
+            raise
+        await self.concurrency.release(response.status_code in RETRY_STATUSES)
+        bucket.update_from_headers(response.headers)
+        return response
+
+    async def send(
+        self, method: str, request: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """Выполняет запрос с учетом квоты метода; последний ответ возвращается как есть."""
+        bucket = self.bucket(method)
+        attempt = 0
+        while True:
+            try:
+                response = await self._attempt(bucket, request)
+            except httpx.TransportError as exc:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning("Tinkoff %s request failed, retrying: %s", method, exc)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                logger.warning(
+                    "Tinkoff %s returned %s, retrying (attempt %s, concurrency limit %.1f)",
+                    method,
+                    response.status_code,
+                    attempt + 1,
+                    self.concurrency.limit,
+                )
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
@@ -1,9 +1,20 @@
+import asyncio
 import logging
+import math
 from datetime import datetime, timezone
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 import httpx
 
+from src.core.cache_backends import TieredCache
+from src.core.candles import CandleSeries
+from src.core.intervals import split_range
+from src.core.singleflight import SingleFlight
+from src.integrations.candle_store import CandleStore
+from src.integrations.figi_index import FigiIndex
+from src.integrations.rate_limit import AdaptiveConcurrency, TinkoffRateLimiter
+from src.integrations.tinkoff_decoder import decode_candles, decode_shares, unwrap_payload
 from src.settings import settings
 
 logger = logging.getLogger("logger")
@@ -21,6 +32,10 @@ class TinkoffClient:
         token: Optional[str] = None,
         base_url: Optional[str] = None,
         timeout_seconds: Optional[float] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        candle_store: Optional[CandleStore] = None,
+        rate_limiter: Optional[TinkoffRateLimiter] = None,
+        shared_cache: Optional[TieredCache] = None,
     ) -> None:
         self.base_url = (base_url or settings.tinkoff_base_url).rstrip("/")
         self.token = token or settings.tinkoff_api_token
@@ -29,73 +44,209 @@ class TinkoffClient:
         if not self.token or "TINKOFF_API_TOKEN" in self.token:
             raise ValueError("Tinkoff API token is not configured")
 
-    def resolve_share_figi(
+        self._http = http_client or self._create_http_client()
+        self.figi_index = FigiIndex()
+        self.candle_store = candle_store
+        self.shared_cache = shared_cache
+        # Одновременные одинаковые запросы к API объединяются в один
+        self._candle_flights: SingleFlight[CandleSeries] = SingleFlight()
+        self._figi_flights: SingleFlight[str] = SingleFlight()
+        self.rate_limiter = rate_limiter
+        if rate_limiter is None and settings.tinkoff_rate_limit_enabled:
+            self.rate_limiter = self._create_rate_limiter()
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """Создает долгоживущий пул соединений (keep-alive, HTTP/2) к Tinkoff Invest API."""
+        return httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {self.token}"},
+            timeout=self.timeout,
+            verify=False,
+            http2=settings.tinkoff_http2,
+            limits=httpx.Limits(
+                max_connections=settings.tinkoff_max_connections,
+                max_keepalive_connections=settings.tinkoff_max_keepalive_connections,
+                keepalive_expiry=settings.tinkoff_keepalive_expiry,
+            ),
+        )
+
+    @staticmethod
+    def _create_rate_limiter() -> TinkoffRateLimiter:
+        return TinkoffRateLimiter(
+            default_limit=settings.tinkoff_rate_limit_per_minute,
+            concurrency=AdaptiveConcurrency(
+                settings.tinkoff_concurrency_initial, maximum=settings.tinkoff_concurrency_max
+            ),
+            max_retries=settings.tinkoff_max_retries,
+            backoff_base=settings.tinkoff_retry_base_delay,
+            backoff_max=settings.tinkoff_retry_max_delay,
+        )
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений."""
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "TinkoffClient":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.aclose()
+
+    async def resolve_share_figi(
         self,
         *,
         ticker: Optional[str] = None,
         figi: Optional[str] = None,
         class_code: str = "TQBR",
     ) -> str:
-        """Возвращает FIGI по тикеру или валидирует переданный FIGI."""
+        """
+        Возвращает FIGI по тикеру или валидирует переданный FIGI.
+
+        Сначала ищет тикер в ``figi_index``, затем в общем кеше воркеров ``shared_cache``;
+        ShareBy вызывается только при промахе, одновременные промахи по одному тикеру
+        объединяются в один вызов.
+        """
         if figi:
             return figi
         if not ticker:
             raise ValueError("ticker or figi must be provided")
 
+        cached_figi = self.figi_index.get(ticker, class_code)
+        if cached_figi:
+            return cached_figi
+
+        key = (ticker.upper(), class_code.upper())
+        return await self._figi_flights.do(key, partial(self._share_by, ticker, class_code))
+
+    async def _share_by(self, ticker: str, class_code: str) -> str:
+        cache_key = f"{ticker.upper()}:{class_code.upper()}"
+        if self.shared_cache is not None:
+            shared_figi = await self.shared_cache.get(cache_key)
+            if shared_figi is not None:
+                self.figi_index.put(ticker, class_code, shared_figi.decode("utf-8"))
+                return shared_figi.decode("utf-8")
+
         payload: Dict[str, Any] = {
             "id": ticker,
             "idType": "INSTRUMENT_ID_TYPE_TICKER",
             "classCode": class_code,
         }
-        data = self._post(self._SHARE_BY_PATH, payload)
+        data = await self._post(self._SHARE_BY_PATH, payload)
         instrument = data.get("instrument") or {}
         figi_value = instrument.get("figi")
         if not figi_value:
             raise RuntimeError(f"FIGI not found for ticker={ticker}, class_code={class_code}")
+        self.figi_index.put(ticker, class_code, figi_value)
+        if self.shared_cache is not None:
+            await self.shared_cache.set(
+                cache_key, figi_value.encode("utf-8"), settings.figi_index_ttl
+            )
         logger.debug(
             "Resolved FIGI for ticker=%s, class_code=%s: %s", ticker, class_code, figi_value
         )
         return figi_value
 
-    def get_candles(
+    async def get_candles(
         self,
         *,
         figi: str,
         time_from: datetime,
         time_to: datetime,
         interval: str = "CANDLE_INTERVAL_HOUR",
-    ) -> List[Dict[str, Any]]:
-        """Получает свечи по FIGI за период."""
+    ) -> CandleSeries:
+        """
+        Получает свечи по FIGI за период.
+
+        При подключенном ``candle_store`` из API загружается только недостающий хвост.
+        Одновременные запросы одного окна выполняются одним обращением к API, результат
+        (или ошибку) получают все вызывающие.
+        """
         if not figi:
             raise ValueError("figi is required")
         if time_from >= time_to:
             raise ValueError("time_from must be earlier than time_to")
 
+        # Свечи начинаются на целых секундах, поэтому окна с одинаковыми округленными
+        # вверх границами возвращают одни и те же свечи
+        key = (
+            figi,
+            interval,
+            math.ceil(time_from.timestamp()),
+            math.ceil(time_to.timestamp()),
+        )
+        return await self._candle_flights.do(
+            key, partial(self._load_candles, figi, time_from, time_to, interval)
+        )
+
+    async def _load_candles(
+        self, figi: str, time_from: datetime, time_to: datetime, interval: str
+    ) -> CandleSeries:
+        if self.candle_store is None:
+            return await self._fetch_candles(figi, time_from, time_to, interval)
+
+        async def _fetch(fetch_from: datetime, fetch_to: datetime) -> CandleSeries:
+            return await self._fetch_candles(figi, fetch_from, fetch_to, interval)
+
+        return await self.candle_store.get_candles(
+            figi=figi,
+            interval=interval,
+            time_from=time_from,
+            time_to=time_to,
+            fetch=_fetch,
+        )
+
+    async def _fetch_candles(
+        self,
+        figi: str,
+        time_from: datetime,
+        time_to: datetime,
+        interval: str,
+    ) -> CandleSeries:
+        """
+        Загружает свечи из GetCandles.
+
+        Период длиннее ``MAX_REQUEST_RANGE`` для интервала делится на части, которые
+        загружаются параллельно (не больше ``tinkoff_candle_chunk_concurrency``
+        одновременно, в пределах квоты ``rate_limiter``) и склеиваются по времени
+        без дублей на стыках.
+        """
+        chunks = split_range(interval, int(time_from.timestamp()), int(time_to.timestamp()))
+        if len(chunks) == 1:
+            return await self._fetch_candle_chunk(figi, time_from, time_to, interval)
+
+        bounds = [time_from]
+        bounds.extend(datetime.fromtimestamp(start, tz=timezone.utc) for start, _ in chunks[1:])
+        bounds.append(time_to)
+        semaphore = asyncio.Semaphore(settings.tinkoff_candle_chunk_concurrency)
+
+        async def _fetch(chunk_from: datetime, chunk_to: datetime) -> CandleSeries:
+            async with semaphore:
+                return await self._fetch_candle_chunk(figi, chunk_from, chunk_to, interval)
+
+        parts = await asyncio.gather(*(_fetch(*bound) for bound in zip(bounds, bounds[1:])))
+        candles = CandleSeries.merge(parts)
+        logger.debug(
+            "Fetched %s candles for figi=%s interval=%s in %s chunks",
+            len(candles),
+            figi,
+            interval,
+            len(parts),
+        )
+        return candles
+
+    async def _fetch_candle_chunk(
+        self, figi: str, time_from: datetime, time_to: datetime, interval: str
+    ) -> CandleSeries:
         payload = {
             "figi": figi,
             "from": time_from.astimezone(timezone.utc).isoformat(),
             "to": time_to.astimezone(timezone.utc).isoformat(),
             "interval": interval,
         }
-        data = self._post(self._GET_CANDLES_PATH, payload)
-        candles = data.get("candles") or []
+        candles = decode_candles(await self._post_raw(self._GET_CANDLES_PATH, payload))
         logger.debug("Fetched %s candles for figi=%s interval=%s", len(candles), figi, interval)
         return candles
 
-    def _map_candle_to_trading_json(self, candle: Dict[str, Any]) -> Dict[str, Any]:
-        close_value = self._quotation_to_float(candle.get("close"))
-        volume_value = candle.get("volume", 0)
-        return {"json": {"close": close_value, "volume": volume_value}}
-
-    @staticmethod
-    def _quotation_to_float(quotation: Optional[Dict[str, Any]]) -> float:
-        if not quotation:
-            return 0.0
-        units = quotation.get("units", 0)
-        nano = quotation.get("nano", 0)
-        return float(units) + float(nano) / 1_000_000_000
-
-    def list_shares(
+    async def list_shares(
         self,
         *,
         class_code: str = "TQBR",
@@ -107,9 +258,10 @@ class TinkoffClient:
         """
         Возвращает список акций с фильтрами по classCode, countryOfRisk, exchange.
         """
-        payload = {"instrumentStatus": instrument_status, "instrumentExchange": instrument_exchange}
-        data = self._post(self._SHARES_PATH, payload)
-        instruments = data.get("instruments") or []
+        instruments = await self.fetch_shares(
+            instrument_status=instrument_status,
+            instrument_exchange=instrument_exchange,
+        )
         logger.debug("Fetched %s instruments for class_code=%s", len(instruments), class_code)
 
         def _match(value: Optional[str], expected: Optional[str]) -> bool:
@@ -125,16 +277,32 @@ class TinkoffClient:
             and _match(instrument.get("exchange"), exchange)
         ]
 
-    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def fetch_shares(
+        self,
+        *,
+        instrument_status: str = "INSTRUMENT_STATUS_BASE",
+        instrument_exchange: str = "INSTRUMENT_EXCHANGE_UNSPECIFIED",
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает полный список акций из Shares без фильтрации.
+
+        У инструментов остаются только поля из ``SHARE_FIELDS``.
+        """
+        payload = {"instrumentStatus": instrument_status, "instrumentExchange": instrument_exchange}
+        return decode_shares(await self._post_raw(self._SHARES_PATH, payload))
+
+    async def _post_raw(self, path: str, payload: Dict[str, Any]) -> bytes:
         url = f"{self.base_url}/{path.lstrip('/')}"
-        headers = {"Authorization": f"Bearer {self.token}"}
 
-        with httpx.Client(timeout=self.timeout, verify=False) as client:
-            response = client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+        if self.rate_limiter is None:
+            response = await self._http.post(url, json=payload)
+        else:
+            method = path.rsplit("/", 1)[-1]
+            response = await self.rate_limiter.send(
+                method, partial(self._http.post, url, json=payload)
+            )
+        response.raise_for_status()
+        return response.content
 
-        # Ответы gRPC-gateway содержат тело в поле payload
-        if isinstance(data, dict) and "payload" in data:
-            return data["payload"] or {}
-        return data if isinstance(data, dict) else {}
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return unwrap_payload(await self._post_raw(path, payload))
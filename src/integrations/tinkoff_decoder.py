@@ -0,0 +1,112 @@
+import json
+import logging
+import re
+from typing import Any, Dict, Iterator, List
+
+from src.core.candles import CandleSeries
+
+logger = logging.getLogger("logger")
+
+# Поля Shares, которые используются ShareItem, фильтрами /stocks и индексом FIGI
+SHARE_FIELDS = frozenset(
+    {
+        "figi",
+        "ticker",
+        "classCode",
+        "isin",
+        "name",
+        "currency",
+        "exchange",
+        "countryOfRisk",
+        "sector",
+        "lot",
+        "shortEnabledFlag",
+        "apiTradeAvailableFlag",
+        "liquidityFlag",
+    }
+)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, idx: int) -> int:
+    match = _WHITESPACE.match(text, idx)
+    return match.end() if match else idx
+
+
+def iter_array_items(text: str, key: str) -> Iterator[Any]:
+    """
+    Лениво разбирает элементы массива ``"key": [...]`` из JSON-текста по одному.
+
+    Каждый элемент декодируется C-сканером ``json`` (``raw_decode``) и сразу отдается
+    вызывающему, поэтому весь ответ не материализуется во вложенные словари.
+    Ключ ищется по первому вхождению — в ответах GetCandles/Shares (в том числе
+    обернутых в ``payload``) это и есть нужный массив. Отсутствие ключа означает
+    пустой массив; неожиданная структура — ``ValueError``.
+    """
+    position = text.find(f'"{key}"')
+    if position < 0:
+        return
+
+    idx = _skip_whitespace(text, position + len(key) + 2)
+    if text[idx : idx + 1] != ":":
+        raise ValueError(f"Unexpected JSON structure near key {key!r}")
+    idx = _skip_whitespace(text, idx + 1)
+    if text.startswith("null", idx):
+        return
+    if text[idx : idx + 1] != "[":
+        raise ValueError(f"Key {key!r} does not hold a JSON array")
+
+    idx = _skip_whitespace(text, idx + 1)
+    if text[idx : idx + 1] == "]":
+        return
+
+    while True:
+        item, idx = _DECODER.raw_decode(text, idx)
+        yield item
+        idx = _skip_whitespace(text, idx)
+        delimiter = text[idx : idx + 1]
+        if delimiter == "]":
+            return
+        if delimiter != ",":
+            raise ValueError(f"Unexpected delimiter {delimiter!r} in array {key!r}")
+        idx = _skip_whitespace(text, idx + 1)
+
+
+def unwrap_payload(body: bytes) -> Dict[str, Any]:
+    """Полностью разбирает ответ; тело ответов gRPC-gateway лежит в поле payload."""
+    data = json.loads(body)
+    if isinstance(data, dict) and "payload" in data:
+        return data["payload"] or {}
+    return data if isinstance(data, dict) else {}
+
+
+def decode_candles(body: bytes) -> CandleSeries:
+    """Разбирает ответ GetCandles сразу в CandleSeries, минуя список словарей."""
+    text = body.decode("utf-8")
+    try:
+        return CandleSeries.from_tinkoff(iter_array_items(text, "candles"))
+    except ValueError:
+        logger.warning("Falling back to full JSON parsing of GetCandles response", exc_info=True)
+        return CandleSeries.from_tinkoff(unwrap_payload(body).get("candles") or [])
+
+
+def decode_shares(body: bytes) -> List[Dict[str, Any]]:
+    """Разбирает ответ Shares, оставляя у инструментов только поля из ``SHARE_FIELDS``."""
+    text = body.decode("utf-8")
+    try:
+        items = iter_array_items(text, "instruments")
+        return [
+            {field: value for field, value in item.items() if field in SHARE_FIELDS}
+            for item in items
+            if isinstance(item, dict)
+        ]
+    except ValueError:
+        logger.warning("Falling back to full JSON parsing of Shares response", exc_info=True)
+        instruments = unwrap_payload(body).get("instruments") or []
+        return [
+            {field: value for field, value in item.items() if field in SHARE_FIELDS}
+            for item in instruments
+            if isinstance(item, dict)
+        ]
@@ -1,20 +1,189 @@
+import asyncio
 import logging
 import logging.config
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.router import api_router
+from src.core.cache_backends import TieredCache, create_backends
 from src.core.logging.config import LOGGING_CONFIG
+from src.core.tasks import cancel_tasks, run_periodically
+from src.integrations.candle_store import CandleStore
+from src.integrations.gigachat import GigaChatProvider, create_gigachat_llm
+from src.integrations.tinkoff import TinkoffClient
+from src.services.instrument_catalog import InstrumentCatalog
+from src.services.llm_cache import LLMResponseCache
+from src.services.precompute import TrendPrecomputer
+from src.services.response_cache import ResponseCache
+from src.services.screener import ScreenerCache
 from src.settings import settings
 
 logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger("logger")
 
+
+def _create_shared_cache() -> Optional[TieredCache]:
+    if not settings.shared_cache_backends:
+        return None
+    try:
+        backends = create_backends(
+            settings.shared_cache_backends,
+            memory_max_entries=settings.shared_cache_memory_max_entries,
+            sqlite_path=settings.shared_cache_sqlite_path,
+            redis_url=settings.shared_cache_redis_url,
+            redis_timeout_seconds=settings.shared_cache_redis_timeout,
+        )
+    except (ValueError, OSError) as exc:
+        logger.warning("Shared cache is not initialized: %s", exc)
+        return None
+    logger.info("Shared cache tiers: %s", ", ".join(backend.name for backend in backends))
+    return TieredCache(backends)
+
+
+def _namespaced(cache: Optional[TieredCache], namespace: str) -> Optional[TieredCache]:
+    return cache.with_namespace(namespace) if cache is not None else None
+
+
+async def _start_gigachat(
+    background_tasks: List["asyncio.Task[Any]"],
+) -> Optional[GigaChatProvider]:
+    try:
+        provider = GigaChatProvider(
+            create_gigachat_llm(),
+            refresh_margin_seconds=settings.gigachat_token_refresh_margin,
+        )
+    except (ValueError, RuntimeError) as exc:
+        logger.warning("GigaChat client is not initialized: %s", exc)
+        return None
+
+    if settings.gigachat_warm_up:
+        try:
+            await asyncio.wait_for(provider.warm_up(), timeout=settings.gigachat_warm_up_timeout)
+        except Exception as exc:
+            logger.warning("GigaChat warm-up failed: %s", exc)
+    background_tasks.append(asyncio.create_task(provider.run_token_refresh()))
+    return provider
+
+
+def _start_instrument_catalog(
+    client: TinkoffClient, background_tasks: List["asyncio.Task[Any]"]
+) -> InstrumentCatalog:
+    # Каталог обновляет и индекс FIGI: отдельная загрузка Shares не нужна
+    catalog = InstrumentCatalog(
+        client,
+        ttl_seconds=settings.instrument_catalog_ttl,
+        figi_index=client.figi_index if settings.figi_index_enabled else None,
+    )
+    background_tasks.append(
+        asyncio.create_task(
+            run_periodically(catalog.refresh, settings.instrument_catalog_ttl, "instrument-catalog")
+        )
+    )
+    return catalog
+
+
+def _start_trend_precomputer(
+    client: TinkoffClient,
+    catalog: InstrumentCatalog,
+    background_tasks: List["asyncio.Task[Any]"],
+) -> Optional[TrendPrecomputer]:
+    if not settings.watchlist_tickers:
+        return None
+    try:
+        precomputer = TrendPrecomputer(
+            client,
+            tickers=settings.watchlist_tickers,
+            class_code=settings.watchlist_class_code,
+            intervals=settings.watchlist_intervals,
+            days=settings.watchlist_days,
+            levels_window=settings.watchlist_levels_window,
+            delay_seconds=settings.watchlist_delay_seconds,
+            catalog=catalog,
+        )
+    except ValueError as exc:
+        logger.warning("Trend precompute is not initialized: %s", exc)
+        return None
+
+    background_tasks.extend(
+        asyncio.create_task(precomputer.run(interval)) for interval in precomputer.intervals
+    )
+    return precomputer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    background_tasks: List["asyncio.Task[Any]"] = []
+    shared_cache = app.state.shared_cache = _create_shared_cache()
+
+    try:
+        app.state.tinkoff_client = TinkoffClient(
+            candle_store=(
+                CandleStore(settings.candle_store_dir) if settings.candle_store_enabled else None
+            ),
+            shared_cache=_namespaced(shared_cache, "figi"),
+        )
+    except ValueError as exc:
+        logger.warning("Tinkoff client is not initialized: %s", exc)
+        app.state.tinkoff_client = None
+
+    app.state.gigachat = await _start_gigachat(background_tasks)
+
+    app.state.llm_cache = (
+        LLMResponseCache(
+            ttl_seconds=settings.llm_cache_ttl,
+            max_entries=settings.llm_cache_max_entries,
+            disk_dir=settings.llm_cache_dir,
+            shared=_namespaced(shared_cache, "llm"),
+        )
+        if settings.llm_cache_enabled
+        else None
+    )
+
+    app.state.response_cache = (
+        ResponseCache(
+            max_entries=settings.trends_cache_max_entries,
+            max_ttl_seconds=settings.trends_cache_ttl,
+            shared=_namespaced(shared_cache, "trends"),
+        )
+        if settings.trends_cache_enabled
+        else None
+    )
+
+    app.state.screener_cache = ScreenerCache(max_ttl_seconds=settings.screener_cache_ttl)
+    app.state.instrument_catalog = None
+    app.state.trend_precomputer = None
+    if app.state.tinkoff_client is not None:
+        app.state.instrument_catalog = _start_instrument_catalog(
+            app.state.tinkoff_client, background_tasks
+        )
+        app.state.trend_precomputer = _start_trend_precomputer(
+            app.state.tinkoff_client, app.state.instrument_catalog, background_tasks
+        )
+
+    try:
+        yield
+    finally:
+        await cancel_tasks(background_tasks)
+        await app.state.screener_cache.aclose()
+        if app.state.tinkoff_client is not None:
+            await app.state.tinkoff_client.aclose()
+            logger.info("Tinkoff client closed")
+        if app.state.gigachat is not None:
+            await app.state.gigachat.aclose()
+            logger.info("GigaChat client closed")
+        if shared_cache is not None:
+            logger.info("Shared cache stats: %s", shared_cache.stats())
+            shared_cache.close()
+
+
 app = FastAPI(
     title=settings.service_name,
     description=settings.service_description,
     openapi_url=f"{settings.api_v1_str}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
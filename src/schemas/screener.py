@@ -0,0 +1,41 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ScreenerQuery(BaseModel):
+    class_code: str = Field(default="TQBR", alias="classCode")
+    interval: str = Field(default="CANDLE_INTERVAL_DAY")
+    days: int = Field(default=300, ge=1, le=365)
+    filter: Optional[str] = Field(
+        default=None, description="Условия через запятую, например: rsi<30,price>sma50"
+    )
+    sort: Optional[str] = Field(
+        default=None, description="Поля сортировки через запятую; '-' — по убыванию"
+    )
+    limit: int = Field(default=50, ge=1, le=500)
+    offset: int = Field(default=0, ge=0)
+
+
+class ScreenerRow(BaseModel):
+    figi: str
+    ticker: Optional[str] = None
+    name: Optional[str] = None
+    price: float
+    sma20: Optional[float] = None
+    sma50: Optional[float] = None
+    sma200: Optional[float] = None
+    rsi: Optional[float] = None
+    rsi_signal: str
+    volume: int
+    avg_volume20: Optional[float] = None
+    volume_change: Optional[float] = None
+    trend: str
+
+
+class ScreenerResponse(BaseModel):
+    total: int
+    matched: int
+    failed: int
+    offset: int
+    items: List[ScreenerRow]
@@ -7,6 +7,7 @@ class StockFilters(BaseModel):
     class_code: str = Field(default="TQBR", alias="classCode")
     country_of_risk: str = Field(default="RU", alias="countryOfRisk")
     exchange: str = Field(default="moex_mrng_evng_e_wknd_dlr")
+    sector: Optional[str] = None
     instrument_status: str = Field(default="INSTRUMENT_STATUS_BASE", alias="instrumentStatus")
     instrument_exchange: str = Field(
         default="INSTRUMENT_EXCHANGE_UNSPECIFIED", alias="instrumentExchange"
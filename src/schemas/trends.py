@@ -8,6 +8,7 @@ class TrendsRequest(BaseModel):
     class_code: str = Field(default="TQBR", alias="classCode")
     days: int = Field(default=60, ge=1, le=365)
     interval: str = Field(default="CANDLE_INTERVAL_DAY")
+    levels_window: int = Field(default=5, ge=1, le=100, alias="levelsWindow")
 
     @field_validator("tickers", mode="after")
     @classmethod
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Sequence
+
+from gigachat import GigaChat
+
+from src.integrations.gigachat import (
+    invoke_gigachat_with_system_prompt,
+    stream_gigachat_with_system_prompt,
+)
+from src.schemas.trends import TrendResult
+from src.services.prompt_encoder import encode_trends_table
+from src.settings import settings
+
+logger = logging.getLogger("logger")
+
+# Колонки сводной таблицы для резюме по портфелю: сигналы без уровней и объемов
+SUMMARY_COLUMNS = (
+    "ticker",
+    "current_price",
+    "rsi",
+    "rsi_signal",
+    "volume_signal",
+    "overall_trend",
+    "error",
+)
+
+
+def build_user_prompts(results: Sequence[TrendResult], chunk_size: int) -> List[str]:
+    """
+    Пользовательские промпты для анализа.
+
+    До ``chunk_size`` тикеров включительно — один промпт ``user_prompt`` по всем данным.
+    Больший список режется на части по ``chunk_size`` с промптом ``chunk_user_prompt``:
+    каждая часть анализируется отдельно (map), а резюме по портфелю составляется
+    завершающим вызовом (reduce).
+    """
+    if len(results) <= chunk_size:
+        return [settings.user_prompt.format(TRENDS_TABLE=encode_trends_table(results))]
+    return [
+        settings.chunk_user_prompt.format(
+            TRENDS_TABLE=encode_trends_table(results[start : start + chunk_size])
+        )
+        for start in range(0, len(results), chunk_size)
+    ]
+
+
+def build_reduce_prompt(results: Sequence[TrendResult]) -> str:
+    """
+    Промпт резюме по портфелю (reduce).
+
+    Модели передаются не обзоры частей, а сводная таблица сигналов
+    (``SUMMARY_COLUMNS``) — по короткой строке на тикер, поэтому промпт в разы
+    меньше исходной таблицы и не зависит от длины ответов модели.
+    """
+    return settings.reduce_user_prompt.format(
+        TRENDS_TABLE=encode_trends_table(results, SUMMARY_COLUMNS)
+    )
+
+
+def _start_map(
+    llm: GigaChat, prompts: Sequence[str], concurrency: int
+) -> List["asyncio.Task[str]"]:
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _analyse_chunk(prompt: str) -> str:
+        async with semaphore:
+            return await invoke_gigachat_with_system_prompt(
+                llm=llm,
+                user_message=prompt,
+                system_prompt=settings.system_prompt,
+            )
+
+    logger.info("Running AI analysis in %s chunks, concurrency=%s", len(prompts), concurrency)
+    return [asyncio.create_task(_analyse_chunk(prompt)) for prompt in prompts]
+
+
+async def _cancel(tasks: Sequence["asyncio.Task[str]"]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _require_reduce_prompt(reduce_prompt: Optional[str]) -> str:
+    if not reduce_prompt:
+        raise ValueError("reduce_prompt is required for chunked analysis")
+    return reduce_prompt
+
+
+async def run_analysis(
+    llm: GigaChat, prompts: Sequence[str], concurrency: int, reduce_prompt: Optional[str] = None
+) -> str:
+    """
+    Возвращает markdown-обзор целиком; части анализируются параллельно.
+
+    Для нескольких частей нужен ``reduce_prompt`` (``build_reduce_prompt``).
+    """
+    if len(prompts) == 1:
+        return await invoke_gigachat_with_system_prompt(
+            llm=llm,
+            user_message=prompts[0],
+            system_prompt=settings.system_prompt,
+        )
+
+    user_message = _require_reduce_prompt(reduce_prompt)
+    tasks = _start_map(llm, prompts, concurrency)
+    try:
+        partials = list(await asyncio.gather(*tasks))
+    finally:
+        await _cancel(tasks)
+
+    summary = await invoke_gigachat_with_system_prompt(
+        llm=llm,
+        user_message=user_message,
+        system_prompt=settings.reduce_system_prompt,
+    )
+    return "\n\n".join([*partials, summary])
+
+
+async def stream_analysis(
+    llm: GigaChat, prompts: Sequence[str], concurrency: int, reduce_prompt: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Потоковый вариант ``run_analysis``.
+
+    Обзоры частей отдаются по порядку сразу после готовности (сами части считаются
+    параллельно), затем потоково генерируется резюме по портфелю.
+    """
+    if len(prompts) == 1:
+        chunks = stream_gigachat_with_system_prompt(
+            llm=llm,
+            user_message=prompts[0],
+            system_prompt=settings.system_prompt,
+        )
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    user_message = _require_reduce_prompt(reduce_prompt)
+    tasks = _start_map(llm, prompts, concurrency)
+    try:
+        for task in tasks:
+            yield await task + "\n\n"
+
+        summary_chunks = stream_gigachat_with_system_prompt(
+            llm=llm,
+            user_message=user_message,
+            system_prompt=settings.reduce_system_prompt,
+        )
+        async for chunk in summary_chunks:
+            yield chunk
+    finally:
+        await _cancel(tasks)
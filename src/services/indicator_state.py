@@ -0,0 +1,272 @@
+import copy
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.core.candles import NANO, CandleSeries, nano_to_float
+from src.services.trading import TrendJson, build_trend_json
+
+_SMA_PERIODS = (20, 50, 200)
+_RSI_PERIOD = 14
+_VOLUME_PERIOD = 20
+_RECENT_LEVELS = 3
+
+
+class _Ring:
+    """Кольцевой буфер фиксированной емкости с O(1) доступом с конца."""
+
+    __slots__ = ("_items", "_start", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        self._items: List[int] = [0] * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value: int) -> None:
+        capacity = len(self._items)
+        if self._size < capacity:
+            self._items[(self._start + self._size) % capacity] = value
+            self._size += 1
+        else:
+            self._items[self._start] = value
+            self._start = (self._start + 1) % capacity
+
+    def back(self, offset: int) -> int:
+        """Элемент на ``offset`` позиций от конца (1 — последний)."""
+        return self._items[(self._start + self._size - offset) % len(self._items)]
+
+
+class _MonotonicWindow:
+    """Скользящий минимум (или максимум) окна фиксированной длины на монотонной деке."""
+
+    __slots__ = ("size", "_is_min", "_items")
+
+    def __init__(self, size: int, is_min: bool) -> None:
+        self.size = size
+        self._is_min = is_min
+        self._items: Deque[Tuple[int, int]] = deque()
+
+    def push(self, index: int, value: int) -> None:
+        items = self._items
+        if self._is_min:
+            while items and items[-1][1] >= value:
+                items.pop()
+        else:
+            while items and items[-1][1] <= value:
+                items.pop()
+        items.append((index, value))
+        while items[0][0] <= index - self.size:
+            items.popleft()
+
+    @property
+    def extreme(self) -> int:
+        return self._items[0][1]
+
+
+class IndicatorState:
+    """
+    Инкрементальное состояние индикаторов одного инструмента (figi, interval).
+
+    Хранит скользящие суммы для SMA20/50/200 и среднего объема за 20 свечей, суммы
+    роста/падения за последние 14 изменений для RSI и монотонные деки для поиска
+    уровней. Добавление закрытой свечи обновляет состояние за амортизированное O(1),
+    ``snapshot`` возвращает TrendJson той же формы, что и ``analyse_stock_trends``.
+
+    RSI считается так же, как в ``analyse_stock_trends`` (простое среднее за период),
+    а не сглаживанием Уайлдера, чтобы онлайн- и пакетный расчет совпадали. Суммы
+    ведутся в целых нано-единицах без накопления ошибки округления.
+
+    Незакрытая свеча хранится отдельно и при каждом обновлении заменяется; в
+    состояние она попадает, когда приходит свеча с более поздним временем или
+    та же свеча с признаком закрытия.
+    """
+
+    __slots__ = (
+        "levels_window",
+        "count",
+        "last_time",
+        "_closes",
+        "_volumes",
+        "_close_sums",
+        "_volume_sum",
+        "_gains",
+        "_losses",
+        "_min_window",
+        "_max_window",
+        "_supports",
+        "_resistances",
+        "_pending",
+    )
+
+    def __init__(self, levels_window: int = 5) -> None:
+        self.levels_window = levels_window
+        self.count = 0
+        self.last_time: Optional[int] = None
+        self._closes = _Ring(max(max(_SMA_PERIODS), _RSI_PERIOD + 1, 2 * levels_window + 1))
+        self._volumes = _Ring(_VOLUME_PERIOD)
+        self._close_sums: Dict[int, int] = {period: 0 for period in _SMA_PERIODS}
+        self._volume_sum = 0
+        self._gains = 0
+        self._losses = 0
+        self._min_window = _MonotonicWindow(2 * levels_window + 1, is_min=True)
+        self._max_window = _MonotonicWindow(2 * levels_window + 1, is_min=False)
+        self._supports: Deque[int] = deque(maxlen=_RECENT_LEVELS)
+        self._resistances: Deque[int] = deque(maxlen=_RECENT_LEVELS)
+        self._pending: Optional[Tuple[int, int, int]] = None
+
+    @classmethod
+    def from_series(cls, series: CandleSeries, levels_window: int = 5) -> "IndicatorState":
+        state = cls(levels_window=levels_window)
+        state.update_series(series)
+        return state
+
+    def update_series(self, series: CandleSeries) -> int:
+        """Применяет свечи ряда, которые новее уже учтенных; возвращает их число."""
+        start = 0
+        if self.last_time is not None:
+            start = int(series.time.searchsorted(self.last_time, side="left"))
+        for idx in range(start, len(series)):
+            self.update(
+                time=int(series.time[idx]),
+                close=int(series.close[idx]),
+                volume=int(series.volume[idx]),
+                is_complete=bool(series.is_complete[idx]),
+            )
+        return len(series) - start
+
+    def update(self, *, time: int, close: int, volume: int, is_complete: bool = True) -> None:
+        """Учитывает свечу; ``close`` — цена закрытия в нано-единицах."""
+        if self.last_time is not None:
+            # Более старые свечи и повтор уже закрытой свечи не меняют состояние
+            if time < self.last_time or (time == self.last_time and self._pending is None):
+                return
+
+        if self._pending is not None and self._pending[0] != time:
+            _, pending_close, pending_volume = self._pending
+            self._commit(pending_close, pending_volume)
+        self._pending = None
+        self.last_time = time
+
+        if is_complete:
+            self._commit(close, volume)
+        else:
+            self._pending = (time, close, volume)
+
+    def _commit(self, close: int, volume: int) -> None:
+        index = self.count
+        closes = self._closes
+
+        for period in _SMA_PERIODS:
+            self._close_sums[period] += close
+            if index >= period:
+                self._close_sums[period] -= closes.back(period)
+
+        if index >= 1:
+            self._add_change(close - closes.back(1), 1)
+        if index >= _RSI_PERIOD + 1:
+            leaving = closes.back(_RSI_PERIOD) - closes.back(_RSI_PERIOD + 1)
+            self._add_change(leaving, -1)
+
+        self._volume_sum += volume
+        if index >= _VOLUME_PERIOD:
+            self._volume_sum -= self._volumes.back(_VOLUME_PERIOD)
+
+        closes.append(close)
+        self._volumes.append(volume)
+        self.count += 1
+
+        window = self.levels_window
+        if window <= 0:
+            return
+        self._min_window.push(index, close)
+        self._max_window.push(index, close)
+        if index >= 2 * window:
+            center = closes.back(window + 1)
+            if center <= self._min_window.extreme:
+                self._supports.append(center)
+            if center >= self._max_window.extreme:
+                self._resistances.append(center)
+
+    def _add_change(self, change: int, sign: int) -> None:
+        if change > 0:
+            self._gains += sign * change
+        else:
+            self._losses += sign * -change
+
+    def snapshot(self) -> TrendJson:
+        """Текущий теханализ с учетом незакрытой свечи."""
+        if self._pending is not None:
+            state = copy.copy(self)
+            for name in ("_closes", "_volumes", "_close_sums", "_min_window", "_max_window"):
+                setattr(state, name, copy.deepcopy(getattr(self, name)))
+            state._supports = deque(self._supports, maxlen=_RECENT_LEVELS)
+            state._resistances = deque(self._resistances, maxlen=_RECENT_LEVELS)
+            state._pending = None
+            _, close, volume = self._pending
+            state._commit(close, volume)
+            return state.snapshot()
+
+        if not self.count:
+            return {"error": "No stock data available"}
+
+        def _sma(period: int) -> Optional[float]:
+            if self.count < period:
+                return None
+            return self._close_sums[period] / (period * NANO)
+
+        rsi_value: Optional[float] = None
+        if self.count >= _RSI_PERIOD + 1:
+            rsi_value = (
+                100.0 if self._losses == 0 else 100 - (100 / (1 + self._gains / self._losses))
+            )
+
+        return build_trend_json(
+            current_price=nano_to_float(self._closes.back(1)),
+            sma20=_sma(20),
+            sma50=_sma(50),
+            sma200=_sma(200),
+            rsi_value=rsi_value,
+            current_volume=self._volumes.back(1),
+            avg_volume20=(
+                self._volume_sum / _VOLUME_PERIOD if self.count >= _VOLUME_PERIOD else None
+            ),
+            support_prices=[nano_to_float(price) for price in self._supports],
+            resistance_prices=[nano_to_float(price) for price in self._resistances],
+        )
+
+
+class IndicatorRegistry:
+    """Состояния индикаторов по ключу (figi, interval)."""
+
+    def __init__(self, levels_window: int = 5) -> None:
+        self.levels_window = levels_window
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get(self, figi: str, interval: str) -> Optional[IndicatorState]:
+        return self._states.get((figi, interval))
+
+    def update(self, figi: str, interval: str, series: CandleSeries) -> TrendJson:
+        """
+        Дописывает в состояние новые свечи ряда и возвращает актуальный теханализ.
+
+        Если ряд начинается позже последней учтенной свечи (пропущены свечи между
+        расчетами), состояние строится заново по ряду.
+        """
+        state = self._states.get((figi, interval))
+        if (
+            state is not None
+            and state.last_time is not None
+            and len(series)
+            and int(series.time[0]) > state.last_time
+        ):
+            state = None
+        if state is None:
+            state = IndicatorState(levels_window=self.levels_window)
+            self._states[(figi, interval)] = state
+        state.update_series(series)
+        return state.snapshot()
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from src.core.cache import TTLCache
+from src.core.singleflight import SingleFlight
+from src.integrations.figi_index import FigiIndex
+from src.integrations.tinkoff import TinkoffClient
+from src.schemas.stocks import ShareItem, StockFilters
+
+logger = logging.getLogger("logger")
+
+# Поля, по которым строятся hash-индексы каталога
+INDEXED_FIELDS = ("classCode", "countryOfRisk", "exchange", "sector")
+
+DEFAULT_SOURCE = ("INSTRUMENT_STATUS_BASE", "INSTRUMENT_EXCHANGE_UNSPECIFIED")
+
+SourceKey = Tuple[str, str]
+FilterKey = Tuple[Optional[str], ...]
+RenderedResponse = Tuple[bytes, str]
+
+
+def _index_value(value: Any) -> str:
+    # Та же нормализация, что и в фильтрах TinkoffClient.list_shares
+    return str(value).lower()
+
+
+class CatalogSnapshot:
+    """
+    Неизменяемый срез каталога для одного запроса Shares.
+
+    Хранит провалидированные ``ShareItem``, их заранее сериализованный JSON и
+    hash-индексы значение→позиции по полям из ``INDEXED_FIELDS``.
+    """
+
+    def __init__(self, instruments: Sequence[Dict[str, Any]]) -> None:
+        items: List[ShareItem] = []
+        for instrument in instruments:
+            try:
+                items.append(ShareItem(**instrument))
+            except ValidationError as exc:
+                logger.warning("Skipping invalid instrument %s: %s", instrument.get("figi"), exc)
+
+        self.items = items
+        self.loaded_at = time.monotonic()
+        self._json = [item.model_dump_json().encode("utf-8") for item in items]
+        self._indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for position, item in enumerate(items):
+            for field in INDEXED_FIELDS:
+                value = _index_value(getattr(item, field))
+                self._indexes[field].setdefault(value, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def select(self, criteria: Dict[str, Optional[str]]) -> List[int]:
+        """Позиции инструментов, у которых все заданные поля совпадают без учета регистра."""
+        postings = [
+            self._indexes[field].get(_index_value(expected), [])
+            for field, expected in criteria.items()
+            if expected is not None
+        ]
+        if not postings:
+            return list(range(len(self.items)))
+
+        postings.sort(key=len)
+        selected = postings[0]
+        for other in postings[1:]:
+            allowed = set(other)
+            selected = [position for position in selected if position in allowed]
+        return selected
+
+    def render(self, positions: Sequence[int]) -> bytes:
+        """Тело ответа ``StocksResponse`` из заранее сериализованных элементов."""
+        return b'{"items":[' + b",".join(self._json[pos] for pos in positions) + b"]}"
+
+
+class InstrumentCatalog:
+    """
+    Каталог акций в памяти для ``GET /stocks``.
+
+    Shares загружается один раз на источник (instrument_status, instrument_exchange)
+    и обновляется по расписанию через ``refresh``. Готовые тела ответов и ETag
+    кешируются по комбинации фильтров до следующего обновления, поэтому повторный
+    запрос не обращается к API и ничего не сериализует. Одновременные загрузки
+    одного источника объединяются. Хранится не больше ``max_sources`` источников:
+    при переполнении вытесняется давно не запрошенный (кроме основного).
+    """
+
+    def __init__(
+        self,
+        client: TinkoffClient,
+        ttl_seconds: float,
+        figi_index: Optional[FigiIndex] = None,
+        max_rendered: int = 256,
+        max_sources: int = 8,
+    ) -> None:
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+        self._figi_index = figi_index
+        self.max_sources = max(max_sources, 1)
+        self._snapshots: "OrderedDict[SourceKey, CatalogSnapshot]" = OrderedDict()
+        self._rendered: TTLCache[RenderedResponse] = TTLCache(
+            max_entries=max_rendered, ttl_seconds=ttl_seconds
+        )
+        self._loads: SingleFlight[CatalogSnapshot] = SingleFlight()
+
+    async def _load(self, source: SourceKey) -> CatalogSnapshot:
+        instrument_status, instrument_exchange = source
+        instruments = await self._client.fetch_shares(
+            instrument_status=instrument_status,
+            instrument_exchange=instrument_exchange,
+        )
+        snapshot = CatalogSnapshot(instruments)
+        self._snapshots[source] = snapshot
+        self._snapshots.move_to_end(source)
+        self._evict_sources()
+        self._rendered.clear()
+        if source == DEFAULT_SOURCE and self._figi_index is not None:
+            self._figi_index.load(instruments)
+        logger.info(
+            "Instrument catalog loaded: %s shares for status=%s exchange=%s",
+            len(snapshot),
+            instrument_status,
+            instrument_exchange,
+        )
+        return snapshot
+
+    def _evict_sources(self) -> None:
+        while len(self._snapshots) > self.max_sources:
+            oldest = next(source for source in self._snapshots if source != DEFAULT_SOURCE)
+            del self._snapshots[oldest]
+
+    async def refresh(self) -> None:
+        """Перезагружает все известные источники (и индекс FIGI вместе с основным)."""
+        for source in list(self._snapshots) or [DEFAULT_SOURCE]:
+            await self._loads.do(source, partial(self._load, source))
+
+    async def snapshot(self, source: SourceKey = DEFAULT_SOURCE) -> CatalogSnapshot:
+        snapshot = self._snapshots.get(source)
+        if snapshot is not None:
+            self._snapshots.move_to_end(source)
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+            snapshot = await self._loads.do(source, partial(self._load, source))
+        return snapshot
+
+    async def render(self, filters: StockFilters) -> RenderedResponse:
+        """Возвращает тело ответа ``/stocks`` и его ETag для набора фильтров."""
+        source = (filters.instrument_status, filters.instrument_exchange)
+        snapshot = await self.snapshot(source)
+        criteria = {
+            "classCode": filters.class_code,
+            "countryOfRisk": filters.country_of_risk,
+            "exchange": filters.exchange,
+            "sector": filters.sector,
+        }
+        key: FilterKey = (*source, *criteria.values())
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            body = snapshot.render(snapshot.select(criteria))
+            rendered = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+            self._rendered.set(key, rendered)
+        return rendered
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from src.core.cache import DiskCache, TTLCache, hash_key
+from src.core.cache_backends import TieredCache
+from src.core.singleflight import SingleFlight, StreamFlight
+
+logger = logging.getLogger("logger")
+
+
+class LLMResponseCache:
+    """
+    Кеш ответов LLM с адресацией по содержимому запроса.
+
+    Ключ — sha256 от (системный промпт, пользовательский промпт, модель, температура).
+    Первый уровень — in-memory LRU с TTL, затем (опционально) общий кеш воркеров
+    ``shared`` и файлы на диске; файлы читаются и пишутся в потоке, вне event loop.
+    Одновременные запросы с одинаковым ключом объединяются: в полете всегда не
+    больше одного вызова модели на ключ, в том числе для потоковых ответов.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        disk_dir: Optional[Path] = None,
+        shared: Optional[TieredCache] = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._memory: TTLCache[str] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._shared = shared
+        self._disk = DiskCache(disk_dir, ttl_seconds=ttl_seconds) if disk_dir else None
+        self._flights: SingleFlight[str] = SingleFlight()
+        self._streams: StreamFlight[str] = StreamFlight()
+
+    @staticmethod
+    def make_key(*, system_prompt: str, user_prompt: str, model: str, temperature: float) -> str:
+        return hash_key(system_prompt, user_prompt, model, temperature)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+        if self._shared is not None:
+            data = await self._shared.get(key)
+            if data is not None:
+                value = data.decode("utf-8")
+                self._memory.set(key, value)
+                return value
+        if self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if isinstance(value, str):
+                self._memory.set(key, value)
+                return value
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self._memory.set(key, value)
+        if self._shared is not None:
+            await self._shared.set(key, value.encode("utf-8"), self.ttl_seconds)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, value)
+            except OSError as exc:
+                logger.warning("Failed to write LLM response to disk cache: %s", exc)
+
+    async def get_or_call(self, key: str, func: Callable[[], Awaitable[str]]) -> str:
+        """Возвращает ответ из кеша или вызывает ``func`` (один раз на ключ) и кеширует его."""
+        cached = await self.get(key)
+        if cached is not None:
+            logger.info("LLM response cache hit: %s", key[:12])
+            return cached
+
+        streaming = self._streams.get(key)
+        if streaming is not None:
+            # Тот же ответ уже генерируется потоково: дожидаемся его целиком
+            return "".join([chunk async for chunk in streaming])
+
+        async def _call() -> str:
+            cached_value = await self.get(key)
+            if cached_value is not None:
+                return cached_value
+            value = await func()
+            await self.set(key, value)
+            return value
+
+        return await self._flights.do(key, _call)
+
+    async def stream_or_call(
+        self, key: str, func: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый вариант ``get_or_call``.
+
+        Ответ из кеша отдается одним фрагментом. Иначе одновременные запросы с
+        одинаковым ключом читают один общий поток ``func`` (каждый — с начала);
+        полностью сгенерированный ответ кешируется. Если тот же ответ уже
+        запрашивается непотоково, он дожидается и отдается целиком.
+        """
+        cached = await self.get(key)
+        if cached is None and key in self._flights:
+            cached = await self.get_or_call(key, lambda: _join(func()))
+        if cached is not None:
+            yield cached
+            return
+
+        async def _generate() -> AsyncIterator[str]:
+            parts = []
+            async for chunk in func():
+                parts.append(chunk)
+                yield chunk
+            await self.set(key, "".join(parts))
+
+        async for chunk in self._streams.stream(key, _generate):
+            yield chunk
+
+
+async def _join(chunks: AsyncIterator[str]) -> str:
+    return "".join([chunk async for chunk in chunks])
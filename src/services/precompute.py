@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.core.intervals import INTERVAL_SECONDS, next_candle_start
+from src.integrations.tinkoff import TinkoffClient
+from src.schemas.trends import TrendResult, TrendsRequest
+from src.services.indicator_state import IndicatorRegistry
+from src.services.instrument_catalog import InstrumentCatalog
+from src.services.trends import collect_trends, iter_trends
+
+logger = logging.getLogger("logger")
+
+# Тикер watchlist, означающий все акции каталога с нужным classCode
+ALL_SHARES = "*"
+
+TableKey = Tuple[str, str]
+# Время расчета (Unix time) и результат
+TableEntry = Tuple[float, TrendResult]
+
+
+class TrendPrecomputer:
+    """
+    Фоновый предрасчет теханализа для watchlist.
+
+    Для каждого интервала из ``intervals`` после закрытия очередной свечи (с задержкой
+    ``delay_seconds``, чтобы свеча успела появиться в API) загружаются новые свечи и
+    считается теханализ по всем тикерам watchlist. Последний успешный ``TrendResult``
+    хранится по ключу (ticker, interval) вместе со временем расчета. Запросы
+    ``/trends`` с теми же classCode, days и levelsWindow получают результаты из этой
+    таблицы, остальные тикеры считаются как обычно. Результат старше одного интервала
+    плюс ``delay_seconds`` (обновление не удалось) не отдается: тикер считается заново.
+
+    Индикаторы ведутся инкрементально в ``indicators``: после закрытия свечи в
+    состояние инструмента дописываются только новые свечи. Состояние копит историю
+    с первого расчета, поэтому SMA200 появляется и тогда, когда окно ``days``
+    короче 200 свечей.
+    """
+
+    def __init__(
+        self,
+        client: TinkoffClient,
+        *,
+        tickers: Sequence[str],
+        class_code: str,
+        intervals: Sequence[str],
+        days: int,
+        levels_window: int = 5,
+        delay_seconds: float = 5.0,
+        catalog: Optional[InstrumentCatalog] = None,
+    ) -> None:
+        for interval in intervals:
+            # Проверяем интервал сразу, а не в фоновой задаче
+            next_candle_start(interval, 0)
+        if ALL_SHARES in tickers and catalog is None:
+            raise ValueError("Instrument catalog is required for the '*' watchlist")
+
+        self._client = client
+        self._catalog = catalog
+        self.tickers = list(tickers)
+        self.class_code = class_code
+        self.intervals = list(intervals)
+        self.days = days
+        self.levels_window = levels_window
+        self.delay_seconds = delay_seconds
+        self._table: Dict[TableKey, TableEntry] = {}
+        self.indicators = IndicatorRegistry(levels_window=levels_window)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    async def _watchlist(self) -> List[str]:
+        if ALL_SHARES not in self.tickers or self._catalog is None:
+            return self.tickers
+        snapshot = await self._catalog.snapshot()
+        class_code = self.class_code.upper()
+        return [
+            item.ticker
+            for item in snapshot.items
+            if item.ticker and (item.classCode or "").upper() == class_code
+        ]
+
+    async def refresh(self, interval: str) -> int:
+        """Пересчитывает watchlist по интервалу; возвращает число обновленных тикеров."""
+        started = time.perf_counter()
+        payload = TrendsRequest(
+            tickers=await self._watchlist(),
+            classCode=self.class_code,
+            days=self.days,
+            interval=interval,
+            levelsWindow=self.levels_window,
+        )
+        updated = 0
+        async for _, result in iter_trends(self._client, payload, indicators=self.indicators):
+            # Ошибку по тикеру не записываем: остается предыдущий успешный результат
+            if result.ticker and "error" not in result.analysis:
+                self._table[(result.ticker.upper(), interval)] = (time.time(), result)
+                updated += 1
+        logger.info(
+            "Precomputed trends for %s/%s tickers interval=%s in %.2fs",
+            updated,
+            len(payload.tickers),
+            interval,
+            time.perf_counter() - started,
+        )
+        return updated
+
+    def seconds_until_next_close(self, interval: str, now: Optional[float] = None) -> float:
+        current = time.time() if now is None else now
+        return next_candle_start(interval, int(current)) - current + self.delay_seconds
+
+    async def run(self, interval: str) -> None:
+        """Бесконечно пересчитывает интервал после закрытия каждой свечи."""
+        while True:
+            try:
+                await self.refresh(interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("Trend precompute for %s failed: %s", interval, exc, exc_info=True)
+            await asyncio.sleep(self.seconds_until_next_close(interval))
+
+    def lookup(self, payload: TrendsRequest, now: Optional[float] = None) -> Dict[int, TrendResult]:
+        """
+        Предрасчитанные результаты по индексам тикеров запроса (если параметры совпадают).
+
+        Устаревшие результаты пропускаются.
+        """
+        if (
+            payload.class_code.upper() != self.class_code.upper()
+            or payload.days != self.days
+            or payload.levels_window != self.levels_window
+        ):
+            return {}
+        current = time.time() if now is None else now
+        found: Dict[int, TrendResult] = {}
+        for index, ticker in enumerate(payload.tickers):
+            entry = self._table.get((ticker.upper(), payload.interval))
+            if entry is None:
+                continue
+            computed_at, result = entry
+            if current - computed_at > INTERVAL_SECONDS[payload.interval] + self.delay_seconds:
+                continue
+            found[index] = result.model_copy(update={"ticker": ticker})
+        return found
+
+    async def collect(self, client: TinkoffClient, payload: TrendsRequest) -> List[TrendResult]:
+        """Как ``collect_trends``, но тикеры из таблицы не пересчитываются."""
+        found = self.lookup(payload)
+        missing = [idx for idx in range(len(payload.tickers)) if idx not in found]
+        if missing:
+            computed = await collect_trends(
+                client,
+                payload.model_copy(update={"tickers": [payload.tickers[idx] for idx in missing]}),
+            )
+            found.update(zip(missing, computed))
+        logger.debug(
+            "Served %s of %s tickers from precomputed table",
+            len(payload.tickers) - len(missing),
+            len(payload.tickers),
+        )
+        return [found[idx] for idx in sorted(found)]
@@ -0,0 +1,134 @@
+import csv
+import io
+import logging
+import math
+import re
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from gigachat import GigaChat
+
+from src.schemas.trends import TrendResult
+
+logger = logging.getLogger("logger")
+
+# Колонки таблицы названы так же, как поля TrendJson в системном промпте
+TREND_COLUMNS: Tuple[Tuple[str, Callable[[TrendResult], Any]], ...] = (
+    ("ticker", lambda result: result.ticker),
+    ("current_price", lambda result: result.analysis.get("current_price")),
+    ("sma20", lambda result: result.analysis.get("moving_averages", {}).get("sma20")),
+    ("sma50", lambda result: result.analysis.get("moving_averages", {}).get("sma50")),
+    ("sma200", lambda result: result.analysis.get("moving_averages", {}).get("sma200")),
+    ("rsi", lambda result: result.analysis.get("rsi")),
+    ("rsi_signal", lambda result: result.analysis.get("rsi_signal")),
+    ("volume_current", lambda result: result.analysis.get("volume_trend", {}).get("current")),
+    (
+        "volume_average20_day",
+        lambda result: result.analysis.get("volume_trend", {}).get("average20_day"),
+    ),
+    (
+        "volume_percent_change",
+        lambda result: result.analysis.get("volume_trend", {}).get("percent_change"),
+    ),
+    ("volume_signal", lambda result: result.analysis.get("volume_trend", {}).get("signal")),
+    ("support_levels", lambda result: result.analysis.get("support_levels")),
+    ("resistance_levels", lambda result: result.analysis.get("resistance_levels")),
+    ("overall_trend", lambda result: result.analysis.get("overall_trend")),
+    ("error", lambda result: result.analysis.get("error")),
+)
+
+_TOKEN_PATTERN = re.compile(r"\d+|[^\W\d_]+|\S")
+
+
+class PromptTooLargeError(ValueError):
+    """Промпт не укладывается в бюджет токенов."""
+
+    def __init__(self, tokens: int, budget: int) -> None:
+        super().__init__(f"Prompt is too large: ~{tokens} tokens exceeds budget of {budget}")
+        self.tokens = tokens
+        self.budget = budget
+
+
+def _format_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "/".join(_format_cell(item) for item in value)
+    return str(value)
+
+
+def encode_trends_table(
+    results: Sequence[TrendResult], column_names: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Компактное табличное представление теханализа для промпта.
+
+    CSV с разделителем ``;``: строка заголовков и по строке на тикер. В таблицу
+    попадают только поля, которые использует системный промпт (без figi и времени
+    расчета), или только ``column_names``; списки уровней объединяются через ``/``,
+    пустая ячейка — нет данных. Пустая колонка ``error`` отбрасывается целиком.
+    """
+    columns = [
+        (name, getter)
+        for name, getter in TREND_COLUMNS
+        if (column_names is None or name in column_names)
+        and (name != "error" or any(getter(result) for result in results))
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";", lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    for result in results:
+        writer.writerow([_format_cell(getter(result)) for _, getter in columns])
+    return buffer.getvalue()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценка числа токенов без обращения к API.
+
+    Текст режется на слова, группы цифр и знаки препинания; длинные слова считаются
+    как несколько токенов (по 4 буквы), числа — по 3 цифры. Для русского текста
+    и таблиц с числами оценка обычно не ниже реального счета BPE-токенизатора.
+    """
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        tokens += math.ceil(len(piece) / (3 if piece[0].isdigit() else 4))
+    return tokens
+
+
+async def count_prompt_tokens(
+    llm: Optional[GigaChat], texts: List[str], model: Optional[str] = None
+) -> int:
+    """Считает токены токенизатором GigaChat, при недоступности API — оценкой."""
+    if llm is not None:
+        try:
+            counts = await llm.atokens_count(texts, model=model)
+            return sum(count.tokens for count in counts)
+        except Exception as exc:
+            logger.warning("Failed to count prompt tokens via GigaChat API: %s", exc)
+    return sum(estimate_tokens(text) for text in texts)
+
+
+async def ensure_prompt_fits(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    budget: int,
+    llm: Optional[GigaChat] = None,
+    model: Optional[str] = None,
+) -> int:
+    """
+    Возвращает число токенов промпта или бросает ``PromptTooLargeError``.
+
+    Если передан ``llm``, используется точный подсчет через API GigaChat.
+    """
+    tokens = await count_prompt_tokens(llm, [system_prompt, user_prompt], model=model)
+    logger.info(
+        "Prompt size: %s tokens (budget %s, user prompt %s chars)",
+        tokens,
+        budget,
+        len(user_prompt),
+    )
+    if tokens > budget:
+        raise PromptTooLargeError(tokens, budget)
+    return tokens
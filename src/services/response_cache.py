@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+from typing import Any, NamedTuple, Optional, Sequence, Tuple
+
+from src.core.cache import TTLCache, hash_key
+from src.core.cache_backends import TieredCache
+from src.core.intervals import candle_start, next_candle_start
+from src.schemas.trends import TrendResult, TrendsRequest
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+    expires_at: float
+
+    @classmethod
+    def build(
+        cls, body: bytes, media_type: str, ttl_seconds: float, validator: Optional[str] = None
+    ) -> "CachedResponse":
+        """
+        ETag — хеш ``validator``, если он передан, иначе хеш тела.
+
+        Для теханализа валидатор — ``trends_validator``: содержимое ответа без времени
+        расчета, поэтому пересчет с теми же данными дает тот же ETag, а новая цена
+        незакрытой свечи — новый.
+        """
+        source = validator.encode("utf-8") if validator is not None else body
+        etag = f'"{hashlib.blake2b(source, digest_size=16).hexdigest()}"'
+        return cls(body, media_type, etag, time.time() + ttl_seconds)
+
+    @property
+    def max_age(self) -> int:
+        return max(int(self.expires_at - time.time()), 0)
+
+    def to_bytes(self) -> bytes:
+        """Заголовок JSON-строкой, затем тело как есть."""
+        header = json.dumps([self.media_type, self.etag, self.expires_at])
+        return header.encode("utf-8") + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        header, _, body = data.partition(b"\n")
+        media_type, etag, expires_at = json.loads(header)
+        return cls(body, media_type, etag, expires_at)
+
+
+def trends_cache_key(
+    route: str,
+    payload: TrendsRequest,
+    *extra: Any,
+    max_ttl_seconds: float,
+    now: Optional[float] = None,
+) -> Tuple[str, float]:
+    """
+    Ключ и время жизни ответа теханализа.
+
+    Ключ — маршрут, параметры запроса и начало текущей свечи интервала: теханализ
+    меняется, когда закрывается очередная свеча. Ответ живет до ее закрытия, но не
+    дольше ``max_ttl_seconds`` — чтобы цена незакрытой свечи в ответе не устаревала
+    надолго на длинных интервалах. Для неизвестного интервала время жизни нулевое.
+    """
+    timestamp = int(time.time() if now is None else now)
+    try:
+        current_start = candle_start(payload.interval, timestamp)
+        ttl = min(
+            float(next_candle_start(payload.interval, timestamp) - timestamp), max_ttl_seconds
+        )
+    except ValueError:
+        current_start, ttl = timestamp, 0.0
+    key = hash_key(route, payload.model_dump(by_alias=True), current_start, *extra)
+    return key, ttl
+
+
+def trends_validator(key: str, results: Sequence[TrendResult]) -> str:
+    """Ключ запроса и результаты теханализа без меняющегося при каждом расчете ``timestamp``."""
+    content = [
+        [
+            result.figi,
+            result.ticker,
+            {name: value for name, value in result.analysis.items() if name != "timestamp"},
+        ]
+        for result in results
+    ]
+    return key + json.dumps(content, sort_keys=True, default=str)
+
+
+class ResponseCache:
+    """
+    Серверный кеш готовых ответов ``/trends`` и ``/trends/ai`` по ключу ``trends_cache_key``.
+
+    Первый уровень — in-memory LRU процесса; если передан ``shared``, ответы также
+    пишутся в общий кеш и читаются из него при промахе, так что воркеры не
+    пересчитывают ответы друг друга.
+    """
+
+    def __init__(
+        self, max_entries: int, max_ttl_seconds: float, shared: Optional[TieredCache] = None
+    ) -> None:
+        self.max_ttl_seconds = max_ttl_seconds
+        self._items: TTLCache[CachedResponse] = TTLCache(
+            max_entries=max_entries, ttl_seconds=max_ttl_seconds
+        )
+        self._shared = shared
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        cached = self._items.get(key)
+        if cached is not None or self._shared is None:
+            return cached
+        data = await self._shared.get(key)
+        if data is None:
+            return None
+        cached = CachedResponse.from_bytes(data)
+        self._items.set(key, cached, ttl_seconds=max(cached.expires_at - time.time(), 0))
+        return cached
+
+    async def set(self, key: str, response: CachedResponse, ttl_seconds: float) -> None:
+        if ttl_seconds > 0:
+            self._items.set(key, response, ttl_seconds=ttl_seconds)
+            if self._shared is not None:
+                await self._shared.set(key, response.to_bytes(), ttl_seconds)
@@ -0,0 +1,435 @@
+import asyncio
+import logging
+import operator
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.candles import NANO, CandleSeries
+from src.core.intervals import next_candle_start
+from src.core.singleflight import SingleFlight
+from src.core.tasks import cancel_tasks
+from src.integrations.tinkoff import TinkoffClient
+from src.schemas.screener import ScreenerQuery, ScreenerResponse, ScreenerRow
+from src.schemas.stocks import ShareItem
+from src.services.instrument_catalog import InstrumentCatalog
+from src.settings import settings
+
+logger = logging.getLogger("logger")
+
+FloatArray = npt.NDArray[np.float64]
+Int64Array = npt.NDArray[np.int64]
+Columns = Dict[str, npt.NDArray[Any]]
+# (classCode, interval, days)
+TableKey = Tuple[str, str, int]
+
+_SMA_PERIODS = (20, 50, 200)
+_RSI_PERIOD = 14
+_VOLUME_PERIOD = 20
+# Ширина окна: столько последних свечей нужно для самого длинного индикатора
+WINDOW = max(max(_SMA_PERIODS), _RSI_PERIOD + 1, _VOLUME_PERIOD)
+
+NUMERIC_FIELDS = (
+    "price",
+    "sma20",
+    "sma50",
+    "sma200",
+    "rsi",
+    "volume",
+    "avg_volume20",
+    "volume_change",
+)
+CATEGORY_FIELDS = ("trend", "rsi_signal", "ticker")
+
+_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+_CONDITION = re.compile(r"^\s*([a-z_0-9]+)\s*(<=|>=|==|!=|=|<|>)\s*(\S.*?)\s*$", re.IGNORECASE)
+
+
+class Condition(NamedTuple):
+    field: str
+    op: str
+    value: Any  # число, имя другого поля или строка для категорий
+
+
+def stack_series(series: Sequence[CandleSeries], window: int = WINDOW) -> Tuple[
+    Int64Array,
+    Int64Array,
+    Int64Array,
+]:
+    """
+    Складывает последние ``window`` свечей каждого ряда в матрицы n×window.
+
+    Ряды выравниваются по правому краю (последняя свеча — последний столбец), короткие
+    дополняются нулями слева. Возвращает (closes, volumes, lengths); цены — в нано-единицах.
+    """
+    closes = np.zeros((len(series), window), dtype=np.int64)
+    volumes = np.zeros((len(series), window), dtype=np.int64)
+    lengths = np.zeros(len(series), dtype=np.int64)
+    for row, item in enumerate(series):
+        size = min(len(item), window)
+        if size:
+            closes[row, window - size :] = item.close[-size:]
+            volumes[row, window - size :] = item.volume[-size:]
+        lengths[row] = size
+    return closes, volumes, lengths
+
+
+def _window_mean(values: Int64Array, lengths: Int64Array, period: int, scale: int) -> FloatArray:
+    # Суммы считаются в целых числах, поэтому результат не зависит от порядка сложения
+    sums = values[:, values.shape[1] - period :].sum(axis=1)
+    return np.where(lengths >= period, sums / (period * scale), np.nan)
+
+
+def _rsi(closes: Int64Array, lengths: Int64Array) -> FloatArray:
+    changes = np.diff(closes[:, closes.shape[1] - _RSI_PERIOD - 1 :], axis=1)
+    gains = np.where(changes > 0, changes, 0).sum(axis=1)
+    losses = np.where(changes > 0, 0, -changes).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+    return np.where(lengths >= _RSI_PERIOD + 1, rsi, np.nan)
+
+
+def compute_indicators(series: Sequence[CandleSeries]) -> Columns:
+    """
+    Индикаторы ``analyse_stock_trends`` сразу для всех рядов, по столбцам.
+
+    SMA20/50/200, RSI14 (простое среднее за период), средний объем за 20 свечей и
+    сигналы считаются векторно по матрицам из ``stack_series``. Значение, для которого
+    не хватает свечей, — NaN. Уровни поддержки и сопротивления скринер не считает.
+    """
+    closes, volumes, lengths = stack_series(series)
+    last_close = closes[:, -1]
+    units = np.where(last_close < 0, -(-last_close // NANO), last_close // NANO)
+    price = units.astype(np.float64) + (last_close - units * NANO).astype(np.float64) / NANO
+    price = np.where(lengths > 0, price, np.nan)
+
+    columns: Columns = {"price": price}
+    for period in _SMA_PERIODS:
+        columns[f"sma{period}"] = _window_mean(closes, lengths, period, NANO)
+    columns["rsi"] = _rsi(closes, lengths)
+    columns["volume"] = volumes[:, -1]
+    avg_volume = _window_mean(volumes, lengths, _VOLUME_PERIOD, 1)
+    columns["avg_volume20"] = avg_volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["volume_change"] = np.where(
+            avg_volume > 0, (volumes[:, -1] - avg_volume) / avg_volume * 100, np.nan
+        )
+
+    sma20, sma50, rsi = columns["sma20"], columns["sma50"], columns["rsi"]
+    columns["trend"] = np.select(
+        [(price > sma20) & (sma20 > sma50), (price < sma20) & (sma20 < sma50)],
+        ["Bullish", "Bearish"],
+        "Neutral",
+    )
+    columns["rsi_signal"] = np.select([rsi > 70, rsi < 30], ["Overbought", "Oversold"], "Neutral")
+    return columns
+
+
+def _parse_value(field: str, raw: str) -> Any:
+    name = raw.lower()
+    if field in CATEGORY_FIELDS:
+        if name in CATEGORY_FIELDS:
+            return name
+        return raw.strip("'\"")
+    if name in NUMERIC_FIELDS:
+        return name
+    try:
+        return float(raw)
+    except ValueError:
+        raise ValueError(f"Invalid value '{raw}' for field '{field}'") from None
+
+
+def parse_filter(expression: Optional[str]) -> List[Condition]:
+    """
+    Разбирает фильтр вида ``rsi<30,price>sma50,trend=Bullish``.
+
+    Условия через запятую объединяются по И. Справа от оператора — число, имя другого
+    поля или значение категории (trend, rsi_signal, ticker). Ошибка разбора — ValueError.
+    """
+    conditions: List[Condition] = []
+    for part in (expression or "").split(","):
+        if not part.strip():
+            continue
+        match = _CONDITION.match(part)
+        if match is None:
+            raise ValueError(f"Invalid filter condition: '{part.strip()}'")
+        field, op, raw = match.group(1).lower(), match.group(2), match.group(3)
+        if field not in NUMERIC_FIELDS and field not in CATEGORY_FIELDS:
+            raise ValueError(f"Unknown filter field: '{field}'")
+        if field in CATEGORY_FIELDS and op not in ("=", "==", "!="):
+            raise ValueError(f"Field '{field}' supports only '=' and '!=' comparisons")
+        conditions.append(Condition(field, op, _parse_value(field, raw)))
+    return conditions
+
+
+def apply_filter(columns: Columns, conditions: Sequence[Condition]) -> npt.NDArray[np.bool_]:
+    """Маска строк, для которых выполнены все условия; любое сравнение с NaN ложно."""
+    size = len(columns["price"])
+    mask = np.ones(size, dtype=np.bool_)
+    for field, op, value in conditions:
+        other = columns[value] if isinstance(value, str) and value in columns else value
+        if field in CATEGORY_FIELDS and isinstance(other, str):
+            left = np.char.lower(columns[field].astype(str))
+            other = other.lower()
+        else:
+            left = columns[field]
+        if field in NUMERIC_FIELDS:
+            # NumPy считает NaN != x истинным, поэтому пропуски исключаются явно
+            mask &= ~np.isnan(left.astype(np.float64))
+            mask &= ~np.isnan(np.asarray(other, dtype=np.float64))
+        mask &= np.asarray(_OPERATORS[op](left, other), dtype=np.bool_)
+    return mask
+
+
+def parse_sort(expression: Optional[str]) -> List[Tuple[str, bool]]:
+    """Разбирает сортировку вида ``-rsi,ticker`` в пары (поле, по убыванию)."""
+    keys: List[Tuple[str, bool]] = []
+    for part in (expression or "").split(","):
+        name = part.strip().lower()
+        if not name:
+            continue
+        field = name.lstrip("+-")
+        if field not in NUMERIC_FIELDS and field not in CATEGORY_FIELDS:
+            raise ValueError(f"Unknown sort field: '{field}'")
+        keys.append((field, name.startswith("-")))
+    return keys
+
+
+def sort_positions(
+    columns: Columns, positions: Int64Array, keys: Sequence[Tuple[str, bool]]
+) -> Int64Array:
+    """
+    Упорядочивает позиции по ключам из ``parse_sort``.
+
+    Сортировка устойчивая; строки без значения (NaN) идут в конце при любом направлении.
+    """
+    sort_keys: List[npt.NDArray[Any]] = []
+    for field, descending in keys:
+        values = columns[field][positions]
+        if field in CATEGORY_FIELDS:
+            _, codes = np.unique(np.char.lower(values.astype(str)), return_inverse=True)
+            values, missing = codes.astype(np.float64), np.zeros(len(positions), dtype=np.bool_)
+        else:
+            values = values.astype(np.float64)
+            missing = np.isnan(values)
+        sort_keys.extend([missing, -values if descending else values])
+    if not sort_keys:
+        return positions
+    # lexsort считает главным последний ключ
+    return positions[np.lexsort(sort_keys[::-1])]
+
+
+async def _load_series(
+    client: TinkoffClient, items: Sequence[ShareItem], query: ScreenerQuery
+) -> List[Optional[CandleSeries]]:
+    semaphore = asyncio.Semaphore(settings.trends_concurrency)
+    time_to = datetime.now(timezone.utc)
+    time_from = time_to - timedelta(days=query.days)
+
+    async def _load(item: ShareItem) -> Optional[CandleSeries]:
+        async with semaphore:
+            try:
+                return await client.get_candles(
+                    figi=item.figi, time_from=time_from, time_to=time_to, interval=query.interval
+                )
+            except Exception as exc:
+                logger.warning("Screener failed to load candles for %s: %s", item.figi, exc)
+                return None
+
+    return list(await asyncio.gather(*(_load(item) for item in items)))
+
+
+def _optional(value: Any) -> Optional[float]:
+    number = float(value)
+    return None if np.isnan(number) else number
+
+
+def _build_row(item: ShareItem, columns: Columns, position: int) -> ScreenerRow:
+    return ScreenerRow(
+        figi=item.figi,
+        ticker=item.ticker,
+        name=item.name,
+        price=float(columns["price"][position]),
+        sma20=_optional(columns["sma20"][position]),
+        sma50=_optional(columns["sma50"][position]),
+        sma200=_optional(columns["sma200"][position]),
+        rsi=_optional(columns["rsi"][position]),
+        rsi_signal=str(columns["rsi_signal"][position]),
+        volume=int(columns["volume"][position]),
+        avg_volume20=_optional(columns["avg_volume20"][position]),
+        volume_change=_optional(columns["volume_change"][position]),
+        trend=str(columns["trend"][position]),
+    )
+
+
+class ScreenerTable(NamedTuple):
+    """Столбцы индикаторов по акциям, свечи которых удалось загрузить."""
+
+    items: List[ShareItem]
+    columns: Columns
+    total: int
+    failed: int
+
+
+def screen_table(table: ScreenerTable, query: ScreenerQuery) -> ScreenerResponse:
+    """Фильтрует, сортирует и режет страницу готовой таблицы."""
+    conditions = parse_filter(query.filter)
+    sort_keys = parse_sort(query.sort)
+    columns = table.columns
+    positions = np.flatnonzero(apply_filter(columns, conditions) & ~np.isnan(columns["price"]))
+    ordered = sort_positions(columns, positions.astype(np.int64), sort_keys)
+    page = ordered[query.offset : query.offset + query.limit]
+    return ScreenerResponse(
+        total=table.total,
+        matched=len(ordered),
+        failed=table.failed,
+        offset=query.offset,
+        items=[_build_row(table.items[pos], columns, int(pos)) for pos in page],
+    )
+
+
+def _table(items: Sequence[ShareItem], series: Sequence[CandleSeries], total: int) -> ScreenerTable:
+    columns = compute_indicators(series)
+    columns["ticker"] = np.array([item.ticker or "" for item in items], dtype=object)
+    return ScreenerTable(list(items), columns, total=total, failed=total - len(items))
+
+
+def screen(
+    items: Sequence[ShareItem], series: Sequence[CandleSeries], query: ScreenerQuery
+) -> ScreenerResponse:
+    """Считает индикаторы, фильтрует, сортирует и режет страницу результата."""
+    return screen_table(_table(items, series, len(items)), query)
+
+
+async def build_table(
+    client: TinkoffClient, catalog: InstrumentCatalog, query: ScreenerQuery
+) -> ScreenerTable:
+    """
+    Загружает свечи всех акций каталога с ``query.class_code`` и считает индикаторы.
+
+    Свечи загружаются параллельно (не больше ``settings.trends_concurrency`` запросов);
+    инструменты, свечи которых загрузить не удалось, учитываются в ``failed``.
+    """
+    snapshot = await catalog.snapshot()
+    items = [snapshot.items[pos] for pos in snapshot.select({"classCode": query.class_code})]
+    loaded = await _load_series(client, items, query)
+    pairs = [(item, series) for item, series in zip(items, loaded) if series is not None]
+    return _table([item for item, _ in pairs], [series for _, series in pairs], len(items))
+
+
+class ScreenerCache:
+    """
+    Таблицы индикаторов скринера в памяти по (classCode, interval, days).
+
+    Таблица строится один раз, одновременные построения одного ключа объединяются.
+    Она актуальна до закрытия текущей свечи интервала, но не дольше
+    ``max_ttl_seconds``, чтобы цена незакрытой свечи не устаревала надолго. Устаревшая
+    таблица отдается, пока в фоне строится новая, поэтому запрос ждет загрузку свечей
+    только при первом обращении к ключу, а в остальных только фильтрует готовые
+    столбцы. Хранится не больше ``max_entries`` таблиц.
+    """
+
+    def __init__(self, max_ttl_seconds: float, max_entries: int = 16) -> None:
+        self.max_ttl_seconds = max_ttl_seconds
+        self.max_entries = max_entries
+        self._tables: "OrderedDict[TableKey, Tuple[float, ScreenerTable]]" = OrderedDict()
+        self._builds: SingleFlight[ScreenerTable] = SingleFlight()
+        self._refreshes: Set["asyncio.Task[None]"] = set()
+
+    def _expires_at(self, interval: str, now: float) -> float:
+        try:
+            return min(float(next_candle_start(interval, int(now))), now + self.max_ttl_seconds)
+        except ValueError:
+            return now
+
+    async def _build(
+        self, key: TableKey, client: TinkoffClient, catalog: InstrumentCatalog, query: ScreenerQuery
+    ) -> ScreenerTable:
+        started = time.time()
+        table = await build_table(client, catalog, query)
+        self._tables[key] = (self._expires_at(query.interval, started), table)
+        self._tables.move_to_end(key)
+        while len(self._tables) > self.max_entries:
+            self._tables.popitem(last=False)
+        return table
+
+    async def _refresh(self, key: TableKey, build: Callable[[], Awaitable[ScreenerTable]]) -> None:
+        try:
+            await self._builds.do(key, build)
+        except Exception as exc:
+            # Следующий запрос построит таблицу сам и получит ошибку
+            self._tables.pop(key, None)
+            logger.error("Screener table refresh for %s failed: %s", key, exc, exc_info=True)
+
+    async def table(
+        self,
+        client: TinkoffClient,
+        catalog: InstrumentCatalog,
+        query: ScreenerQuery,
+        now: Optional[float] = None,
+    ) -> ScreenerTable:
+        key: TableKey = (query.class_code.upper(), query.interval, query.days)
+        build = partial(self._build, key, client, catalog, query)
+        entry = self._tables.get(key)
+        if entry is None:
+            return await self._builds.do(key, build)
+
+        self._tables.move_to_end(key)
+        expires_at, table = entry
+        current = time.time() if now is None else now
+        if current >= expires_at and key not in self._builds:
+            task = asyncio.create_task(self._refresh(key, build))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        return table
+
+    async def aclose(self) -> None:
+        await cancel_tasks(self._refreshes)
+
+
+async def run_screener(
+    client: TinkoffClient,
+    catalog: InstrumentCatalog,
+    query: ScreenerQuery,
+    cache: Optional[ScreenerCache] = None,
+) -> ScreenerResponse:
+    """
+    Скринер по всем акциям каталога с заданным classCode.
+
+    Индикаторы берутся из ``cache`` (или считаются ``build_table``, если кеша нет),
+    затем готовые столбцы фильтруются и сортируются одним векторным проходом.
+    Инструменты, свечи которых загрузить не удалось, учитываются в ``failed`` и в
+    выдачу не попадают.
+    """
+    # Ошибки в выражениях проверяем до загрузки свечей
+    parse_filter(query.filter)
+    parse_sort(query.sort)
+    started = time.perf_counter()
+    if cache is not None:
+        table = await cache.table(client, catalog, query)
+    else:
+        table = await build_table(client, catalog, query)
+
+    response = screen_table(table, query)
+    logger.info(
+        "Screened %s shares (%s matched, %s failed) in %.3fs",
+        table.total,
+        response.matched,
+        table.failed,
+        time.perf_counter() - started,
+    )
+    return response
@@ -1,6 +1,11 @@
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.candles import CandleSeries
 
 
 class TrendJson(TypedDict, total=False):
@@ -19,24 +24,30 @@ class TrendJson(TypedDict, total=False):
 logger = logging.getLogger("logger")
 
 
-def _calculate_sma(values: List[float], period: int) -> Optional[float]:
+FloatArray = npt.NDArray[np.float64]
+IndexArray = npt.NDArray[np.intp]
+
+
+def _as_float_array(values: Sequence[float] | FloatArray) -> FloatArray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _calculate_sma(values: Sequence[float] | npt.NDArray[Any], period: int) -> Optional[float]:
     if period <= 0 or len(values) < period:
         return None
-    return sum(values[-period:]) / period
+    # Окно не длиннее period: суммируем через sum(), чтобы результат совпадал
+    # побитово с эталонной реализацией (в Python 3.12 sum() компенсирует ошибку).
+    return sum(np.asarray(values)[-period:].tolist()) / period
 
 
-def _calculate_rsi(prices: List[float], period: int = 14) -> Optional[float]:
+def _calculate_rsi(prices: Sequence[float] | FloatArray, period: int = 14) -> Optional[float]:
     if period <= 0 or len(prices) < period + 1:
         return None
 
-    gains = 0.0
-    losses = 0.0
-    for idx in range(len(prices) - period, len(prices)):
-        change = prices[idx] - prices[idx - 1]
-        if change > 0:
-            gains += change
-        else:
-            losses += abs(change)
+    changes = np.diff(_as_float_array(prices)[-(period + 1) :])
+    # cumsum складывает последовательно, как исходный цикл
+    gains = float(np.cumsum(np.where(changes > 0, changes, 0.0))[-1])
+    losses = float(np.cumsum(np.where(changes > 0, 0.0, np.abs(changes)))[-1])
 
     avg_gain = gains / period
     avg_loss = losses / period
@@ -47,85 +58,121 @@ def _calculate_rsi(prices: List[float], period: int = 14) -> Optional[float]:
     return 100 - (100 / (1 + rs))
 
 
-def _find_support_resistance(prices: List[float], window: int = 5) -> List[Dict[str, Any]]:
-    if window <= 0 or len(prices) < (2 * window) + 1:
-        return []
-
-    levels: List[Dict[str, Any]] = []
-    for idx in range(window, len(prices) - window):
-        current = prices[idx]
-        is_support = all(
-            prices[j] >= current for j in range(idx - window, idx + window + 1) if j != idx
-        )
-        is_resistance = all(
-            prices[j] <= current for j in range(idx - window, idx + window + 1) if j != idx
-        )
-
-        if is_support:
-            levels.append({"type": "support", "price": current, "index": idx})
-        if is_resistance:
-            levels.append({"type": "resistance", "price": current, "index": idx})
-
+def _sliding_extreme(values: FloatArray, size: int, reducer: np.ufunc) -> FloatArray:
+    """
+    Минимум/максимум (``np.minimum``/``np.maximum``) в каждом окне длины ``size`` за O(n).
+
+    Алгоритм van Herk / Gil-Werman: массив режется на блоки длины ``size``, внутри
+    блоков считаются префиксные и суффиксные экстремумы, и любое окно покрывается
+    суффиксом одного блока и префиксом следующего.
+    """
+    count = len(values)
+    fill = np.inf if reducer is np.minimum else -np.inf
+    padded = np.concatenate([values, np.full((-count) % size, fill)]).reshape(-1, size)
+    prefix = reducer.accumulate(padded, axis=1).ravel()
+    suffix = reducer.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return reducer(suffix[: count - size + 1], prefix[size - 1 : count])
+
+
+def _find_levels(
+    prices: Sequence[float] | FloatArray, window: int = 5
+) -> Tuple[IndexArray, IndexArray]:
+    """
+    Индексы локальных минимумов (поддержки) и максимумов (сопротивления) в окне ±window.
+
+    Точка считается поддержкой, если она не больше всех соседей в окне (равенство
+    допускается), и сопротивлением, если не меньше. Работает за O(n) при любом window.
+    """
+    values = _as_float_array(prices)
+    size = (2 * window) + 1
+    if window <= 0 or len(values) < size:
+        empty: IndexArray = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    centers = values[window : len(values) - window]
+    support = np.flatnonzero(centers <= _sliding_extreme(values, size, np.minimum)) + window
+    resistance = np.flatnonzero(centers >= _sliding_extreme(values, size, np.maximum)) + window
+    return support, resistance
+
+
+def _find_support_resistance(
+    prices: Sequence[float] | FloatArray, window: int = 5
+) -> List[Dict[str, Any]]:
+    values = _as_float_array(prices)
+    support, resistance = _find_levels(values, window)
+
+    levels: List[Dict[str, Any]] = [
+        {"type": "support", "price": float(values[idx]), "index": int(idx)} for idx in support
+    ]
+    levels.extend(
+        {"type": "resistance", "price": float(values[idx]), "index": int(idx)} for idx in resistance
+    )
+    levels.sort(key=lambda level: level["index"])
     return levels
 
 
-def _quotation_to_float(quotation: Optional[Dict[str, Any]]) -> float:
-    if not quotation:
-        return 0.0
-    return float(quotation.get("units", 0)) + float(quotation.get("nano", 0)) / 1_000_000_000
-
+def _normalize_candles(payload: Any) -> CandleSeries:
+    """
+    Приводит свечи к CandleSeries.
 
-def _normalize_candles(payload: Any) -> List[Dict[str, float | int]]:
-    """Приводит сырые свечи Tinkoff (units/nano, volume как str) к списку с float/int."""
+    Принимает готовый CandleSeries, сырые свечи Tinkoff (units/nano, volume как str)
+    списком или словарь с ключом ``candles``. Готовый ряд возвращается без копирования.
+    """
+    if isinstance(payload, CandleSeries):
+        return payload
     if not payload:
-        return []
+        return CandleSeries.empty()
 
     candles = payload.get("candles") if isinstance(payload, dict) else payload
+    if isinstance(candles, CandleSeries):
+        return candles
     if not isinstance(candles, list):
-        return []
-
-    normalized: List[Dict[str, float | int]] = []
-    for candle in candles:
-        close = _quotation_to_float(candle.get("close")) if isinstance(candle, dict) else 0.0
-        volume_raw = candle.get("volume") if isinstance(candle, dict) else 0
-        if isinstance(volume_raw, (int, float, str)):
-            try:
-                volume = int(volume_raw)
-            except (TypeError, ValueError):
-                volume = 0
-        else:
-            volume = 0
-        normalized.append({"close": close, "volume": volume})
-    return normalized
-
-
-def analyse_stock_trends(raw_data: Any) -> TrendJson:
-    normalized = _normalize_candles(raw_data)
-    if not normalized:
+        return CandleSeries.empty()
+    return CandleSeries.from_tinkoff(candles)
+
+
+def analyse_stock_trends(raw_data: Any, levels_window: int = 5) -> TrendJson:
+    series = _normalize_candles(raw_data)
+    if not len(series):
         logger.warning("No stock data available for analysis")
         return {"error": "No stock data available"}
 
-    prices = [item.get("close", 0) for item in normalized]
-    volumes = [item.get("volume", 0) for item in normalized]
-    if not prices:
+    prices = series.to_float("close")
+    volumes = series.volume
+    if not prices.size:
         logger.warning("No price data available for analysis")
         return {"error": "No price data available"}
 
-    current_price = prices[-1]
-    sma20 = _calculate_sma(prices, 20)
-    sma50 = _calculate_sma(prices, 50)
-    sma200 = _calculate_sma(prices, 200)
-    rsi_value = _calculate_rsi(prices, 14)
+    current_price = float(prices[-1])
+    support_idx, resistance_idx = _find_levels(prices, levels_window)
+
+    return build_trend_json(
+        current_price=current_price,
+        sma20=_calculate_sma(prices, 20),
+        sma50=_calculate_sma(prices, 50),
+        sma200=_calculate_sma(prices, 200),
+        rsi_value=_calculate_rsi(prices, 14),
+        current_volume=int(volumes[-1]) if volumes.size else 0,
+        avg_volume20=_calculate_sma(volumes, 20),
+        support_prices=[float(prices[idx]) for idx in support_idx[-3:]],
+        resistance_prices=[float(prices[idx]) for idx in resistance_idx[-3:]],
+    )
 
-    avg_volume20 = _calculate_sma(volumes, 20)
-    current_volume = volumes[-1] if volumes else 0
-    volume_trend = ((current_volume - avg_volume20) / avg_volume20 * 100) if avg_volume20 else 0.0
 
-    support_resistance = _find_support_resistance(prices)
-    recent_support = [level for level in support_resistance if level["type"] == "support"][-3:]
-    recent_resistance = [level for level in support_resistance if level["type"] == "resistance"][
-        -3:
-    ]
+def build_trend_json(
+    *,
+    current_price: float,
+    sma20: Optional[float],
+    sma50: Optional[float],
+    sma200: Optional[float],
+    rsi_value: Optional[float],
+    current_volume: int,
+    avg_volume20: Optional[float],
+    support_prices: Sequence[float],
+    resistance_prices: Sequence[float],
+) -> TrendJson:
+    """Собирает TrendJson из посчитанных индикаторов: сигналы, тренд и округления."""
+    volume_trend = ((current_volume - avg_volume20) / avg_volume20 * 100) if avg_volume20 else 0.0
 
     trend = "Neutral"
     if sma20 and sma50:
@@ -162,8 +209,8 @@ def analyse_stock_trends(raw_data: Any) -> TrendJson:
             "percent_change": f"{volume_trend:.2f}%",
             "signal": volume_signal,
         },
-        "support_levels": [round(level["price"], 2) for level in recent_support],
-        "resistance_levels": [round(level["price"], 2) for level in recent_resistance],
+        "support_levels": [round(price, 2) for price in support_prices],
+        "resistance_levels": [round(price, 2) for price in resistance_prices],
         "overall_trend": trend,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
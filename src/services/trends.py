@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from src.integrations.tinkoff import TinkoffClient
+from src.schemas.trends import TrendResult, TrendsRequest
+from src.services.indicator_state import IndicatorRegistry
+from src.services.trading import analyse_stock_trends
+from src.settings import settings
+
+logger = logging.getLogger("logger")
+
+
+async def analyse_ticker(
+    client: TinkoffClient,
+    *,
+    ticker: str,
+    class_code: str,
+    interval: str,
+    time_from: datetime,
+    time_to: datetime,
+    levels_window: int = 5,
+    indicators: Optional[IndicatorRegistry] = None,
+) -> TrendResult:
+    """
+    Загружает свечи и считает теханализ по одному тикеру.
+
+    С ``indicators`` теханализ обновляется инкрементально: в состояние инструмента
+    дописываются только свечи, появившиеся с прошлого расчета.
+    """
+    resolved_figi = await client.resolve_share_figi(ticker=ticker, figi=None, class_code=class_code)
+    candles = await client.get_candles(
+        figi=resolved_figi,
+        time_from=time_from,
+        time_to=time_to,
+        interval=interval,
+    )
+    if indicators is not None:
+        analysis = indicators.update(resolved_figi, interval, candles)
+    else:
+        analysis = analyse_stock_trends({"candles": candles}, levels_window=levels_window)
+    return TrendResult(figi=resolved_figi, ticker=ticker, analysis=dict(analysis))
+
+
+async def iter_trends(
+    client: TinkoffClient,
+    payload: TrendsRequest,
+    concurrency: Optional[int] = None,
+    indicators: Optional[IndicatorRegistry] = None,
+) -> AsyncIterator[Tuple[int, TrendResult]]:
+    """
+    Параллельно считает теханализ по тикерам и отдает ``(индекс тикера, результат)``
+    по мере готовности.
+
+    Число одновременно обрабатываемых тикеров ограничено ``concurrency``
+    (по умолчанию ``settings.trends_concurrency``). Ошибка по тикеру возвращается
+    в поле ``analysis.error`` и не прерывает обработку остальных. Если потребитель
+    перестал читать (например, клиент отключился), незавершенные задачи отменяются.
+    ``indicators`` передается в ``analyse_ticker``; его ``levels_window`` должен
+    совпадать с ``payload.levels_window``.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.trends_concurrency)
+    time_to = datetime.now(timezone.utc)
+    time_from = time_to - timedelta(days=payload.days)
+
+    async def _analyse(index: int, ticker: str) -> Tuple[int, TrendResult]:
+        async with semaphore:
+            try:
+                result = await analyse_ticker(
+                    client,
+                    ticker=ticker,
+                    class_code=payload.class_code,
+                    interval=payload.interval,
+                    time_from=time_from,
+                    time_to=time_to,
+                    levels_window=payload.levels_window,
+                    indicators=indicators,
+                )
+            except Exception as exc:
+                logger.error("Failed to analyse trends for %s: %s", ticker, exc, exc_info=True)
+                result = TrendResult(ticker=ticker, analysis={"error": f"Failed to analyse: {exc}"})
+            return index, result
+
+    tasks = [
+        asyncio.create_task(_analyse(index, ticker)) for index, ticker in enumerate(payload.tickers)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def collect_trends(
+    client: TinkoffClient,
+    payload: TrendsRequest,
+    concurrency: Optional[int] = None,
+) -> List[TrendResult]:
+    """Считает теханализ по всем тикерам; порядок результатов совпадает с порядком тикеров."""
+    results: List[Optional[TrendResult]] = [None] * len(payload.tickers)
+    async for index, result in iter_trends(client, payload, concurrency):
+        results[index] = result
+    return [result for result in results if result is not None]
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -44,14 +45,20 @@ class Settings(EnvironmentSettings):
     gigachat_api_key: str = "GIGACHAT_API_KEY"
     gigachat_client_id: str = "GIGACHAT_CLIENT_ID"
     gigachat_scope: str = "GIGACHAT_SCOPE"
+    gigachat_max_connections: int = 10
+    gigachat_token_refresh_margin: int = 120
+    gigachat_warm_up: bool = True
+    gigachat_warm_up_timeout: float = 10.0
+    prompt_token_budget: int = 32000
+    prompt_count_tokens_via_api: bool = False
     system_prompt: str = """
         Ты — профессиональный финансовый аналитик с опытом работы на фондовом рынке не менее 10 лет.
 
-        Твоя задача — на основе переданных JSON-данных **проанализировать акции и дать взвешенные рекомендации по действиям с ними**, опираясь на:
+        Твоя задача — на основе переданных данных **проанализировать акции и дать взвешенные рекомендации по действиям с ними**, опираясь на:
         - результат технического анализа (текущая цена, скользящие средние, RSI, объёмы, уровни поддержки/сопротивления, общий тренд);
         - результат краткосрочного прогноза (если он есть: направление тренда, ожидаемое изменение цены, машинная рекомендация BUY/SELL/HOLD и уровень уверенности).
 
-        **Используй только те данные, которые явно присутствуют в JSON.**  
+        **Используй только те данные, которые явно присутствуют во входных данных.**  
         Если каких-то полей нет или они равны `"N/A"`/`null` — прямо указывай, что данные отсутствуют и выводы ограничены.
 
         ---
@@ -60,6 +67,10 @@ class Settings(EnvironmentSettings):
 
         Для каждой акции могут присутствовать поля:
 
+        Данные передаются таблицей CSV (разделитель `;`, одна строка на акцию). Колонки названы
+        так же, как поля ниже; поля блока `volume_trend` идут с префиксом `volume_`, уровни
+        поддержки/сопротивления перечислены через `/`, пустая ячейка означает отсутствие данных.
+
         - Блок технического анализа (например, поле `analysis`):
         - `current_price` — текущая цена в рублях;
         - `moving_averages` — `sma20`, `sma50`, `sma200` (число или `"N/A"`);
@@ -89,7 +100,7 @@ class Settings(EnvironmentSettings):
 
         ### Задачи по каждой акции
 
-        Для **каждой** акции из входного JSON сделай:
+        Для **каждой** акции из входных данных сделай:
 
         #### 1. Техническая картина
         - Укажи тикер и текущую цену (в рублях).
@@ -179,7 +190,7 @@ class Settings(EnvironmentSettings):
 
         В самом конце ответа **обязательно добавь** блок с дисклеймерами:
 
-        - Анализ основан **исключительно на предоставленных технических и количественных данных JSON**.
+        - Анализ основан **исключительно на предоставленных технических и количественных входных данных**.
         - Не учитываются фундаментальные показатели компаний, новости, налоговые аспекты, личные цели, горизонты и риск-профиль инвестора.
         - Краткосрочный прогноз основан на простой статистической модели исторических цен и **не гарантирует результат**.
         - Всё изложенное **не является индивидуальной инвестиционной рекомендацией**, а представляет собой **обучающий технический аналитический обзор**.
@@ -187,17 +198,109 @@ class Settings(EnvironmentSettings):
     user_prompt: str = """
         Проанализируй следующие данные по акциям в соответствии с системными инструкциями и дай структурированный технический обзор и общие технические рекомендации по возможным действиям с акциями.
 
-        Вот JSON с данными:
+        Вот таблица с данными (CSV, разделитель `;`):
+
+        ```csv
+        {TRENDS_TABLE}
+        ```
+
+    """
+    chunk_user_prompt: str = """
+        Проанализируй следующие данные по акциям в соответствии с системными инструкциями.
+
+        Это часть большого списка акций: напиши только разделы по каждой акции из таблицы
+        (`## Тикер: XXX` с подразделами). Не добавляй раздел «Общее резюме по портфелю»
+        и дисклеймеры — они будут составлены отдельно по всему списку.
+
+        Вот таблица с данными (CSV, разделитель `;`):
+
+        ```csv
+        {TRENDS_TABLE}
+        ```
+
+    """
+    reduce_system_prompt: str = """
+        Ты — профессиональный финансовый аналитик. Тебе передают сводную таблицу
+        технических сигналов по всем акциям портфеля (подробные обзоры по отдельным акциям
+        уже составлены). Не пиши обзоры по отдельным акциям и не добавляй новых данных.
+
+        Составь раздел `## Общее резюме по портфелю`:
+        - сравни бумаги по силе и устойчивости тренда, качеству объёмов и привлекательности
+          текущих уровней для входа/удержания/фиксации;
+        - условно раздели акции на более интересные для агрессивного подхода и для
+          консервативного.
+
+        После него обязательно добавь блок с дисклеймерами:
+
+        - Анализ основан **исключительно на предоставленных технических и количественных входных данных**.
+        - Не учитываются фундаментальные показатели компаний, новости, налоговые аспекты, личные цели, горизонты и риск-профиль инвестора.
+        - Краткосрочный прогноз основан на простой статистической модели исторических цен и **не гарантирует результат**.
+        - Всё изложенное **не является индивидуальной инвестиционной рекомендацией**, а представляет собой **обучающий технический аналитический обзор**.
+    """
+    reduce_user_prompt: str = """
+        Вот сводная таблица сигналов по акциям портфеля (CSV, разделитель `;`):
 
-        ```json
-        {JSON_DATA}
+        ```csv
+        {TRENDS_TABLE}
+        ```
 
     """
+    ai_chunk_size: int = 10
+    ai_chunk_concurrency: int = 4
 
     # настройки для Tinkoff Invest API
     tinkoff_base_url: str = "TINKOFF_BASE_URL"
     tinkoff_api_token: str = "TINKOFF_API_TOKEN"
     tinkoff_timeout: int = 30
+    tinkoff_http2: bool = True
+    tinkoff_max_connections: int = 20
+    tinkoff_max_keepalive_connections: int = 10
+    tinkoff_keepalive_expiry: float = 30.0
+    tinkoff_rate_limit_enabled: bool = True
+    # квота метода в минуту до первого ответа с заголовками x-ratelimit-*
+    tinkoff_rate_limit_per_minute: int = 200
+    tinkoff_concurrency_initial: int = 8
+    tinkoff_concurrency_max: int = 20
+    tinkoff_max_retries: int = 3
+    tinkoff_retry_base_delay: float = 0.5
+    tinkoff_retry_max_delay: float = 10.0
+    # число одновременных запросов частей длинного периода GetCandles
+    tinkoff_candle_chunk_concurrency: int = 8
+    figi_index_enabled: bool = True
+    # TTL записей ticker→FIGI в общем кеше воркеров
+    figi_index_ttl: int = 3600
+    instrument_catalog_ttl: int = 3600
+    candle_store_enabled: bool = True
+    candle_store_dir: Path = PROJECT_DIR / "data" / "candles"
+
+    # настройки анализа трендов
+    trends_concurrency: int = 8
+    trends_cache_enabled: bool = True
+    trends_cache_ttl: int = 300
+    trends_cache_max_entries: int = 512
+    # таблицы скринера живут до закрытия свечи, но не дольше screener_cache_ttl
+    screener_cache_ttl: int = 900
+
+    # фоновый предрасчет теханализа; "*" в watchlist_tickers — все акции watchlist_class_code
+    watchlist_tickers: List[str] = []
+    watchlist_class_code: str = "TQBR"
+    watchlist_intervals: List[str] = ["CANDLE_INTERVAL_DAY"]
+    watchlist_days: int = 60
+    watchlist_levels_window: int = 5
+    watchlist_delay_seconds: float = 5.0
+
+    # кеш ответов LLM
+    llm_cache_enabled: bool = True
+    llm_cache_ttl: int = 300
+    llm_cache_max_entries: int = 256
+    llm_cache_dir: Optional[Path] = None
+
+    # общий кеш между воркерами: уровни по порядку из memory, sqlite, redis
+    shared_cache_backends: List[str] = []
+    shared_cache_memory_max_entries: int = 4096
+    shared_cache_sqlite_path: Path = PROJECT_DIR / "data" / "cache.sqlite3"
+    shared_cache_redis_url: Optional[str] = None
+    shared_cache_redis_timeout: float = 0.25
 
     # настройки для логирования
     logging_file_name: str = "application.log.json"
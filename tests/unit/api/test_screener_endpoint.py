@@ -0,0 +1,37 @@
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_instrument_catalog, get_tinkoff_client
+from src.main import app
+from src.services.instrument_catalog import InstrumentCatalog
+from tests.unit.fakes import ScreenerClient
+
+
+@pytest.fixture()
+def client() -> Iterator[TestClient]:
+    tinkoff = ScreenerClient()
+    catalog = InstrumentCatalog(tinkoff, ttl_seconds=60)  # type: ignore[arg-type]
+    app.dependency_overrides[get_tinkoff_client] = lambda: tinkoff
+    app.dependency_overrides[get_instrument_catalog] = lambda: catalog
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_screener_returns_matching_rows(client: TestClient) -> None:
+    response = client.get(
+        "/api/stock-ai/screener", params={"filter": "rsi>70,price>sma20", "sort": "-rsi"}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["matched"] == 1
+    assert body["failed"] == 1
+    assert body["items"][0]["ticker"] == "SBER"
+
+
+def test_screener_rejects_invalid_filter(client: TestClient) -> None:
+    response = client.get("/api/stock-ai/screener", params={"filter": "rsi<<30"})
+
+    assert response.status_code == 400
@@ -0,0 +1,41 @@
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_instrument_catalog
+from src.main import app
+from src.services.instrument_catalog import InstrumentCatalog
+from tests.unit.fakes import FakeTinkoffClient
+
+
+@pytest.fixture()
+def client() -> Iterator[TestClient]:
+    catalog = InstrumentCatalog(FakeTinkoffClient(), ttl_seconds=60)  # type: ignore[arg-type]
+    app.dependency_overrides[get_instrument_catalog] = lambda: catalog
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_stocks_returns_items_with_etag(client: TestClient) -> None:
+    response = client.get("/api/stock-ai/stocks", params={"sector": "energy"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["etag"]
+    assert response.json()["items"][0]["ticker"] == "GAZP"
+    assert response.json()["items"][0]["isin"] is None
+
+
+def test_stocks_returns_304_for_matching_if_none_match(client: TestClient) -> None:
+    etag = client.get("/api/stock-ai/stocks").headers["etag"]
+
+    cached = client.get("/api/stock-ai/stocks", headers={"If-None-Match": f'"other", {etag}'})
+    changed = client.get(
+        "/api/stock-ai/stocks", params={"sector": "energy"}, headers={"If-None-Match": etag}
+    )
+
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert changed.status_code == 200
@@ -1,46 +1,50 @@
+import asyncio
 import json
-from typing import Any, Dict, List
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.dependencies import get_tinkoff_client
+from src.api.dependencies import get_gigachat_llm, get_llm_cache, get_tinkoff_client
+from src.api.router import analyse_trends_ai
 from src.main import app
+from src.schemas.trends import TrendsRequest
+from src.services.llm_cache import LLMResponseCache
+from tests.unit.fakes import TrendsClient
 
 
-class _FakeTinkoffClient:
-    def resolve_share_figi(
-        self, *, ticker: str, figi: str | None = None, class_code: str = "TQBR"
-    ) -> str:
-        return f"FIGI_{ticker}"
+def _chunk(text: str) -> Any:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
 
-    def get_candles(
-        self,
-        *,
-        figi: str,
-        time_from: Any,
-        time_to: Any,
-        interval: str = "CANDLE_INTERVAL_DAY",
-    ) -> List[Dict[str, Any]]:
-        base_price = 100.0
-        return [
-            {"close": {"units": base_price + idx, "nano": 0}, "volume": 1_000 + idx}
-            for idx in range(40)
-        ]
+
+class _FakeStreamingLLM:
+    """Отдает первый фрагмент и ждет разрешения теста, прежде чем закончить генерацию."""
+
+    def __init__(self, blocking: bool = True) -> None:
+        self.release = asyncio.Event()
+        if not blocking:
+            self.release.set()
+        self.finished = False
+        self.calls = 0
+
+    async def astream(self, _: Any) -> AsyncIterator[Any]:
+        self.calls += 1
+        yield _chunk("## Тикер: SBER\n")
+        await self.release.wait()
+        yield _chunk("AI ANALYSIS: done")
+        self.finished = True
 
 
 @pytest.fixture()
 def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
-    def _fake_create_llm() -> object:
-        return object()
-
     async def _fake_invoke(*_: Any, **__: Any) -> str:
         return "AI ANALYSIS: bullish trend"
 
-    monkeypatch.setattr("src.api.router.create_gigachat_llm", _fake_create_llm)
-    monkeypatch.setattr("src.api.router.invoke_gigachat_with_system_prompt", _fake_invoke)
+    monkeypatch.setattr("src.services.ai_analysis.invoke_gigachat_with_system_prompt", _fake_invoke)
 
-    app.dependency_overrides[get_tinkoff_client] = lambda: _FakeTinkoffClient()
+    app.dependency_overrides[get_tinkoff_client] = lambda: TrendsClient(candles=40)
+    app.dependency_overrides[get_gigachat_llm] = lambda: object()
 
     client = TestClient(app)
     yield client
@@ -59,6 +63,7 @@ def test_trends_ai_returns_plain_text(client: TestClient) -> None:
 
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["etag"]
     assert "AI ANALYSIS" in response.text
 
 
@@ -68,3 +73,147 @@ def test_trends_ai_requires_tickers(client: TestClient) -> None:
     assert response.status_code == 400
     body = json.loads(response.text)
     assert body["detail"] == "tickers must be provided"
+
+
+def test_trends_ai_stream_returns_plain_text(client: TestClient) -> None:
+    app.dependency_overrides[get_gigachat_llm] = lambda: _FakeStreamingLLM(blocking=False)
+
+    response = client.post("/api/stock-ai/trends/ai?stream=true", json={"tickers": ["SBER"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == "## Тикер: SBER\nAI ANALYSIS: done"
+
+
+@pytest.mark.anyio
+async def test_trends_ai_stream_sends_first_bytes_before_generation_finishes() -> None:
+    llm = _FakeStreamingLLM()
+
+    response = await analyse_trends_ai(
+        TrendsRequest(tickers=["SBER"]),
+        request=None,  # type: ignore[arg-type]
+        client=TrendsClient(candles=40),  # type: ignore[arg-type]
+        llm=llm,  # type: ignore[arg-type]
+        llm_cache=None,
+        response_cache=None,
+        precomputer=None,
+        stream=True,
+    )
+    body = response.body_iterator  # type: ignore[attr-defined]
+
+    first = await asyncio.wait_for(anext(body), timeout=1)
+    assert first == "## Тикер: SBER\n"
+    assert not llm.finished
+
+    llm.release.set()
+    assert [chunk async for chunk in body] == ["AI ANALYSIS: done"]
+    assert llm.finished
+
+
+@pytest.mark.anyio
+async def test_trends_ai_concurrent_streams_share_one_generation() -> None:
+    llm = _FakeStreamingLLM()
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def _read() -> str:
+        response = await analyse_trends_ai(
+            TrendsRequest(tickers=["SBER"]),
+            request=None,  # type: ignore[arg-type]
+            client=TrendsClient(candles=40),  # type: ignore[arg-type]
+            llm=llm,  # type: ignore[arg-type]
+            llm_cache=cache,
+            response_cache=None,
+            precomputer=None,
+            stream=True,
+        )
+        body = response.body_iterator  # type: ignore[attr-defined]
+        return "".join([chunk async for chunk in body])
+
+    readers = [asyncio.create_task(_read()) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    llm.release.set()
+
+    assert await asyncio.gather(*readers) == ["## Тикер: SBER\nAI ANALYSIS: done"] * 3
+    assert llm.calls == 1
+
+
+class _EmptyStreamingLLM:
+    async def astream(self, _: Any) -> AsyncIterator[Any]:
+        yield _chunk("")
+
+
+def test_trends_ai_stream_returns_502_on_empty_answer(client: TestClient) -> None:
+    app.dependency_overrides[get_gigachat_llm] = lambda: _EmptyStreamingLLM()
+
+    response = client.post("/api/stock-ai/trends/ai?stream=true", json={"tickers": ["SBER"]})
+
+    assert response.status_code == 502
+    assert "empty response" in response.json()["detail"]
+
+
+def test_trends_ai_reuses_cached_answer(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: List[str] = []
+
+    async def _counting_invoke(*_: Any, **kwargs: Any) -> str:
+        calls.append(kwargs["user_message"])
+        return "AI ANALYSIS: cached"
+
+    monkeypatch.setattr(
+        "src.services.ai_analysis.invoke_gigachat_with_system_prompt", _counting_invoke
+    )
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+    app.dependency_overrides[get_llm_cache] = lambda: cache
+
+    first = client.post("/api/stock-ai/trends/ai", json={"tickers": ["SBER"]})
+    second = client.post("/api/stock-ai/trends/ai", json={"tickers": ["SBER"]})
+    streamed = client.post("/api/stock-ai/trends/ai?stream=true", json={"tickers": ["SBER"]})
+
+    assert first.text == second.text == streamed.text == "AI ANALYSIS: cached"
+    assert len(calls) == 1
+
+
+def test_trends_ai_returns_503_without_gigachat_client(client: TestClient) -> None:
+    del app.dependency_overrides[get_gigachat_llm]
+
+    response = client.post("/api/stock-ai/trends/ai", json={"tickers": ["SBER"]})
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "GigaChat client is not configured"
+
+
+def test_trends_ai_rejects_prompt_over_token_budget(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def _unexpected_invoke(*_: Any, **__: Any) -> str:
+        raise AssertionError("LLM must not be called")
+
+    monkeypatch.setattr(
+        "src.services.ai_analysis.invoke_gigachat_with_system_prompt", _unexpected_invoke
+    )
+    monkeypatch.setattr("src.api.router.settings.prompt_token_budget", 10)
+
+    response = client.post("/api/stock-ai/trends/ai", json={"tickers": ["SBER"]})
+
+    assert response.status_code == 413
+    assert "exceeds budget of 10" in response.json()["detail"]
+
+
+def test_trends_ai_rejects_reduce_prompt_over_token_budget(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def _unexpected_invoke(*_: Any, **__: Any) -> str:
+        raise AssertionError("LLM must not be called")
+
+    monkeypatch.setattr(
+        "src.services.ai_analysis.invoke_gigachat_with_system_prompt", _unexpected_invoke
+    )
+    monkeypatch.setattr("src.api.router.settings.ai_chunk_size", 1)
+    # Промпты частей укладываются в бюджет, резюме по портфелю — нет
+    monkeypatch.setattr("src.api.router.settings.reduce_system_prompt", "резюме " * 20_000)
+
+    response = client.post("/api/stock-ai/trends/ai", json={"tickers": ["SBER", "GAZP"]})
+
+    assert response.status_code == 413
+    assert "exceeds budget" in response.json()["detail"]
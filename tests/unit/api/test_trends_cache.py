@@ -0,0 +1,107 @@
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_response_cache, get_tinkoff_client
+from src.main import app
+from src.schemas.trends import TrendsRequest
+from src.services.response_cache import ResponseCache, trends_cache_key
+from tests.unit.fakes import TrendsClient
+
+
+@pytest.fixture()
+def tinkoff() -> Iterator[TrendsClient]:
+    fake = TrendsClient()
+    cache = ResponseCache(max_entries=16, max_ttl_seconds=300)
+    app.dependency_overrides[get_tinkoff_client] = lambda: fake
+    app.dependency_overrides[get_response_cache] = lambda: cache
+    yield fake
+    app.dependency_overrides.clear()
+
+
+def test_trends_repeat_request_is_served_from_cache(tinkoff: TrendsClient) -> None:
+    client = TestClient(app)
+
+    first = client.post("/api/stock-ai/trends", json={"tickers": ["SBER"]})
+    second = client.post("/api/stock-ai/trends", json={"tickers": ["SBER"]})
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    assert first.json()["results"][0]["figi"] == "FIGI_SBER"
+    assert len(tinkoff.candle_calls) == 1
+
+
+def test_trends_answers_304_for_matching_etag(tinkoff: TrendsClient) -> None:
+    client = TestClient(app)
+    etag = client.post("/api/stock-ai/trends", json={"tickers": ["SBER"]}).headers["etag"]
+
+    response = client.post(
+        "/api/stock-ai/trends", json={"tickers": ["SBER"]}, headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_trends_etag_follows_analysis_not_computation_time(tinkoff: TrendsClient) -> None:
+    # Без серверного кеша каждый запрос пересчитывается, и время расчета в теле меняется
+    app.dependency_overrides[get_response_cache] = lambda: None
+    client = TestClient(app)
+    first = client.post("/api/stock-ai/trends", json={"tickers": ["SBER"]})
+    etag = first.headers["etag"]
+
+    same = client.post(
+        "/api/stock-ai/trends", json={"tickers": ["SBER"]}, headers={"If-None-Match": etag}
+    )
+    # Цена незакрытой свечи изменилась: теханализ другой, старый ETag не подходит
+    tinkoff.candles = 31
+    changed = client.post(
+        "/api/stock-ai/trends", json={"tickers": ["SBER"]}, headers={"If-None-Match": etag}
+    )
+
+    assert len(tinkoff.candle_calls) == 3
+    assert same.status_code == 304
+    assert same.headers["etag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["results"][0]["analysis"]["current_price"] == 130
+
+
+def test_trends_with_failed_tickers_are_not_cacheable_downstream(tinkoff: TrendsClient) -> None:
+    client = TestClient(app)
+
+    failed = client.post("/api/stock-ai/trends", json={"tickers": ["SBER", "FAIL"]})
+
+    assert failed.status_code == 200
+    assert failed.headers["cache-control"] == "no-store"
+    assert "etag" not in failed.headers
+
+
+def test_trends_with_failed_tickers_are_not_cached(tinkoff: TrendsClient) -> None:
+    client = TestClient(app)
+
+    client.post("/api/stock-ai/trends", json={"tickers": ["SBER", "FAIL"]})
+    client.post("/api/stock-ai/trends", json={"tickers": ["SBER", "FAIL"]})
+
+    assert len(tinkoff.candle_calls) == 2
+
+
+def test_cache_key_changes_when_a_new_candle_opens() -> None:
+    payload = TrendsRequest(tickers=["SBER"], interval="CANDLE_INTERVAL_HOUR")
+    hour = 1_700_000_000 - 1_700_000_000 % 3600
+
+    key, ttl = trends_cache_key("trends", payload, max_ttl_seconds=300, now=hour + 10)
+    same_key, short_ttl = trends_cache_key("trends", payload, max_ttl_seconds=300, now=hour + 3500)
+    next_key, _ = trends_cache_key("trends", payload, max_ttl_seconds=300, now=hour + 3600)
+    other_key, _ = trends_cache_key(
+        "trends", payload.model_copy(update={"days": 30}), max_ttl_seconds=300, now=hour + 10
+    )
+
+    assert key == same_key
+    assert key != next_key
+    assert key != other_key
+    assert (ttl, short_ttl) == (300, 100)
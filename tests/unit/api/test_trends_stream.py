@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_tinkoff_client
+from src.main import app
+from tests.unit.fakes import TrendsClient
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    app.dependency_overrides[get_tinkoff_client] = lambda: TrendsClient()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_trends_stream_emits_ndjson_results_and_summary(client: TestClient) -> None:
+    response = client.post("/api/stock-ai/trends/stream", json={"tickers": ["SBER", "FAIL"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    results = {event["data"]["index"]: event["data"]["result"] for event in events[:-1]}
+    assert results[0]["figi"] == "FIGI_SBER"
+    assert "error" in results[1]["analysis"]
+    assert events[-1]["type"] == "summary"
+    assert events[-1]["data"]["total"] == 2
+    assert events[-1]["data"]["failed"] == 1
+
+
+def test_trends_stream_supports_sse(client: TestClient) -> None:
+    response = client.post(
+        "/api/stock-ai/trends/stream",
+        json={"tickers": ["SBER"]},
+        headers={"Accept": "text/event-stream"},
+    )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    chunks = response.text.strip().split("\n\n")
+    assert chunks[0].startswith("event: result\ndata: ")
+    assert chunks[-1].startswith("event: summary\ndata: ")
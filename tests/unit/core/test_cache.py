@@ -0,0 +1,86 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.core import cache as cache_module
+from src.core.cache import DiskCache, TTLCache, hash_key
+from src.core.singleflight import SingleFlight
+
+
+def test_hash_key_is_stable_and_distinguishes_parts() -> None:
+    assert hash_key("a", 1, 0.2) == hash_key("a", 1, 0.2)
+    assert hash_key("a", 1) != hash_key("a", "1")
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[int] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache: TTLCache[str] = TTLCache(max_entries=10, ttl_seconds=5)
+    cache.set("key", "value")
+
+    now[0] += 4
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_disk_cache_roundtrip_and_expiry(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path, ttl_seconds=60)
+    cache.set("key", {"answer": "текст"})
+
+    assert DiskCache(tmp_path, ttl_seconds=60).get("key") == {"answer": "текст"}
+
+    cache.set("key", "old", ttl_seconds=-1)
+    assert cache.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_single_flight_coalesces_concurrent_calls() -> None:
+    flights: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+    calls: List[int] = []
+
+    async def _work() -> int:
+        calls.append(1)
+        await release.wait()
+        return 42
+
+    waiters = [asyncio.create_task(flights.do("key", _work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [42] * 5
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+
+@pytest.mark.anyio
+async def test_single_flight_shares_errors_and_releases_key() -> None:
+    flights: SingleFlight[int] = SingleFlight()
+    attempts: List[int] = []
+
+    async def _fail() -> int:
+        attempts.append(1)
+        raise RuntimeError("boom")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await flights.do("key", _fail)
+
+    assert len(attempts) == 2
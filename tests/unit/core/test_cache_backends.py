@@ -0,0 +1,150 @@
+import asyncio
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+from src.core.cache_backends import (
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    TieredCache,
+    create_backends,
+)
+from src.services.response_cache import CachedResponse, ResponseCache
+
+
+class _RedisHandler(socketserver.StreamRequestHandler):
+    """Минимальная замена Redis: GET, SET с PX и DEL."""
+
+    def _read_command(self) -> List[bytes]:
+        header = self.rfile.readline()
+        if not header:
+            return []
+        args = []
+        for _ in range(int(header[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        store: Dict[bytes, Tuple[bytes, float]] = self.server.store  # type: ignore[attr-defined]
+        while True:
+            args = self._read_command()
+            if not args:
+                return
+            command = args[0].upper()
+            if command == b"SET":
+                store[args[1]] = (args[2], time.time() + int(args[4]) / 1000)
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"GET":
+                value, expires_at = store.get(args[1], (b"", 0.0))
+                if expires_at > time.time():
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+                else:
+                    self.wfile.write(b"$-1\r\n")
+            elif command == b"DEL":
+                self.wfile.write(b":%d\r\n" % int(store.pop(args[1], None) is not None))
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture()
+def redis_url() -> Iterator[str]:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RedisHandler)
+    server.daemon_threads = True
+    server.store = {}  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.anyio
+async def test_tiers_are_shared_between_workers_and_backfilled(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    first = TieredCache([MemoryBackend(16), SQLiteBackend(path)], namespace="figi")
+    second = TieredCache([MemoryBackend(16), SQLiteBackend(path)], namespace="figi")
+
+    await first.set("SBER:TQBR", b"BBG004730N88", ttl_seconds=60)
+
+    assert await second.get("SBER:TQBR") == b"BBG004730N88"
+    assert await second.get("SBER:TQBR") == b"BBG004730N88"
+    assert await second.with_namespace("llm").get("SBER:TQBR") is None
+    assert second.stats() == {
+        "memory": {"hits": 1, "misses": 2, "errors": 0, "skipped": 0},
+        "sqlite": {"hits": 1, "misses": 1, "errors": 0, "skipped": 0},
+    }
+
+
+@pytest.mark.anyio
+async def test_ttl_is_consistent_across_tiers(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = TieredCache([MemoryBackend(16), SQLiteBackend(tmp_path / "cache.sqlite3")])
+    await cache.set("key", b"value", ttl_seconds=10)
+    await cache.set("skipped", b"value", ttl_seconds=0)
+    now = time.time()
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+
+    assert await cache.get("key") is None
+    assert await cache.get("skipped") is None
+
+
+@pytest.mark.anyio
+async def test_redis_backend_speaks_resp(redis_url: str) -> None:
+    cache = TieredCache(
+        create_backends(
+            ["memory", "redis"], memory_max_entries=4, sqlite_path=None, redis_url=redis_url
+        )
+    )
+    other = TieredCache([RedisBackend(redis_url)])
+
+    await cache.set("answer", b"\r\n42", ttl_seconds=60)
+    cached = await other.get("answer")
+    await other.delete("answer")
+
+    assert cached == b"\r\n42"
+    assert await other.get("answer") is None
+    assert other.stats()["redis"] == {"hits": 1, "misses": 1, "errors": 0, "skipped": 0}
+    cache.close()
+    other.close()
+
+
+@pytest.mark.anyio
+async def test_unavailable_backend_is_skipped_after_error() -> None:
+    backend = RedisBackend("redis://127.0.0.1:1/0", timeout_seconds=0.1)
+    backend.cooldown_seconds = 0.2
+    cache = TieredCache([MemoryBackend(4), backend])
+
+    await cache.set("key", b"value", ttl_seconds=60)
+    await cache.delete("key")
+
+    # Пока уровень пропускается, к серверу не подключаемся
+    assert await cache.get("key") is None
+    assert backend.stats.as_dict() == {"hits": 0, "misses": 1, "errors": 1, "skipped": 2}
+
+    await asyncio.sleep(backend.cooldown_seconds)
+
+    assert await cache.get("key") is None
+    assert backend.stats.as_dict() == {"hits": 0, "misses": 2, "errors": 2, "skipped": 2}
+    with pytest.raises(ValueError):
+        create_backends(["memcached"], memory_max_entries=1, sqlite_path=None, redis_url=None)
+
+
+@pytest.mark.anyio
+async def test_response_cache_reads_responses_of_other_workers(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    caches: List[Any] = [
+        ResponseCache(8, 60, shared=TieredCache([SQLiteBackend(path)])) for _ in range(2)
+    ]
+    response = CachedResponse.build(b'{"results": []}', "application/json", 60)
+
+    await caches[0].set("key", response, 60)
+
+    assert await caches[1].get("key") == response
@@ -0,0 +1,48 @@
+from src.core.candles import CandleSeries, nano_to_quotation, quotation_to_nano
+
+
+def test_quotation_roundtrip() -> None:
+    for value in (0, 1, 123_450_000_000, -7_250_000_000):
+        assert quotation_to_nano(nano_to_quotation(value)) == value
+
+
+def test_candle_series_parses_tinkoff_payload_once() -> None:
+    candles = [
+        {
+            "close": {"units": "271", "nano": 130_000_000},
+            "volume": "15",
+            "time": "2024-01-10T07:00:00Z",
+            "isComplete": True,
+        },
+        {"close": {"units": -1, "nano": -500_000_000}, "volume": "bad"},
+        "not a candle",
+    ]
+
+    series = CandleSeries.from_tinkoff(candles)
+
+    assert len(series) == 3
+    assert series.close.tolist() == [271_130_000_000, -1_500_000_000, 0]
+    assert series.to_float("close").tolist() == [271 + 130_000_000 / 1e9, -1 - 0.5, 0.0]
+    assert series.volume.tolist() == [15, 0, 0]
+    assert series.time[0] == 1704870000
+    assert series.nbytes == 3 * 49
+
+
+def test_candle_series_between_returns_views() -> None:
+    series = CandleSeries.from_columns({"time": [10, 20, 30, 40], "close": [1, 2, 3, 4]})
+
+    window = series.between(15, 30)
+
+    assert window.time.tolist() == [20, 30]
+    assert window.close.base is series.close
+
+
+def test_candle_series_merge_sorts_and_drops_boundary_duplicates() -> None:
+    first = CandleSeries.from_columns({"time": [10, 20, 30], "close": [1, 2, 3]})
+    second = CandleSeries.from_columns({"time": [30, 40], "close": [33, 4]})
+
+    merged = CandleSeries.merge([second, CandleSeries.empty(), first])
+
+    assert merged.time.tolist() == [10, 20, 30, 40]
+    assert merged.close.tolist() == [1, 2, 3, 4]
+    assert len(CandleSeries.merge([])) == 0
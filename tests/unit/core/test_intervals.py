@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.core.intervals import DAY, HOUR, WEEK, candle_start, next_candle_start, split_range
+
+
+def _ts(*args: int) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize(
+    ("interval", "moment", "start", "next_start"),
+    [
+        (
+            "CANDLE_INTERVAL_5_MIN",
+            (2024, 3, 5, 10, 7, 30),
+            (2024, 3, 5, 10, 5),
+            (2024, 3, 5, 10, 10),
+        ),
+        ("CANDLE_INTERVAL_HOUR", (2024, 3, 5, 10, 59), (2024, 3, 5, 10), (2024, 3, 5, 11)),
+        ("CANDLE_INTERVAL_DAY", (2024, 3, 5, 23, 59), (2024, 3, 5), (2024, 3, 6)),
+        ("CANDLE_INTERVAL_WEEK", (2024, 3, 10, 12), (2024, 3, 4), (2024, 3, 11)),
+        ("CANDLE_INTERVAL_MONTH", (2024, 12, 31, 12), (2024, 12, 1), (2025, 1, 1)),
+    ],
+)
+def test_candle_boundaries(interval: str, moment: tuple, start: tuple, next_start: tuple) -> None:
+    assert candle_start(interval, _ts(*moment)) == _ts(*start)
+    assert next_candle_start(interval, _ts(*moment)) == _ts(*next_start)
+
+
+def test_unknown_interval_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        candle_start("CANDLE_INTERVAL_UNSPECIFIED", 0)
+
+
+def test_split_range_respects_max_request_range() -> None:
+    assert split_range("CANDLE_INTERVAL_DAY", 0, 60 * DAY) == [(0, 60 * DAY)]
+    assert split_range("CANDLE_INTERVAL_HOUR", 0, 2 * WEEK + HOUR) == [
+        (0, WEEK),
+        (WEEK, 2 * WEEK),
+        (2 * WEEK, 2 * WEEK + HOUR),
+    ]
+    assert len(split_range("CANDLE_INTERVAL_5_MIN", 0, 365 * DAY)) == 365
+    assert split_range("UNKNOWN", 0, 10 * 365 * DAY) == [(0, 10 * 365 * DAY)]
@@ -0,0 +1,118 @@
+"""Общие заглушки для модульных тестов."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from src.core.candles import NANO, CandleSeries
+
+SHARES: List[Dict[str, Any]] = [
+    {
+        "figi": "F1",
+        "ticker": "SBER",
+        "classCode": "TQBR",
+        "countryOfRisk": "RU",
+        "exchange": "MOEX_MRNG_EVNG_E_WKND_DLR",
+        "sector": "financial",
+        "lot": 10,
+    },
+    {
+        "figi": "F2",
+        "ticker": "GAZP",
+        "classCode": "TQBR",
+        "countryOfRisk": "RU",
+        "exchange": "moex_mrng_evng_e_wknd_dlr",
+        "sector": "energy",
+        "lot": 10,
+    },
+    {
+        "figi": "F3",
+        "ticker": "AAPL",
+        "classCode": "SPBXM",
+        "countryOfRisk": "US",
+        "exchange": "SPB",
+        "sector": "it",
+        "lot": 1,
+    },
+    {"ticker": "BROKEN"},
+]
+
+
+class FakeTinkoffClient:
+    """Клиент Tinkoff, отдающий ``SHARES`` на вызов Shares и запоминающий его аргументы."""
+
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, str]] = []
+
+    async def fetch_shares(self, **kwargs: str) -> List[Dict[str, Any]]:
+        self.calls.append(kwargs)
+        await asyncio.sleep(0)
+        return SHARES
+
+
+def candle_series(closes: List[float], volumes: List[int]) -> CandleSeries:
+    """Дневные свечи с ценами закрытия ``closes`` и объемами ``volumes``."""
+    return CandleSeries.from_columns(
+        {
+            "time": np.arange(len(closes)) * 86400,
+            "close": [round(price * NANO) for price in closes],
+            "volume": volumes,
+        }
+    )
+
+
+class ScreenerClient(FakeTinkoffClient):
+    """
+    Отдает по 30 растущих свечей на инструмент; загрузка FIGI ``F2`` падает.
+
+    FIGI всех загрузок свечей запоминаются в ``candle_calls``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.candle_calls: List[str] = []
+
+    async def get_candles(self, *, figi: str, **_: Any) -> CandleSeries:
+        self.candle_calls.append(figi)
+        await asyncio.sleep(0)
+        if figi == "F2":
+            raise RuntimeError("boom")
+        return candle_series([float(price) for price in range(1, 31)], [100] * 30)
+
+
+class TrendsClient:
+    """
+    Клиент Tinkoff для теханализа: FIGI тикера — ``FIGI_<тикер>`` (тикер ``FAIL`` не
+    находится), свечи — ``candles`` дневных свечей с ценами закрытия 100, 101, ...
+
+    Запоминает FIGI загрузок свечей и наибольшее число одновременных загрузок;
+    загрузка FIGI из ``failing`` падает, из ``delays`` — ждет заданное время.
+    """
+
+    def __init__(self, candles: int = 30) -> None:
+        self.candles = candles
+        self.candle_calls: List[str] = []
+        self.failing: Set[str] = set()
+        self.delays: Dict[str, float] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def resolve_share_figi(
+        self, *, ticker: str, figi: Optional[str] = None, class_code: str = "TQBR"
+    ) -> str:
+        if ticker == "FAIL":
+            raise RuntimeError(f"FIGI not found for ticker={ticker}")
+        return f"FIGI_{ticker}"
+
+    async def get_candles(self, *, figi: str, **_: Any) -> CandleSeries:
+        self.candle_calls.append(figi)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(figi, 0))
+        finally:
+            self.in_flight -= 1
+        if figi in self.failing:
+            raise RuntimeError("upstream error")
+        return candle_series([100.0 + idx for idx in range(self.candles)], [1_000] * self.candles)
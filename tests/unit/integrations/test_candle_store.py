@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from src.core.candles import CandleSeries
+from src.integrations.candle_store import CandleStore
+
+_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _candle(day: int, close: int, is_complete: bool = True) -> Dict[str, Any]:
+    quotation = {"units": str(close), "nano": 500_000_000}
+    return {
+        "open": quotation,
+        "high": quotation,
+        "low": quotation,
+        "close": quotation,
+        "volume": str(1_000 + day),
+        "time": (_START + timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "isComplete": is_complete,
+    }
+
+
+class _FakeFetcher:
+    def __init__(self, candles: List[Dict[str, Any]]) -> None:
+        self.candles = candles
+        self.calls: List[Tuple[datetime, datetime]] = []
+
+    async def __call__(self, time_from: datetime, time_to: datetime) -> CandleSeries:
+        self.calls.append((time_from, time_to))
+        return CandleSeries.from_tinkoff(
+            candle
+            for candle in self.candles
+            if time_from <= datetime.fromisoformat(candle["time"]) <= time_to
+        )
+
+
+@pytest.mark.anyio
+async def test_store_fetches_only_missing_tail(tmp_path: Path) -> None:
+    store = CandleStore(tmp_path)
+    fetcher = _FakeFetcher([_candle(day, 100 + day) for day in range(4)] + [_candle(4, 1, False)])
+    time_to = _START + timedelta(days=5)
+
+    first = await store.get_candles(
+        figi="FIGI", interval="DAY", time_from=_START, time_to=time_to, fetch=fetcher
+    )
+
+    fetcher.candles[-1] = _candle(4, 200)
+    fetcher.candles.append(_candle(5, 201, False))
+    second = await store.get_candles(
+        figi="FIGI",
+        interval="DAY",
+        time_from=_START + timedelta(days=1),
+        time_to=time_to + timedelta(days=1),
+        fetch=fetcher,
+    )
+
+    assert len(first) == 5
+    assert fetcher.calls[1][0] == _START + timedelta(days=4)
+    assert [candle["close"]["units"] for candle in second.to_tinkoff()] == [
+        "101",
+        "102",
+        "103",
+        "200",
+        "201",
+    ]
+    assert second.is_complete.tolist() == [True, True, True, True, False]
+    assert second.volume[0] == 1001
+
+
+@pytest.mark.anyio
+async def test_stores_sharing_directory_keep_columns_aligned(tmp_path: Path) -> None:
+    # Два экземпляра с общим каталогом — как воркеры uvicorn: их asyncio.Lock не связаны
+    stores = [CandleStore(tmp_path), CandleStore(tmp_path)]
+    fetcher = _FakeFetcher([_candle(day, 100 + day) for day in range(60)])
+
+    results = await asyncio.gather(
+        *(
+            stores[idx % 2].get_candles(
+                figi="FIGI",
+                interval="DAY",
+                time_from=_START + timedelta(days=idx % 3),
+                time_to=_START + timedelta(days=30 + idx),
+                fetch=fetcher,
+            )
+            for idx in range(20)
+        )
+    )
+
+    stored = await stores[0].get_candles(
+        figi="FIGI",
+        interval="DAY",
+        time_from=_START,
+        time_to=_START + timedelta(days=40),
+        fetch=fetcher,
+    )
+    for series in [*results, stored]:
+        days = (series.time - int(_START.timestamp())) // 86_400
+        assert days.tolist() == sorted(set(days.tolist()))
+        assert (series.volume == 1_000 + days).all()
+    assert len(stored) == 41
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+from src.integrations.gigachat import GigaChatProvider
+
+
+class _FakeGigaChat:
+    """Выдает токены со сроком жизни ``lifetime`` секунд и считает авторизации."""
+
+    def __init__(self, lifetime: float = 1800) -> None:
+        self.lifetime = lifetime
+        self.token: Any = None
+        self.auth_calls = 0
+        self.models_calls = 0
+        self.closed = False
+
+    def _reset_token(self) -> None:
+        self.token = None
+
+    async def aget_token(self) -> Any:
+        if self.token is None:
+            self.auth_calls += 1
+            expires_at = int((time.time() + self.lifetime) * 1000)
+            self.token = SimpleNamespace(
+                access_token=f"token-{self.auth_calls}", expires_at=expires_at
+            )
+        return self.token
+
+    async def aget_models(self) -> List[str]:
+        self.models_calls += 1
+        return ["GigaChat"]
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.anyio
+async def test_warm_up_acquires_token_and_opens_connection() -> None:
+    llm = _FakeGigaChat()
+    provider = GigaChatProvider(llm, refresh_margin_seconds=120)  # type: ignore[arg-type]
+
+    await provider.warm_up()
+
+    assert llm.auth_calls == 1
+    assert llm.models_calls == 1
+    assert 1600 < provider.seconds_until_refresh() <= 1680
+
+
+@pytest.mark.anyio
+async def test_refresh_token_reuses_valid_token_unless_forced() -> None:
+    llm = _FakeGigaChat()
+    provider = GigaChatProvider(llm)  # type: ignore[arg-type]
+
+    await provider.refresh_token()
+    await provider.refresh_token()
+    assert llm.auth_calls == 1
+
+    await provider.refresh_token(force=True)
+    assert llm.auth_calls == 2
+    assert llm.token.access_token == "token-2"
+
+
+@pytest.mark.anyio
+async def test_background_refresh_renews_token_before_expiry() -> None:
+    llm = _FakeGigaChat(lifetime=0.2)
+    provider = GigaChatProvider(llm, refresh_margin_seconds=0.15)  # type: ignore[arg-type]
+    await provider.refresh_token()
+
+    task = asyncio.create_task(provider.run_token_refresh(retry_seconds=0.05))
+    await asyncio.sleep(0.12)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await provider.aclose()
+
+    assert llm.auth_calls >= 2
+    assert llm.closed
+
+
+@pytest.mark.anyio
+async def test_background_refresh_waits_between_refreshes_of_short_lived_tokens() -> None:
+    llm = _FakeGigaChat(lifetime=0.1)
+    provider = GigaChatProvider(llm, refresh_margin_seconds=120)  # type: ignore[arg-type]
+    await provider.refresh_token()
+    assert provider.seconds_until_refresh() == 0
+
+    task = asyncio.create_task(provider.run_token_refresh(retry_seconds=0.05))
+    await asyncio.sleep(0.12)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert 2 <= llm.auth_calls <= 4
+
+
+class _GigaChatWithoutReset(_FakeGigaChat):
+    _reset_token = None  # type: ignore[assignment]
+
+
+@pytest.mark.anyio
+async def test_forced_refresh_tolerates_client_without_token_reset() -> None:
+    llm = _GigaChatWithoutReset()
+    provider = GigaChatProvider(llm)  # type: ignore[arg-type]
+
+    await provider.refresh_token()
+    await provider.refresh_token(force=True)
+
+    assert llm.auth_calls == 1
+    assert provider.seconds_until_refresh() > 0
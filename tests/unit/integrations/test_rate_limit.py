@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from src.integrations.rate_limit import AdaptiveConcurrency, TinkoffRateLimiter, TokenBucket
+from src.integrations.tinkoff import TinkoffClient
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.mark.anyio
+async def test_token_bucket_paces_requests_and_obeys_quota_headers() -> None:
+    clock = _Clock()
+    bucket = TokenBucket(2, period_seconds=1.0, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        await bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+    bucket.update_from_headers(
+        httpx.Headers(
+            {
+                "x-ratelimit-limit": "4, 4;w=1",
+                "x-ratelimit-remaining": "0",
+                "x-ratelimit-reset": "3",
+            }
+        )
+    )
+    await bucket.acquire()
+    assert clock.now == pytest.approx(3.5)
+    # После сброса окна доступна вся новая квота
+    for _ in range(3):
+        await bucket.acquire()
+    assert clock.now == pytest.approx(3.5)
+
+
+@pytest.mark.anyio
+async def test_adaptive_concurrency_increases_additively_and_halves_on_overload() -> None:
+    concurrency = AdaptiveConcurrency(4, minimum=1, maximum=5)
+
+    for _ in range(4):
+        await concurrency.acquire()
+    waiter = asyncio.ensure_future(concurrency.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await concurrency.release(overloaded=False)
+    await waiter
+    assert concurrency.limit == pytest.approx(4.25)
+
+    for _ in range(4):
+        await concurrency.release(overloaded=True)
+    assert concurrency.limit == 1.0
+    assert concurrency.in_flight == 0
+
+
+def _client(statuses: List[int], requests: List[httpx.Request]) -> TinkoffClient:
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status = statuses.pop(0) if statuses else 200
+        headers: Dict[str, str] = {"x-ratelimit-limit": "100", "x-ratelimit-remaining": "99"}
+        if status == 429:
+            headers.update({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "0.01"})
+        return httpx.Response(status, headers=headers, json={"payload": {"candles": []}})
+
+    limiter = TinkoffRateLimiter(
+        default_limit=100, concurrency=AdaptiveConcurrency(4), max_retries=2, backoff_base=0.001
+    )
+    return TinkoffClient(
+        token="test-token",
+        base_url="http://tinkoff.test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        rate_limiter=limiter,
+    )
+
+
+@pytest.mark.anyio
+async def test_client_retries_rate_limited_and_server_errors() -> None:
+    requests: List[httpx.Request] = []
+    client = _client([429, 503], requests)
+
+    candles = await client.get_candles(
+        figi="F1", time_from=datetime(2024, 1, 1), time_to=datetime(2024, 1, 2)
+    )
+
+    assert len(candles) == 0
+    assert len(requests) == 3
+    assert client.rate_limiter is not None
+    assert client.rate_limiter.concurrency.limit < 4
+    assert client.rate_limiter.bucket("GetCandles").limit == 100
+
+
+@pytest.mark.anyio
+async def test_client_raises_after_retries_are_exhausted() -> None:
+    requests: List[httpx.Request] = []
+    client = _client([500, 500, 500, 500], requests)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.get_candles(
+            figi="F1", time_from=datetime(2024, 1, 1), time_to=datetime(2024, 1, 2)
+        )
+    assert len(requests) == 3
+
+
+@pytest.mark.anyio
+async def test_cancelled_request_releases_slot_without_decreasing_limit() -> None:
+    limiter = TinkoffRateLimiter(default_limit=100, concurrency=AdaptiveConcurrency(4))
+    started = asyncio.Event()
+
+    async def _hanging() -> httpx.Response:
+        started.set()
+        await asyncio.sleep(10)
+        raise AssertionError("request must be cancelled")
+
+    async def _broken() -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+    task = asyncio.create_task(limiter.send("GetCandles", _hanging))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.concurrency.limit == 4
+
+    limiter.max_retries = 0
+    with pytest.raises(httpx.ConnectError):
+        await limiter.send("GetCandles", _broken)
+    assert limiter.concurrency.limit == 2
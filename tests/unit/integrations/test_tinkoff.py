@@ -0,0 +1,184 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from src.core.cache_backends import MemoryBackend, TieredCache
+from src.integrations.rate_limit import TinkoffRateLimiter
+from src.integrations.tinkoff import TinkoffClient
+
+
+def _build_client(requests: List[httpx.Request]) -> TinkoffClient:
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body: Dict[str, Any] = json.loads(request.content)
+        if request.url.path.endswith("/ShareBy"):
+            return httpx.Response(200, json={"instrument": {"figi": f"FIGI_{body['id']}"}})
+        if request.url.path.endswith("/Shares"):
+            instruments = [
+                {"figi": "BBG004730N88", "ticker": "SBER", "classCode": "TQBR"},
+                {"figi": "BBG004730RP0", "ticker": "GAZP", "classCode": "TQBR"},
+            ]
+            return httpx.Response(200, json={"instruments": instruments})
+        return httpx.Response(200, json={"payload": {"candles": [{"volume": "1"}]}})
+
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(_handler),
+        headers={"Authorization": "Bearer test-token"},
+    )
+    return TinkoffClient(
+        token="test-token", base_url="http://tinkoff.test/", http_client=http_client
+    )
+
+
+@pytest.mark.anyio
+async def test_client_reuses_shared_http_client() -> None:
+    requests: List[httpx.Request] = []
+
+    async with _build_client(requests) as client:
+        figi = await client.resolve_share_figi(ticker="SBER")
+        candles = await client.get_candles(
+            figi=figi,
+            time_from=datetime(2024, 1, 1),
+            time_to=datetime(2024, 1, 2),
+        )
+
+    assert figi == "FIGI_SBER"
+    assert candles.volume.tolist() == [1]
+    assert [request.url.host for request in requests] == ["tinkoff.test", "tinkoff.test"]
+    assert all(request.headers["Authorization"] == "Bearer test-token" for request in requests)
+
+
+@pytest.mark.anyio
+async def test_resolve_share_figi_uses_index_and_falls_back_to_share_by() -> None:
+    requests: List[httpx.Request] = []
+
+    async with _build_client(requests) as client:
+        assert client.figi_index.load(await client.fetch_shares()) == 2
+        assert await client.resolve_share_figi(ticker="sber") == "BBG004730N88"
+        assert await client.resolve_share_figi(ticker="LKOH") == "FIGI_LKOH"
+        assert await client.resolve_share_figi(ticker="LKOH") == "FIGI_LKOH"
+
+    assert [request.url.path.rsplit("/", 1)[-1] for request in requests] == ["Shares", "ShareBy"]
+
+
+def _build_counting_client(requests: List[httpx.Request], status: int = 200) -> TinkoffClient:
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        if request.url.path.endswith("/ShareBy"):
+            body: Dict[str, Any] = json.loads(request.content)
+            return httpx.Response(status, json={"instrument": {"figi": f"FIGI_{body['id']}"}})
+        return httpx.Response(status, json={"payload": {"candles": [{"volume": "1"}]}})
+
+    return TinkoffClient(
+        token="test-token",
+        base_url="http://tinkoff.test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        rate_limiter=TinkoffRateLimiter(default_limit=1000, max_retries=0),
+    )
+
+
+@pytest.mark.anyio
+async def test_concurrent_identical_fetches_share_one_upstream_call() -> None:
+    requests: List[httpx.Request] = []
+    client = _build_counting_client(requests)
+    time_to = datetime(2024, 1, 2, 12, 0, 0, 500_000)
+
+    figis = await asyncio.gather(*(client.resolve_share_figi(ticker="sber") for _ in range(10)))
+    candles = await asyncio.gather(
+        *(
+            client.get_candles(
+                figi="F1",
+                time_from=time_to - timedelta(days=1),
+                time_to=time_to + timedelta(microseconds=idx),
+            )
+            for idx in range(10)
+        ),
+        client.get_candles(figi="F2", time_from=time_to - timedelta(days=1), time_to=time_to),
+    )
+    # После завершения вызова ключ освобождается, следующий запрос идет в API
+    await client.get_candles(figi="F1", time_from=time_to - timedelta(days=1), time_to=time_to)
+
+    assert set(figis) == {"FIGI_sber"}
+    assert all(series.volume.tolist() == [1] for series in candles)
+    assert [request.url.path.rsplit("/", 1)[-1] for request in requests] == [
+        "ShareBy",
+        "GetCandles",
+        "GetCandles",
+        "GetCandles",
+    ]
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_upstream_error() -> None:
+    requests: List[httpx.Request] = []
+    client = _build_counting_client(requests, status=404)
+
+    results = await asyncio.gather(
+        *(client.resolve_share_figi(ticker="NONE") for _ in range(5)), return_exceptions=True
+    )
+
+    assert len(requests) == 1
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_get_candles_downloads_long_range_in_chunks() -> None:
+    windows: List[Dict[str, Any]] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        body: Dict[str, Any] = json.loads(request.content)
+        windows.append(body)
+        start = datetime.fromisoformat(body["from"])
+        end = datetime.fromisoformat(body["to"])
+        # Границы включаются в обе соседние части, как может ответить API
+        candles = []
+        moment = start
+        while moment <= end:
+            candles.append({"time": moment.isoformat(), "volume": "1"})
+            moment += timedelta(hours=1)
+        return httpx.Response(200, json={"candles": candles})
+
+    client = TinkoffClient(
+        token="test-token",
+        base_url="http://tinkoff.test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        rate_limiter=TinkoffRateLimiter(default_limit=1000),
+    )
+    time_from = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    candles = await client.get_candles(
+        figi="F1",
+        time_from=time_from,
+        time_to=time_from + timedelta(days=20),
+        interval="CANDLE_INTERVAL_HOUR",
+    )
+
+    assert len(windows) == 3
+    assert all(
+        datetime.fromisoformat(w["to"]) - datetime.fromisoformat(w["from"]) <= timedelta(days=7)
+        for w in windows
+    )
+    assert len(candles) == 20 * 24 + 1
+    assert (candles.time[1:] - candles.time[:-1] == 3600).all()
+
+
+@pytest.mark.anyio
+async def test_resolve_share_figi_uses_shared_cache_of_other_workers() -> None:
+    shared = TieredCache([MemoryBackend(16)], namespace="figi")
+    first_requests: List[httpx.Request] = []
+    second_requests: List[httpx.Request] = []
+    first = _build_counting_client(first_requests)
+    second = _build_counting_client(second_requests)
+    first.shared_cache = second.shared_cache = shared
+
+    assert await first.resolve_share_figi(ticker="LKOH") == "FIGI_LKOH"
+    assert await second.resolve_share_figi(ticker="lkoh") == "FIGI_LKOH"
+
+    assert len(first_requests) == 1
+    assert second_requests == []
+    assert second.figi_index.get("LKOH", "TQBR") == "FIGI_LKOH"
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from src.integrations.tinkoff_decoder import decode_candles, decode_shares, iter_array_items
+
+
+def test_iter_array_items_handles_wrapped_and_empty_arrays() -> None:
+    assert list(
+        iter_array_items('{"payload": {"candles": [ {"a": 1} , {"a": [2]} ]}}', "candles")
+    ) == [
+        {"a": 1},
+        {"a": [2]},
+    ]
+    assert list(iter_array_items('{"candles": [ ]}', "candles")) == []
+    assert list(iter_array_items('{"candles": null}', "candles")) == []
+    assert list(iter_array_items("{}", "candles")) == []
+    with pytest.raises(ValueError):
+        list(iter_array_items('{"candles": {"a": 1}}', "candles"))
+
+
+def test_decode_candles_matches_full_parse() -> None:
+    candles = [
+        {
+            "open": {"units": "10", "nano": 0},
+            "close": {"units": "10", "nano": 250000000},
+            "volume": "42",
+            "time": "2024-01-10T07:00:00Z",
+            "isComplete": idx < 2,
+        }
+        for idx in range(3)
+    ]
+    body = json.dumps({"payload": {"candles": candles}}, indent=2).encode()
+
+    series = decode_candles(body)
+
+    assert series.to_tinkoff()[0]["close"] == {"units": "10", "nano": 250000000}
+    assert series.volume.tolist() == [42, 42, 42]
+    assert series.is_complete.tolist() == [True, True, False]
+
+
+def test_decode_shares_keeps_only_used_fields() -> None:
+    body = json.dumps(
+        {
+            "instruments": [
+                {"figi": "F1", "ticker": "SBER", "classCode": "TQBR", "nominal": {"units": "3"}},
+                {"figi": "F2", "name": 'Компания "instruments"', "lot": 10},
+            ]
+        },
+        ensure_ascii=False,
+    ).encode()
+
+    assert decode_shares(body) == [
+        {"figi": "F1", "ticker": "SBER", "classCode": "TQBR"},
+        {"figi": "F2", "name": 'Компания "instruments"', "lot": 10},
+    ]
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+import pytest
+
+from src.schemas.trends import TrendResult
+from src.services import ai_analysis
+from src.services.ai_analysis import (
+    build_reduce_prompt,
+    build_user_prompts,
+    run_analysis,
+    stream_analysis,
+)
+from src.settings import settings
+
+
+def _results(count: int) -> List[TrendResult]:
+    return [
+        TrendResult(ticker=f"T{idx:02d}", analysis={"current_price": 100.0 + idx})
+        for idx in range(count)
+    ]
+
+
+class _FakeGigaChatCalls:
+    """Подменяет вызовы GigaChat: части отвечают с задержкой, резюме — сразу."""
+
+    def __init__(self, delay: float = 0.02) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.reduce_prompts: List[str] = []
+
+    async def invoke(self, *, llm: Any, user_message: str, system_prompt: str) -> str:
+        if system_prompt == settings.reduce_system_prompt:
+            self.reduce_prompts.append(user_message)
+            return "## Общее резюме по портфелю"
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        first_ticker = user_message.split("```csv")[1].split()[1].split(";")[0]
+        return f"## Тикер: {first_ticker}"
+
+    def stream(self, *, llm: Any, user_message: str, system_prompt: str) -> AsyncIterator[str]:
+        async def _chunks() -> AsyncIterator[str]:
+            text = await self.invoke(
+                llm=llm, user_message=user_message, system_prompt=system_prompt
+            )
+            for word in text.split(" "):
+                yield word + " "
+
+        return _chunks()
+
+
+@pytest.fixture()
+def fake_calls(monkeypatch: pytest.MonkeyPatch) -> _FakeGigaChatCalls:
+    calls = _FakeGigaChatCalls()
+    monkeypatch.setattr(ai_analysis, "invoke_gigachat_with_system_prompt", calls.invoke)
+    monkeypatch.setattr(ai_analysis, "stream_gigachat_with_system_prompt", calls.stream)
+    return calls
+
+
+def test_build_user_prompts_splits_large_lists_into_chunks() -> None:
+    assert len(build_user_prompts(_results(10), chunk_size=10)) == 1
+
+    prompts = build_user_prompts(_results(23), chunk_size=10)
+
+    assert len(prompts) == 3
+    assert "T20;" in prompts[2] and "T19;" not in prompts[2]
+    assert all("Не добавляй раздел" in prompt for prompt in prompts)
+
+
+@pytest.mark.anyio
+async def test_run_analysis_maps_chunks_in_parallel_and_reduces(
+    fake_calls: _FakeGigaChatCalls,
+) -> None:
+    prompts = build_user_prompts(_results(40), chunk_size=5)
+    reduce_prompt = build_reduce_prompt(_results(40))
+
+    started = asyncio.get_running_loop().time()
+    review = await run_analysis(
+        object(), prompts, concurrency=8, reduce_prompt=reduce_prompt  # type: ignore[arg-type]
+    )
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert review.split("\n\n") == [
+        *(f"## Тикер: T{idx:02d}" for idx in range(0, 40, 5)),
+        "## Общее резюме по портфелю",
+    ]
+    assert fake_calls.peak == 8
+    assert elapsed < fake_calls.delay * 4
+    assert fake_calls.reduce_prompts == [reduce_prompt]
+
+
+@pytest.mark.anyio
+async def test_run_analysis_respects_concurrency_cap(fake_calls: _FakeGigaChatCalls) -> None:
+    prompts = build_user_prompts(_results(30), chunk_size=5)
+
+    await run_analysis(
+        object(), prompts, concurrency=2, reduce_prompt="summary"  # type: ignore[arg-type]
+    )
+
+    assert fake_calls.peak == 2
+
+
+@pytest.mark.anyio
+async def test_stream_analysis_yields_chunks_in_order_then_summary(
+    fake_calls: _FakeGigaChatCalls,
+) -> None:
+    prompts = build_user_prompts(_results(6), chunk_size=3)
+
+    chunks = [
+        chunk
+        async for chunk in stream_analysis(
+            object(), prompts, concurrency=2, reduce_prompt="summary"  # type: ignore[arg-type]
+        )
+    ]
+
+    assert chunks[:2] == ["## Тикер: T00\n\n", "## Тикер: T03\n\n"]
+    assert "".join(chunks[2:]).strip() == "## Общее резюме по портфелю"
+
+
+def test_reduce_prompt_uses_compact_signals_instead_of_reviews() -> None:
+    results = [
+        TrendResult(
+            ticker=f"T{idx:02d}",
+            analysis={
+                "current_price": 100.0 + idx,
+                "rsi": 55.5,
+                "rsi_signal": "Neutral",
+                "support_levels": [90.0, 80.0],
+                "overall_trend": "Bullish",
+            },
+        )
+        for idx in range(40)
+    ]
+
+    prompt = build_reduce_prompt(results)
+    header = prompt.split("```csv")[1].split()[0]
+
+    assert header == "ticker;current_price;rsi;rsi_signal;volume_signal;overall_trend"
+    assert "T39;139.0;55.5;Neutral;;Bullish" in prompt
+    assert "support_levels" not in prompt
+
+
+@pytest.mark.anyio
+async def test_run_analysis_requires_reduce_prompt_for_chunks(
+    fake_calls: _FakeGigaChatCalls,
+) -> None:
+    prompts = build_user_prompts(_results(6), chunk_size=3)
+
+    with pytest.raises(ValueError, match="reduce_prompt"):
+        await run_analysis(object(), prompts, concurrency=2)  # type: ignore[arg-type]
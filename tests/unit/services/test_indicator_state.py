@@ -0,0 +1,85 @@
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from src.core.candles import CandleSeries, format_time
+from src.services.indicator_state import IndicatorRegistry, IndicatorState
+from src.services.trading import analyse_stock_trends
+
+
+def _build_series(count: int, seed: int, tick: float) -> CandleSeries:
+    rng = random.Random(seed)
+    price = 100.0
+    candles: List[Dict[str, Any]] = []
+    for idx in range(count):
+        price = max(tick, round(price + rng.choice((-2, -1, 0, 1, 2)) * tick, 2))
+        units = int(price)
+        candles.append(
+            {
+                "close": {"units": units, "nano": round((price - units) * 1e9)},
+                "volume": str(rng.randint(0, 5_000)),
+                "time": format_time(1_700_000_000 + idx * 3600),
+            }
+        )
+    return CandleSeries.from_tinkoff(candles)
+
+
+def _without_timestamp(analysis: Any) -> Dict[str, Any]:
+    result = dict(analysis)
+    result.pop("timestamp", None)
+    return result
+
+
+@pytest.mark.parametrize("count", [1, 15, 21, 60, 250])
+def test_state_matches_batch_analysis_on_whole_prices(count: int) -> None:
+    series = _build_series(count, seed=count, tick=1.0)
+
+    state = IndicatorState.from_series(series)
+
+    assert _without_timestamp(state.snapshot()) == _without_timestamp(analyse_stock_trends(series))
+
+
+def test_state_tracks_batch_analysis_candle_by_candle() -> None:
+    series = _build_series(300, seed=7, tick=0.01)
+    state = IndicatorState(levels_window=3)
+
+    for idx in range(len(series)):
+        state.update_series(series[: idx + 1])
+        online = state.snapshot()
+        batch = analyse_stock_trends(series[: idx + 1], levels_window=3)
+        assert online["current_price"] == batch["current_price"]
+        assert online["support_levels"] == batch["support_levels"]
+        assert online["resistance_levels"] == batch["resistance_levels"]
+        assert online["volume_trend"] == batch["volume_trend"]
+        # Суммы в целых нано-единицах могут разойтись с суммой float на границе округления
+        for name, value in batch["moving_averages"].items():
+            assert online["moving_averages"][name] == pytest.approx(value, abs=0.011)
+        assert online["rsi"] == pytest.approx(batch["rsi"], abs=0.011)
+
+
+def test_open_candle_is_replaced_until_closed() -> None:
+    registry = IndicatorRegistry()
+    series = _build_series(40, seed=1, tick=1.0)
+    series.is_complete[-1] = False
+    registry.update("FIGI", "HOUR", series)
+
+    closed = _build_series(40, seed=1, tick=1.0)
+    closed.close[-1] += 5_000_000_000
+    analysis = registry.update("FIGI", "HOUR", closed)
+
+    state = registry.get("FIGI", "HOUR")
+    assert state is not None and state.count == 40
+    assert _without_timestamp(analysis) == _without_timestamp(analyse_stock_trends(closed))
+
+
+def test_registry_rebuilds_state_after_a_gap() -> None:
+    registry = IndicatorRegistry()
+    series = _build_series(60, seed=3, tick=1.0)
+    registry.update("FIGI", "HOUR", series[:20])
+
+    analysis = registry.update("FIGI", "HOUR", series[30:])
+
+    state = registry.get("FIGI", "HOUR")
+    assert state is not None and state.count == 30
+    assert _without_timestamp(analysis) == _without_timestamp(analyse_stock_trends(series[30:]))
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+from src.integrations.figi_index import FigiIndex
+from src.schemas.stocks import StockFilters
+from src.services.instrument_catalog import InstrumentCatalog
+from tests.unit.fakes import FakeTinkoffClient
+
+
+def _body(raw: bytes) -> List[str]:
+    return [item["ticker"] for item in json.loads(raw)["items"]]
+
+
+@pytest.mark.anyio
+async def test_render_filters_by_indexed_fields_case_insensitively() -> None:
+    catalog = InstrumentCatalog(FakeTinkoffClient(), ttl_seconds=60)  # type: ignore[arg-type]
+
+    default, _ = await catalog.render(StockFilters())
+    energy, _ = await catalog.render(StockFilters(sector="ENERGY"))
+    foreign, _ = await catalog.render(
+        StockFilters(classCode="spbxm", countryOfRisk="us", exchange="spb")
+    )
+
+    assert _body(default) == ["SBER", "GAZP"]
+    assert _body(energy) == ["GAZP"]
+    assert _body(foreign) == ["AAPL"]
+
+
+@pytest.mark.anyio
+async def test_repeat_requests_reuse_snapshot_and_rendered_bytes() -> None:
+    client = FakeTinkoffClient()
+    catalog = InstrumentCatalog(client, ttl_seconds=60)  # type: ignore[arg-type]
+
+    results = await asyncio.gather(*(catalog.render(StockFilters()) for _ in range(5)))
+    again = await catalog.render(StockFilters())
+
+    assert len(client.calls) == 1
+    assert all(result is results[0] for result in results)
+    assert again is results[0]
+    assert again[1].startswith('"') and again[1].endswith('"')
+
+
+@pytest.mark.anyio
+async def test_refresh_reloads_sources_and_figi_index() -> None:
+    client = FakeTinkoffClient()
+    figi_index = FigiIndex()
+    catalog = InstrumentCatalog(
+        client, ttl_seconds=60, figi_index=figi_index  # type: ignore[arg-type]
+    )
+
+    await catalog.refresh()
+    await catalog.render(StockFilters(instrumentStatus="INSTRUMENT_STATUS_ALL"))
+    await catalog.refresh()
+
+    assert figi_index.get("sber", "tqbr") == "F1"
+    assert [call["instrument_status"] for call in client.calls] == [
+        "INSTRUMENT_STATUS_BASE",
+        "INSTRUMENT_STATUS_ALL",
+        "INSTRUMENT_STATUS_BASE",
+        "INSTRUMENT_STATUS_ALL",
+    ]
+
+
+@pytest.mark.anyio
+async def test_least_recently_used_sources_are_evicted() -> None:
+    client = FakeTinkoffClient()
+    catalog = InstrumentCatalog(client, ttl_seconds=60, max_sources=2)  # type: ignore[arg-type]
+
+    await catalog.render(StockFilters())
+    await catalog.render(StockFilters(instrumentStatus="INSTRUMENT_STATUS_ALL"))
+    await catalog.render(StockFilters(instrumentExchange="INSTRUMENT_EXCHANGE_DEALER"))
+    client.calls.clear()
+    await catalog.refresh()
+
+    assert [(call["instrument_status"], call["instrument_exchange"]) for call in client.calls] == [
+        ("INSTRUMENT_STATUS_BASE", "INSTRUMENT_EXCHANGE_UNSPECIFIED"),
+        ("INSTRUMENT_STATUS_BASE", "INSTRUMENT_EXCHANGE_DEALER"),
+    ]
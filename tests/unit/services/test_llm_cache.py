@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, List
+
+import pytest
+
+from src.core.cache import DiskCache
+from src.services.llm_cache import LLMResponseCache
+
+
+def _key(user_prompt: str = "prompt") -> str:
+    return LLMResponseCache.make_key(
+        system_prompt="system", user_prompt=user_prompt, model="GigaChat", temperature=0.2
+    )
+
+
+def test_make_key_depends_on_all_inputs() -> None:
+    base = _key()
+    assert base == _key()
+    assert base != _key("other prompt")
+    assert base != LLMResponseCache.make_key(
+        system_prompt="system", user_prompt="prompt", model="GigaChat", temperature=0.3
+    )
+
+
+@pytest.mark.anyio
+async def test_get_or_call_invokes_llm_once_for_concurrent_requests() -> None:
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+    calls: List[str] = []
+
+    async def _invoke() -> str:
+        calls.append("call")
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    answers = await asyncio.gather(*(cache.get_or_call(_key(), _invoke) for _ in range(10)))
+
+    assert answers == ["answer"] * 10
+    assert await cache.get_or_call(_key(), _invoke) == "answer"
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_failed_call_is_not_cached() -> None:
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def _fail() -> str:
+        raise RuntimeError("GigaChat is unavailable")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_call(_key(), _fail)
+    assert await cache.get(_key()) is None
+
+
+@pytest.mark.anyio
+async def test_stream_or_call_shares_one_generation_between_streams() -> None:
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+    calls: List[str] = []
+    release = asyncio.Event()
+
+    async def _generate() -> AsyncIterator[str]:
+        calls.append("call")
+        yield "first "
+        await release.wait()
+        yield "second"
+
+    async def _read() -> str:
+        return "".join([chunk async for chunk in cache.stream_or_call(_key(), _generate)])
+
+    readers = [asyncio.create_task(_read()) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    # Буферизованный запрос во время генерации ждет тот же поток
+    buffered = asyncio.create_task(cache.get_or_call(_key(), _unexpected_call))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await asyncio.gather(*readers, buffered) == ["first second"] * 6
+    assert len(calls) == 1
+    assert await cache.get(_key()) == "first second"
+    assert [chunk async for chunk in cache.stream_or_call(_key(), _generate)] == ["first second"]
+
+
+@pytest.mark.anyio
+async def test_stream_or_call_shares_errors_and_skips_cache() -> None:
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def _fail() -> AsyncIterator[str]:
+        yield "partial"
+        raise RuntimeError("stream broken")
+
+    async def _read() -> List[str]:
+        return [chunk async for chunk in cache.stream_or_call(_key(), _fail)]
+
+    results = await asyncio.gather(_read(), _read(), return_exceptions=True)
+
+    assert [str(result) for result in results] == ["stream broken"] * 2
+    assert await cache.get(_key()) is None
+
+
+async def _unexpected_call() -> str:
+    raise AssertionError("LLM must not be called")
+
+
+@pytest.mark.anyio
+async def test_disk_tier_survives_new_instance(tmp_path: Path) -> None:
+    await LLMResponseCache(ttl_seconds=60, max_entries=8, disk_dir=tmp_path).set(_key(), "answer")
+
+    restored = LLMResponseCache(ttl_seconds=60, max_entries=8, disk_dir=tmp_path)
+
+    assert await restored.get(_key()) == "answer"
+
+
+@pytest.mark.anyio
+async def test_disk_tier_runs_outside_event_loop_thread(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    threads: List[int] = []
+    original_get = DiskCache.get
+
+    def _get(self: DiskCache, key: str) -> Any:
+        threads.append(threading.get_ident())
+        return original_get(self, key)
+
+    monkeypatch.setattr(DiskCache, "get", _get)
+    await LLMResponseCache(ttl_seconds=60, max_entries=8, disk_dir=tmp_path).set(_key(), "answer")
+
+    restored = LLMResponseCache(ttl_seconds=60, max_entries=8, disk_dir=tmp_path)
+
+    assert await restored.get(_key()) == "answer"
+    assert threads and threading.get_ident() not in threads
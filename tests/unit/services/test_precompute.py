@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from src.schemas.trends import TrendsRequest
+from src.services.precompute import TrendPrecomputer
+from tests.unit.fakes import TrendsClient
+
+
+def _precomputer(client: TrendsClient) -> TrendPrecomputer:
+    return TrendPrecomputer(
+        client,  # type: ignore[arg-type]
+        tickers=["SBER", "GAZP"],
+        class_code="TQBR",
+        intervals=["CANDLE_INTERVAL_DAY"],
+        days=60,
+    )
+
+
+@pytest.mark.anyio
+async def test_collect_serves_watchlist_from_table_and_computes_the_rest() -> None:
+    client = TrendsClient()
+    precomputer = _precomputer(client)
+    assert await precomputer.refresh("CANDLE_INTERVAL_DAY") == 2
+    client.candle_calls.clear()
+
+    results = await precomputer.collect(
+        client, TrendsRequest(tickers=["sber", "LKOH", "GAZP"])  # type: ignore[arg-type]
+    )
+
+    assert [result.ticker for result in results] == ["sber", "LKOH", "GAZP"]
+    assert results[0].figi == "FIGI_SBER"
+    assert client.candle_calls == ["FIGI_LKOH"]
+
+
+@pytest.mark.anyio
+async def test_refresh_updates_indicator_state_with_new_candles_only() -> None:
+    client = TrendsClient()
+    precomputer = _precomputer(client)
+    await precomputer.refresh("CANDLE_INTERVAL_DAY")
+    state = precomputer.indicators.get("FIGI_SBER", "CANDLE_INTERVAL_DAY")
+
+    client.candles = 31
+    await precomputer.refresh("CANDLE_INTERVAL_DAY")
+
+    assert precomputer.indicators.get("FIGI_SBER", "CANDLE_INTERVAL_DAY") is state
+    assert state is not None and state.count == 31
+    result = precomputer.lookup(TrendsRequest(tickers=["SBER"]))[0]
+    assert result.analysis["current_price"] == 130
+
+
+@pytest.mark.anyio
+async def test_lookup_ignores_requests_with_other_parameters() -> None:
+    client = TrendsClient()
+    precomputer = _precomputer(client)
+    await precomputer.refresh("CANDLE_INTERVAL_DAY")
+
+    assert precomputer.lookup(TrendsRequest(tickers=["SBER"], days=30)) == {}
+    assert (
+        precomputer.lookup(TrendsRequest(tickers=["SBER"], interval="CANDLE_INTERVAL_HOUR")) == {}
+    )
+    assert list(precomputer.lookup(TrendsRequest(tickers=["SBER"]))) == [0]
+
+
+@pytest.mark.anyio
+async def test_failed_refresh_keeps_previous_result() -> None:
+    client = TrendsClient()
+    precomputer = _precomputer(client)
+    await precomputer.refresh("CANDLE_INTERVAL_DAY")
+
+    client.failing.add("FIGI_GAZP")
+    assert await precomputer.refresh("CANDLE_INTERVAL_DAY") == 1
+
+    assert len(precomputer) == 2
+    assert "error" not in precomputer.lookup(TrendsRequest(tickers=["GAZP"]))[0].analysis
+
+
+@pytest.mark.anyio
+async def test_lookup_skips_results_older_than_one_interval() -> None:
+    client = TrendsClient()
+    precomputer = _precomputer(client)
+    await precomputer.refresh("CANDLE_INTERVAL_DAY")
+    payload = TrendsRequest(tickers=["SBER", "GAZP"])
+
+    fresh = precomputer.lookup(payload, now=time.time() + 86_400)
+    stale = precomputer.lookup(payload, now=time.time() + 86_400 + precomputer.delay_seconds + 1)
+
+    assert list(fresh) == [0, 1]
+    assert stale == {}
+
+
+def test_unknown_interval_and_missing_catalog_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        TrendPrecomputer(
+            TrendsClient(),  # type: ignore[arg-type]
+            tickers=["SBER"],
+            class_code="TQBR",
+            intervals=["CANDLE_INTERVAL_UNSPECIFIED"],
+            days=60,
+        )
+    with pytest.raises(ValueError):
+        TrendPrecomputer(
+            TrendsClient(),  # type: ignore[arg-type]
+            tickers=["*"],
+            class_code="TQBR",
+            intervals=["CANDLE_INTERVAL_DAY"],
+            days=60,
+        )
+
+
+def test_next_run_is_scheduled_after_candle_close() -> None:
+    precomputer = _precomputer(TrendsClient())
+    day = 1_700_006_400  # полночь UTC
+
+    assert precomputer.seconds_until_next_close("CANDLE_INTERVAL_DAY", now=day - 60) == 65
@@ -0,0 +1,88 @@
+import json
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+from src.schemas.trends import TrendResult
+from src.services.prompt_encoder import (
+    PromptTooLargeError,
+    encode_trends_table,
+    ensure_prompt_fits,
+    estimate_tokens,
+)
+from src.services.trading import build_trend_json
+
+
+def _result(ticker: str, price: float = 250.5) -> TrendResult:
+    analysis = build_trend_json(
+        current_price=price,
+        sma20=248.123,
+        sma50=240.0,
+        sma200=None,
+        rsi_value=61.5,
+        current_volume=1200,
+        avg_volume20=1000.0,
+        support_prices=[231.1, 235.25],
+        resistance_prices=[262.0],
+    )
+    return TrendResult(figi=f"BBG_{ticker}", ticker=ticker, analysis=analysis)
+
+
+def test_encode_trends_table_renders_one_row_per_ticker() -> None:
+    table = encode_trends_table([_result("SBER"), _result("GAZP", price=160.0)])
+
+    lines = table.splitlines()
+    assert lines[0].split(";")[:3] == ["ticker", "current_price", "sma20"]
+    assert "error" not in lines[0]
+    assert lines[1] == (
+        "SBER;250.5;248.12;240.0;N/A;61.5;Neutral;1200;1000.0;20.00%;Normal;"
+        "231.1/235.25;262.0;Bullish"
+    )
+    assert lines[2].startswith("GAZP;160.0;")
+
+
+def test_encode_trends_table_keeps_error_column_when_needed() -> None:
+    failed = TrendResult(ticker="ABCD", analysis={"error": "Failed to analyse: timeout; retry"})
+
+    lines = encode_trends_table([_result("SBER"), failed]).splitlines()
+
+    assert lines[0].endswith(";error")
+    assert lines[2].startswith("ABCD;")
+    assert lines[2].endswith('"Failed to analyse: timeout; retry"')
+
+
+def test_table_is_much_smaller_than_indented_json() -> None:
+    results = [_result(f"T{idx:03d}") for idx in range(40)]
+    as_json = json.dumps([r.model_dump() for r in results], ensure_ascii=False, indent=2)
+
+    assert estimate_tokens(encode_trends_table(results)) * 3 < estimate_tokens(as_json)
+
+
+def test_estimate_tokens_counts_words_numbers_and_punctuation() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("RSI 70") == 2
+    assert estimate_tokens("перекупленность") == 4
+    assert estimate_tokens("1234567;") == 4
+
+
+@pytest.mark.anyio
+async def test_ensure_prompt_fits_rejects_prompt_over_budget() -> None:
+    with pytest.raises(PromptTooLargeError) as exc_info:
+        await ensure_prompt_fits(system_prompt="system " * 10, user_prompt="data", budget=5)
+
+    assert exc_info.value.tokens > 5
+    assert await ensure_prompt_fits(system_prompt="system", user_prompt="data", budget=5) == 3
+
+
+@pytest.mark.anyio
+async def test_ensure_prompt_fits_uses_gigachat_tokenizer() -> None:
+    class _FakeLLM:
+        async def atokens_count(self, texts: List[str], model: Any = None) -> List[Any]:
+            return [SimpleNamespace(tokens=100) for _ in texts]
+
+    tokens = await ensure_prompt_fits(
+        system_prompt="system", user_prompt="data", budget=500, llm=_FakeLLM()  # type: ignore
+    )
+
+    assert tokens == 200
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.core.candles import CandleSeries
+from src.schemas.screener import ScreenerQuery
+from src.schemas.stocks import ShareItem
+from src.services.instrument_catalog import InstrumentCatalog
+from src.services.screener import (
+    ScreenerCache,
+    apply_filter,
+    compute_indicators,
+    parse_filter,
+    parse_sort,
+    run_screener,
+    screen,
+)
+from src.services.trading import analyse_stock_trends
+from tests.unit.fakes import ScreenerClient, candle_series
+
+
+def _random_series(seed: int, size: int) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 1, size)), 2).tolist()
+    return candle_series(closes, rng.integers(1_000, 5_000, size).tolist())
+
+
+def test_compute_indicators_matches_analyse_stock_trends() -> None:
+    series = [_random_series(seed, size) for seed, size in enumerate((250, 120, 30, 10, 1))]
+
+    columns = compute_indicators(series)
+
+    for row, item in enumerate(series):
+        expected = analyse_stock_trends(item)
+        assert columns["price"][row] == expected["current_price"]
+        for period in ("sma20", "sma50", "sma200"):
+            value = expected["moving_averages"][period]
+            if value == "N/A":
+                assert np.isnan(columns[period][row])
+            else:
+                assert round(columns[period][row], 2) == pytest.approx(value)
+        if expected["rsi"] == "N/A":
+            assert np.isnan(columns["rsi"][row])
+        else:
+            assert round(columns["rsi"][row], 2) == pytest.approx(expected["rsi"])
+        assert columns["rsi_signal"][row] == expected["rsi_signal"]
+        assert columns["trend"][row] == expected["overall_trend"]
+        assert columns["volume"][row] == expected["volume_trend"]["current"]
+
+
+def test_parse_filter_and_sort_validate_expressions() -> None:
+    conditions = parse_filter("rsi < 30, price>=sma50,trend=Bullish")
+
+    assert [(c.field, c.op, c.value) for c in conditions] == [
+        ("rsi", "<", 30.0),
+        ("price", ">=", "sma50"),
+        ("trend", "=", "Bullish"),
+    ]
+    assert parse_sort("-rsi, ticker") == [("rsi", True), ("ticker", False)]
+    for expression in ("rsi", "foo<1", "rsi<abc", "trend>Bullish"):
+        with pytest.raises(ValueError):
+            parse_filter(expression)
+    with pytest.raises(ValueError):
+        parse_sort("-foo")
+
+
+def test_screen_filters_sorts_and_paginates() -> None:
+    rising = candle_series([float(price) for price in range(1, 61)], [100] * 60)
+    falling = candle_series([float(price) for price in range(60, 0, -1)], [100] * 60)
+    short = candle_series([10.0, 11.0], [100, 100])
+    items = [ShareItem(figi=f"F{idx}", ticker=f"T{idx}") for idx in range(4)]
+    series = [rising, falling, short, falling]
+
+    oversold = screen(items, series, ScreenerQuery(filter="rsi<30,price<sma50", sort="-ticker"))
+    page = screen(items, series, ScreenerQuery(sort="-sma20,ticker", limit=2, offset=1))
+
+    assert [row.ticker for row in oversold.items] == ["T3", "T1"]
+    assert oversold.items[0].trend == "Bearish"
+    assert oversold.matched == 2
+    # T2 без SMA20 идет последним независимо от направления сортировки
+    assert page.matched == 4
+    assert [row.ticker for row in page.items] == ["T1", "T3"]
+    assert page.items[0].sma200 is None
+
+
+def test_apply_filter_never_matches_missing_values() -> None:
+    columns = compute_indicators([_random_series(1, 250), _random_series(2, 30)])
+
+    mask = apply_filter(columns, parse_filter("sma200!=0,sma200!=sma50"))
+
+    assert np.isnan(columns["sma200"][1])
+    assert mask.tolist() == [True, False]
+
+
+@pytest.mark.anyio
+async def test_run_screener_selects_class_code_and_counts_failures() -> None:
+    client = ScreenerClient()
+    catalog = InstrumentCatalog(client, ttl_seconds=60)  # type: ignore[arg-type]
+
+    response = await run_screener(client, catalog, ScreenerQuery())  # type: ignore[arg-type]
+
+    assert response.total == 2
+    assert response.failed == 1
+    assert [row.ticker for row in response.items] == ["SBER"]
+    assert response.items[0].rsi == 100.0
+
+
+@pytest.mark.anyio
+async def test_screener_cache_builds_table_once_and_refreshes_it_in_background() -> None:
+    client = ScreenerClient()
+    catalog = InstrumentCatalog(client, ttl_seconds=60)  # type: ignore[arg-type]
+    cache = ScreenerCache(max_ttl_seconds=60)
+    queries = [ScreenerQuery(filter="rsi>70"), ScreenerQuery(sort="-rsi"), ScreenerQuery()]
+
+    responses = await asyncio.gather(
+        *(run_screener(client, catalog, query, cache) for query in queries)  # type: ignore[arg-type]
+    )
+    await run_screener(client, catalog, ScreenerQuery(limit=1), cache)  # type: ignore[arg-type]
+
+    assert [response.matched for response in responses] == [1, 1, 1]
+    assert sorted(client.candle_calls) == ["F1", "F2"]
+
+    # Устаревшая таблица отдается сразу, новая строится в фоне
+    stale = await cache.table(
+        client, catalog, ScreenerQuery(), now=time.time() + 61  # type: ignore[arg-type]
+    )
+    assert stale.total == 2
+    assert len(client.candle_calls) == 2
+    await asyncio.sleep(0.01)
+    assert len(client.candle_calls) == 4
+    await cache.aclose()
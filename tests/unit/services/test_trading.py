@@ -1,6 +1,14 @@
-from typing import Any, Dict, List
+import random
+from typing import Any, Dict, List, Optional
 
-from src.services.trading import analyse_stock_trends
+import pytest
+
+from src.services.trading import (
+    _calculate_rsi,
+    _calculate_sma,
+    _find_support_resistance,
+    analyse_stock_trends,
+)
 
 
 def _build_candles(count: int = 60) -> List[Dict[str, Any]]:
@@ -21,3 +29,121 @@ def test_analyse_stock_trends_computes_basic_metrics() -> None:
     assert result["moving_averages"]["sma20"] != "N/A"
     assert result["moving_averages"]["sma50"] != "N/A"
     assert result["overall_trend"] == "Bullish"
+
+
+# Эталонные (исходные) реализации на чистом Python для проверки паритета
+def _reference_sma(values: List[float], period: int) -> Optional[float]:
+    if period <= 0 or len(values) < period:
+        return None
+    return sum(values[-period:]) / period
+
+
+def _reference_rsi(prices: List[float], period: int = 14) -> Optional[float]:
+    if period <= 0 or len(prices) < period + 1:
+        return None
+
+    gains = 0.0
+    losses = 0.0
+    for idx in range(len(prices) - period, len(prices)):
+        change = prices[idx] - prices[idx - 1]
+        if change > 0:
+            gains += change
+        else:
+            losses += abs(change)
+
+    avg_gain = gains / period
+    avg_loss = losses / period
+    if avg_loss == 0:
+        return 100.0
+
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def _reference_support_resistance(prices: List[float], window: int = 5) -> List[Dict[str, Any]]:
+    if window <= 0 or len(prices) < (2 * window) + 1:
+        return []
+
+    levels: List[Dict[str, Any]] = []
+    for idx in range(window, len(prices) - window):
+        current = prices[idx]
+        is_support = all(
+            prices[j] >= current for j in range(idx - window, idx + window + 1) if j != idx
+        )
+        is_resistance = all(
+            prices[j] <= current for j in range(idx - window, idx + window + 1) if j != idx
+        )
+
+        if is_support:
+            levels.append({"type": "support", "price": current, "index": idx})
+        if is_resistance:
+            levels.append({"type": "resistance", "price": current, "index": idx})
+
+    return levels
+
+
+def _random_series(seed: int, count: int, tick: float) -> List[float]:
+    rng = random.Random(seed)
+    price = 100.0
+    prices = []
+    for _ in range(count):
+        price = max(tick, price + rng.choice((-2, -1, 0, 0, 1, 2)) * tick)
+        prices.append(round(price, 2))
+    return prices
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_vectorized_indicators_match_reference(seed: int) -> None:
+    prices = _random_series(seed, count=20 + seed * 7, tick=0.01 if seed % 2 else 1.0)
+
+    for period in (0, 14, 20, 50, 200):
+        assert _calculate_sma(prices, period) == _reference_sma(prices, period)
+    assert _calculate_rsi(prices) == _reference_rsi(prices)
+    for window in (0, 1, 2, 5, 9, 25, 60):
+        assert _find_support_resistance(prices, window) == _reference_support_resistance(
+            prices, window
+        )
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_analyse_stock_trends_matches_reference(seed: int) -> None:
+    rng = random.Random(seed)
+    prices = _random_series(seed, count=1 + seed * 6, tick=0.01)
+    candles = [
+        {
+            "close": {"units": int(price), "nano": round((price - int(price)) * 1e9)},
+            "volume": str(rng.randint(0, 5_000)),
+        }
+        for price in prices
+    ]
+    closes = [candle["close"]["units"] + candle["close"]["nano"] / 1e9 for candle in candles]
+    volumes = [int(candle["volume"]) for candle in candles]
+
+    result = dict(analyse_stock_trends({"candles": candles}))
+    result.pop("timestamp")
+
+    sma20 = _reference_sma(closes, 20)
+    sma50 = _reference_sma(closes, 50)
+    sma200 = _reference_sma(closes, 200)
+    rsi = _reference_rsi(closes)
+    avg_volume20 = _reference_sma(volumes, 20)
+    volume_trend = ((volumes[-1] - avg_volume20) / avg_volume20 * 100) if avg_volume20 else 0.0
+    levels = _reference_support_resistance(closes)
+
+    assert result["current_price"] == closes[-1]
+    assert result["moving_averages"] == {
+        "sma20": round(sma20, 2) if sma20 is not None else "N/A",
+        "sma50": round(sma50, 2) if sma50 is not None else "N/A",
+        "sma200": round(sma200, 2) if sma200 is not None else "N/A",
+    }
+    assert result["rsi"] == (round(rsi, 2) if rsi is not None else "N/A")
+    assert result["volume_trend"]["current"] == volumes[-1]
+    assert result["volume_trend"]["percent_change"] == f"{volume_trend:.2f}%"
+    assert (
+        result["support_levels"]
+        == [round(level["price"], 2) for level in levels if level["type"] == "support"][-3:]
+    )
+    assert (
+        result["resistance_levels"]
+        == [round(level["price"], 2) for level in levels if level["type"] == "resistance"][-3:]
+    )
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from src.core.candles import CandleSeries
+from src.schemas.trends import TrendsRequest
+from src.services.trends import collect_trends, iter_trends
+from tests.unit.fakes import TrendsClient
+
+
+@pytest.mark.anyio
+async def test_collect_trends_keeps_order_and_isolates_errors() -> None:
+    client = TrendsClient()
+    client.delays = {"FIGI_SLOW": 0.05, "FIGI_SBER": 0.01, "FIGI_GAZP": 0.01}
+    payload = TrendsRequest(tickers=["SLOW", "FAIL", "SBER", "GAZP"])
+
+    results = await collect_trends(client, payload, concurrency=2)  # type: ignore[arg-type]
+
+    assert [result.ticker for result in results] == ["SLOW", "FAIL", "SBER", "GAZP"]
+    assert results[0].figi == "FIGI_SLOW"
+    assert "FIGI not found" in results[1].analysis["error"]
+    assert results[2].analysis["current_price"] == 129
+    assert client.max_in_flight == 2
+
+
+class _BlockingTinkoffClient(TrendsClient):
+    """Свечи тикера SLOW не приходят, пока не выставлен ``release``."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = asyncio.Event()
+        self.cancelled: List[str] = []
+
+    async def get_candles(self, *, figi: str, **kwargs: Any) -> CandleSeries:
+        if figi == "FIGI_SLOW":
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(figi)
+                raise
+        return await super().get_candles(figi=figi, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_iter_trends_yields_fast_ticker_first_and_cancels_pending() -> None:
+    client = _BlockingTinkoffClient()
+    payload = TrendsRequest(tickers=["SLOW", "SBER"])
+
+    stream = iter_trends(client, payload)  # type: ignore[arg-type]
+    index, result = await stream.__anext__()
+
+    assert (index, result.ticker) == (1, "SBER")
+    assert not client.release.is_set()
+
+    await stream.aclose()
+    assert client.cancelled == ["FIGI_SLOW"]